@@ -0,0 +1,98 @@
+# bench_backends.py
+"""
+Run the same inputs through every available inference backend and report
+load time, latency (batch 1 and batched) and agreement with the first backend
+(top-1 match rate and max |score difference|).
+
+Examples:
+    python bench_backends.py                         # static + sequence
+    python bench_backends.py --kinds sequence --n 500 --batch 64
+    python bench_backends.py --kinds dynamic --n 4   # I3D; random init if weights are missing
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from inference_backends import available_backends, create_engine
+
+MODELS_DIR = Path("models")
+DYNAMIC_DIR = Path(__file__).resolve().parent / "WLASL" / "wlasl_model_test"
+
+
+def engine_specs(kind: str) -> dict:
+    if kind == "static":
+        import joblib
+
+        return {"clf": joblib.load(MODELS_DIR / "hand_static.joblib"),
+                "class_names": json.loads((MODELS_DIR / "class_names.json").read_text())}
+    if kind == "sequence":
+        return {"ckpt_path": MODELS_DIR / "seq_model.pt"}
+    weights = DYNAMIC_DIR / "nslt_100.pt"
+    return {"weights_path": weights if weights.exists() else None}
+
+
+def make_inputs(engine, kind: str, n: int, rng) -> np.ndarray:
+    shape = engine.example_input(1).shape[1:]
+    if kind == "dynamic":
+        return rng.integers(0, 256, size=(n,) + shape, dtype=np.uint8)
+    X = rng.normal(0, 0.5, size=(n,) + shape).astype(np.float32)
+    return X
+
+
+def timed(fn, reps: int) -> float:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        fn()
+    return (time.perf_counter() - t0) / reps
+
+
+def bench_kind(kind: str, n: int, batch: int, seed: int):
+    backends = available_backends(kind)
+    print(f"\n[{kind}] backends: {', '.join(backends)}")
+    print(f"{'backend':<12} {'load s':>8} {'b1 ms':>9} {f'b{batch} ms/item':>14} {'top1 agree':>11} {'max |diff|':>11}")
+    spec = engine_specs(kind)
+    X = ref = None
+    for name in backends:
+        if kind != "static":
+            import torch
+
+            torch.manual_seed(seed)  # identical random init when I3D weights are missing
+        t0 = time.perf_counter()
+        try:
+            engine = create_engine(kind, name, **spec)
+            engine.warmup()
+        except Exception as e:
+            print(f"{name:<12} unavailable: {e}")
+            continue
+        load_s = time.perf_counter() - t0
+        if X is None:
+            X = make_inputs(engine, kind, n, np.random.default_rng(seed))
+        out = np.concatenate([engine.predict_batch(X[i : i + batch]) for i in range(0, n, batch)])
+        if ref is None:
+            ref = out
+        agree = float((out.argmax(1) == ref.argmax(1)).mean())
+        diff = float(np.abs(out - ref).max())
+        reps = max(1, min(200, n))
+        b1 = timed(lambda: engine.predict_batch(X[:1]), reps)
+        bb = timed(lambda: engine.predict_batch(X[:batch]), max(1, reps // batch)) / min(batch, n)
+        print(f"{name:<12} {load_s:>8.2f} {b1 * 1e3:>9.3f} {bb * 1e3:>14.4f} {100 * agree:>10.1f}% {diff:>11.2e}",
+              flush=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Latency and agreement across inference backends")
+    ap.add_argument("--kinds", nargs="+", default=["static", "sequence"], choices=["static", "sequence", "dynamic"])
+    ap.add_argument("--n", type=int, default=256, help="Inputs per kind")
+    ap.add_argument("--batch", type=int, default=32)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    for kind in args.kinds:
+        bench_kind(kind, args.n, min(args.batch, args.n), args.seed)
+
+
+if __name__ == "__main__":
+    main()
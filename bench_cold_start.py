@@ -0,0 +1,155 @@
+# bench_cold_start.py
+"""
+Cold-start budget for server.py.
+
+For every route, starts a fresh `uvicorn server:app` process and measures:
+- import:   process spawn -> uvicorn reports startup complete
+- healthy:  process spawn -> first 200 from /health (time-to-first-healthy)
+- first:    process spawn -> first response from the route (time-to-first-prediction)
+- latency:  duration of that first request alone
+
+Examples:
+    python bench_cold_start.py
+    python bench_cold_start.py --routes predict_landmarks predict_sequence --repeats 3
+    PRELOAD_MODELS= python bench_cold_start.py      # compare without background preload
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def sample_jpeg_b64(w: int = 320, h: int = 240) -> str:
+    from PIL import Image
+
+    img = Image.new("RGB", (w, h), (random.randint(0, 255), 120, 80))
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG")
+    return base64.b64encode(buf.getvalue()).decode()
+
+
+def route_request(route: str, base: str) -> urllib.request.Request:
+    """Build a representative request for a route."""
+    if route == "health":
+        return urllib.request.Request(f"{base}/health")
+    if route == "predict_landmarks":
+        body = {"landmarks": [random.random() for _ in range(63)]}
+    elif route == "predict_sequence":
+        body = {"sequence": [[random.random() for _ in range(63)] for _ in range(24)]}
+    elif route == "predict_dynamic":
+        body = {"frames": [sample_jpeg_b64()] * 16}
+    elif route == "predict_image":
+        boundary = "sgslbench"
+        jpeg = base64.b64decode(sample_jpeg_b64())
+        data = (
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.jpg\"\r\n"
+            "Content-Type: image/jpeg\r\n\r\n"
+        ).encode() + jpeg + f"\r\n--{boundary}--\r\n".encode()
+        return urllib.request.Request(
+            f"{base}/predict_image", data=data,
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        )
+    else:
+        raise ValueError(f"Unknown route: {route}")
+    return urllib.request.Request(
+        f"{base}/{route}", data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+
+
+def send(req: urllib.request.Request, timeout: float) -> int:
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as r:
+            r.read()
+            return r.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def cold_start(route: str, timeout: float) -> dict:
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    cmd = [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port),
+           "--log-level", "info"]
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=str(REPO_ROOT), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                            text=True, env=os.environ.copy())
+    try:
+        t_startup = None
+        while t_startup is None:
+            line = proc.stderr.readline()
+            if not line:
+                raise RuntimeError(f"server exited with code {proc.wait()}")
+            if "Application startup complete" in line:
+                t_startup = time.perf_counter() - t0
+
+        while True:
+            try:
+                if send(urllib.request.Request(f"{base}/health"), timeout) == 200:
+                    break
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            if time.perf_counter() - t0 > timeout:
+                raise RuntimeError("server never became healthy")
+            time.sleep(0.005)
+        t_healthy = time.perf_counter() - t0
+
+        req = route_request(route, base)
+        t1 = time.perf_counter()
+        status = send(req, timeout)
+        t_first = time.perf_counter() - t0
+        return {"import": t_startup, "healthy": t_healthy, "first": t_first,
+                "latency": time.perf_counter() - t1, "status": status}
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    routes = ["health", "predict_landmarks", "predict_image", "predict_sequence", "predict_dynamic"]
+    ap = argparse.ArgumentParser(description="Measure cold start per route of server.py")
+    ap.add_argument("--routes", nargs="*", default=routes, choices=routes)
+    ap.add_argument("--repeats", type=int, default=1, help="Fresh processes per route (median reported)")
+    ap.add_argument("--timeout", type=float, default=300.0)
+    args = ap.parse_args()
+
+    print(f"{'route':<20} {'import s':>9} {'healthy s':>10} {'first s':>9} {'req ms':>9} {'status':>7}")
+    for route in args.routes:
+        runs = []
+        for _ in range(args.repeats):
+            try:
+                runs.append(cold_start(route, args.timeout))
+            except Exception as e:
+                print(f"{route:<20} failed: {e}")
+                break
+        if not runs:
+            continue
+        med = {k: statistics.median(r[k] for r in runs) for k in ("import", "healthy", "first", "latency")}
+        statuses = ",".join(sorted({str(r["status"]) for r in runs}))
+        print(f"{route:<20} {med['import']:>9.2f} {med['healthy']:>10.2f} {med['first']:>9.2f} "
+              f"{med['latency'] * 1000:>9.0f} {statuses:>7}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# bench_ddp.py
+"""
+Scaling benchmark for data-parallel training: runs train_temporal.py (or
+dynamic/scripts/03_train_ctc.py) with --procs 1..N and reports training
+samples/s per process count (mean over epochs after the first, which pays for
+process start-up and page-cache warmup).
+
+Unknown arguments are passed through to the training script; artifacts go to a
+temporary directory so models/ is not touched.
+
+Examples:
+    python bench_ddp.py --procs 1 2 4 --data_dir data --epochs 4 --packed
+    python bench_ddp.py --script ctc --procs 1 2 4 --epochs 3 --features dynamic/features
+"""
+import argparse
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+SCRIPTS = {
+    "temporal": (ROOT / "train_temporal.py", "--save_dir"),
+    "ctc": (ROOT / "dynamic" / "scripts" / "03_train_ctc.py", "--out"),
+}
+RATE = re.compile(r"\|\s*([\d.]+) samples/s")
+
+
+def run(script: str, procs: int, extra: list) -> dict:
+    path, out_flag = SCRIPTS[script]
+    with tempfile.TemporaryDirectory() as tmp:
+        out = tmp if script == "temporal" else str(Path(tmp) / "ctc.pt")
+        cmd = [sys.executable, str(path), "--procs", str(procs), out_flag, out, *extra]
+        t0 = time.perf_counter()
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(cmd)} failed:\n{proc.stdout}\n{proc.stderr}")
+    rates = [float(m.group(1)) for m in RATE.finditer(proc.stdout)]
+    if not rates:
+        raise RuntimeError(f"No samples/s lines in the output of {' '.join(cmd)}")
+    steady = rates[1:] or rates
+    return {"procs": procs, "samples_per_s": sum(steady) / len(steady), "wall_s": wall}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Training throughput vs number of data-parallel processes")
+    ap.add_argument("--script", choices=sorted(SCRIPTS), default="temporal")
+    ap.add_argument("--procs", type=int, nargs="+", default=[1, 2, 4])
+    args, extra = ap.parse_known_args()
+
+    base = None
+    print(f"{'procs':>5}  {'samples/s':>10}  {'speedup':>7}  {'wall s':>7}")
+    for n in args.procs:
+        r = run(args.script, n, extra)
+        base = base or r["samples_per_s"]
+        print(f"{n:>5}  {r['samples_per_s']:>10.0f}  {r['samples_per_s'] / base:>6.2f}x  {r['wall_s']:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
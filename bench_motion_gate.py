@@ -0,0 +1,77 @@
+# bench_motion_gate.py
+"""
+Replay recorded practice sessions through MotionGate and report how many
+frames it skips and how often the gated output still matches classifying
+every frame.
+
+Sessions are the landmark clips written by collect_sequences.py
+(<dir>/<LABEL>/*.npz with x: [t, 63] raw MediaPipe landmarks). Those are
+recorded with --capture_stride (default 2), so frame-to-frame motion is larger
+than at the live camera rate and the skip fraction here is a lower bound.
+
+Examples:
+    python bench_motion_gate.py --clips data/clips_train data/clips_val
+    python bench_motion_gate.py --clips data/clips_val --thresholds 0.01 0.02 0.04 --max-stale 5
+"""
+import argparse
+import json
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from landmark_features import static_features
+from motion_gate import MotionGate
+from static_scorer import StaticScorer
+
+MODELS_DIR = Path("models")
+MODEL_PATH = MODELS_DIR / "hand_static.joblib"
+CLASSES_PATH = MODELS_DIR / "class_names.json"
+
+
+def load_sessions(dirs):
+    sessions = []
+    for d in dirs:
+        for path in sorted(Path(d).rglob("*.npz")):
+            x = np.load(path)["x"]
+            if x.ndim == 2 and x.shape[1] == 63 and x.shape[0] > 0:
+                sessions.append(static_features(x.reshape(-1, 21, 3).astype(np.float32)))
+    return sessions
+
+
+def replay(sessions, preds, threshold: float, max_stale: int) -> dict:
+    frames = skipped = agree = 0
+    for feats, pred in zip(sessions, preds):
+        gate = MotionGate(threshold, max_stale)
+        for i in range(feats.shape[0]):
+            out, reused = gate.run(feats[i], lambda: pred[i])
+            skipped += reused
+            agree += out == pred[i]
+        frames += feats.shape[0]
+    return {"frames": frames, "skipped": skipped / max(frames, 1), "agreement": agree / max(frames, 1)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Skip fraction of the motion gate on recorded sessions")
+    ap.add_argument("--clips", type=Path, nargs="+", default=[Path("data/clips_train"), Path("data/clips_val")])
+    ap.add_argument("--model", type=Path, default=MODEL_PATH)
+    ap.add_argument("--thresholds", type=float, nargs="+", default=[0.005, 0.01, 0.02, 0.03, 0.05])
+    ap.add_argument("--max-stale", type=int, default=5)
+    args = ap.parse_args()
+
+    sessions = load_sessions(args.clips)
+    if not sessions:
+        raise SystemExit(f"No [t,63] clips found under {[str(c) for c in args.clips]}")
+    scorer = StaticScorer(joblib.load(args.model), json.loads(CLASSES_PATH.read_text()))
+    # Reference: classify every frame.
+    preds = [np.argmax(scorer.scores(f), axis=1) for f in sessions]
+
+    print(f"{len(sessions)} sessions, {sum(f.shape[0] for f in sessions)} frames, max_stale={args.max_stale}")
+    print(f"{'threshold':>10} {'skipped':>8} {'agreement':>10}")
+    for thr in args.thresholds:
+        r = replay(sessions, preds, thr, args.max_stale)
+        print(f"{thr:>10.3f} {100 * r['skipped']:>7.1f}% {100 * r['agreement']:>9.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# bench_seq_arch.py
+"""
+LSTM (SignSeqModel) vs dilated causal TCN (SignTCNModel) on the same clips:
+validation accuracy after the same training budget, batch-1 latency and
+batched throughput on CPU.
+
+Both models train with train_temporal.py's loop (run_epoch, same optimizer,
+loss and seed) on windows cached by tune_temporal.py, so only the
+architecture differs. Speed is measured through the serving engines
+(inference_backends.py, --backends) on the saved checkpoints, since eager
+PyTorch per-op overhead dominates small convolution stacks.
+
+Examples:
+    python bench_seq_arch.py --data_dir data --epochs 20
+    python bench_seq_arch.py --labels BOOK DRINK GO --lstm_bidirectional --tcn_layers 5 --threads 1
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.optim as optim
+
+from inference_backends import available_backends, create_engine
+from temporal_model import build_seq_model
+from train_temporal import discover_labels, run_epoch, save_checkpoint
+from tune_temporal import _loader, cache_split
+
+
+def speed(engine, batch: int, runs: int = 200, seconds: float = 2.0) -> tuple:
+    """(median batch-1 ms, sequences/s at `batch`) for one engine."""
+    x = engine.example_input(1) + 0.1
+    X = np.random.default_rng(0).normal(0, 0.5, size=(batch, engine.T, engine.in_dim)).astype(np.float32)
+    for _ in range(10):
+        engine.predict_batch(x)
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        engine.predict_batch(x)
+        times.append(time.perf_counter() - t0)
+    engine.predict_batch(X)
+    n, t0 = 0, time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        engine.predict_batch(X)
+        n += batch
+    return 1000 * statistics.median(times), n / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Accuracy and CPU speed: LSTM vs TCN sequence encoders")
+    ap.add_argument("--data_dir", type=Path, default=Path("data"))
+    ap.add_argument("--train_subdir", type=str, default="clips_train")
+    ap.add_argument("--val_subdir", type=str, default="clips_val")
+    ap.add_argument("--labels", type=str, nargs="*", default=None)
+    ap.add_argument("--T", type=int, default=24)
+    ap.add_argument("--epochs", type=int, default=20)
+    ap.add_argument("--batch", type=int, default=64)
+    ap.add_argument("--lr", type=float, default=2e-3)
+    ap.add_argument("--wd", type=float, default=1e-4)
+    ap.add_argument("--hidden", type=int, default=128)
+    ap.add_argument("--lstm_layers", type=int, default=2)
+    ap.add_argument("--lstm_bidirectional", action="store_true")
+    ap.add_argument("--tcn_layers", type=int, default=4)
+    ap.add_argument("--kernel_size", type=int, default=3)
+    ap.add_argument("--throughput_batch", type=int, default=64)
+    ap.add_argument("--backends", nargs="+", default=["torch", "onnx"], help="inference_backends sequence engines")
+    ap.add_argument("--threads", type=int, default=0, help="Torch threads (0: torch default)")
+    ap.add_argument("--cache", type=Path, default=Path("models/tune/cache"))
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    train_root = args.data_dir / args.train_subdir
+    val_root = args.data_dir / args.val_subdir
+    labels = sorted(set(args.labels)) if args.labels else discover_labels(train_root, val_root)
+    tr = cache_split(train_root, labels, [args.T], args.cache)[args.T]
+    val = cache_split(val_root, labels, [args.T], args.cache)[args.T]
+    in_dim = int(np.load(tr[0], mmap_mode="r").shape[-1])
+
+    archs = {
+        "lstm": {"arch": "lstm", "in_dim": in_dim, "hidden": args.hidden, "layers": args.lstm_layers,
+                 "bidirectional": args.lstm_bidirectional},
+        "tcn": {"arch": "tcn", "in_dim": in_dim, "hidden": args.hidden, "layers": args.tcn_layers,
+                "kernel_size": args.kernel_size, "bidirectional": False},
+    }
+    print(f"{len(labels)} labels, T={args.T}, in_dim={in_dim}, {args.epochs} epochs, {torch.get_num_threads()} threads")
+    backends = [b for b in args.backends if b in available_backends("sequence")]
+    tmp = tempfile.TemporaryDirectory()
+    rows = []
+    for name, cfg in archs.items():
+        torch.manual_seed(args.seed)
+        dl_tr = _loader(tr, args.batch, True, args.seed)
+        dl_val = _loader(val, args.batch, False, 0)
+        model = build_seq_model(cfg, len(labels))
+        opt = optim.AdamW(model.parameters(), lr=args.lr, weight_decay=args.wd)
+        crit = nn.CrossEntropyLoss(label_smoothing=0.05)
+        device = torch.device("cpu")
+        best = 0.0
+        t0 = time.perf_counter()
+        for _ in range(args.epochs):
+            run_epoch(model, dl_tr, crit, device, opt)
+            _, correct, total = run_epoch(model, dl_val, crit, device)
+            best = max(best, correct / max(1, total))
+        train_s = time.perf_counter() - t0
+        ckpt, _ = save_checkpoint(Path(tmp.name), name, model.state_dict(), args.T, labels, cfg)
+        params = sum(p.numel() for p in model.parameters())
+        for backend in backends:
+            lat, tput = speed(create_engine("sequence", backend, ckpt_path=ckpt), args.throughput_batch)
+            rows.append((name, params, best, train_s, backend, lat, tput))
+
+    print(f"{'arch':<5} {'params':>8} {'val_acc':>7} {'train s':>8} {'backend':<12} {'ms/seq (b=1)':>13} "
+          f"{'seq/s (b=' + str(args.throughput_batch) + ')':>13}")
+    for name, params, best, train_s, backend, lat, tput in rows:
+        print(f"{name:<5} {params:>8} {best:>7.3f} {train_s:>8.1f} {backend:<12} {lat:>13.3f} {tput:>13.0f}")
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+# clip_pack.py
+"""
+Packed, memory-mapped version of a clips_<split>/<LABEL>/*.npz tree for
+train_temporal.py (--packed).
+
+The pack lives next to the tree (data/clips_train -> data/clips_train.pack/):
+
+    index.json          one entry per clip: path, mtime/size stamp, label, offset, length,
+                        plus the data file names (raw, windows per T) of the current generation
+    raw.<g>.npy         every clip's raw frames back to back, float32 [sum(t_i), D]
+    windows_T24.<g>.npy normalized, pad_or_crop'ed windows, float32 [N, T, D] (one file per T)
+
+build_pack() rescans the tree and only reads clips that are new or changed;
+unchanged clips are copied from the previous raw/windows files and removed
+clips are dropped. Nothing is rewritten when the tree is unchanged. Windows
+for every T built so far stay in the pack: building a new T only adds its
+file, and a clip change refreshes the windows of every T.
+
+Each build writes its new files under generation g + 1 names, fsyncs them and
+then replaces index.json, which is the only commit step: a crash at any point
+leaves the previous index with the files it names. After the commit only
+files referenced by neither the new nor the previous index are deleted.
+
+PackedClipDS maps the windows file read-only, so a sample is one row slice of
+the page cache instead of an npz open + unpickle + normalize per step.
+
+Examples:
+    python clip_pack.py --data_dir data --T 24          # build / refresh clips_train and clips_val packs
+    python clip_pack.py --data_dir data --bench         # samples/s: ClipFolderDS vs PackedClipDS
+"""
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from seq_utils import normalize_landmarks, pad_or_crop
+
+PACK_VERSION = 2
+
+
+def pack_dir_for(root: Path) -> Path:
+    return root.with_name(root.name + ".pack")
+
+
+def _scan(root: Path) -> dict:
+    """rel path -> (mtime_ns, size, label folder) for every clip under root/<LABEL>/."""
+    out = {}
+    for path in sorted(root.glob("*/*.npz")):
+        st = path.stat()
+        out[path.relative_to(root).as_posix()] = (st.st_mtime_ns, st.st_size, path.parent.name)
+    return out
+
+
+def _read_clip(path: Path, folder: str):
+    d = np.load(path, allow_pickle=True)
+    label = str(d["label"]) if "label" in d else folder
+    return np.asarray(d["x"], dtype=np.float32), label
+
+
+def _windows(raw: np.ndarray, offsets: np.ndarray, lengths: np.ndarray, T: int) -> np.ndarray:
+    """Normalized [N, T, D] windows; normalization is per frame, so pad first, normalize once."""
+    D = raw.shape[1]
+    X = np.empty((len(offsets), T, D), dtype=np.float32)
+    for i, (o, n) in enumerate(zip(offsets, lengths)):
+        X[i] = pad_or_crop(raw[o : o + n], T)
+    if len(X):
+        X = normalize_landmarks(X.reshape(-1, D)).reshape(X.shape)
+    return X
+
+
+def _save(path: Path, arr: np.ndarray):
+    with open(path, "wb") as f:
+        np.save(f, arr)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def raw_path(pack: Path, index: dict) -> Path:
+    return pack / index["raw"]
+
+
+def windows_path(pack: Path, index: dict, T: int) -> Optional[Path]:
+    name = index["windows"].get(str(T))
+    return pack / name if name else None
+
+
+def load_index(pack: Path) -> Optional[dict]:
+    path = pack / "index.json"
+    if not path.exists():
+        return None
+    index = json.loads(path.read_text())
+    return index if index.get("version") == PACK_VERSION else None
+
+
+def _files(index: dict) -> set:
+    return {index["raw"], *index["windows"].values()}
+
+
+def _rebuild(pack, root, scan, old, old_clips, old_raw, fresh, kept, Ts, gen):
+    """Clips changed: new raw plus windows for every T in Ts, reusing unchanged clips' rows by index."""
+    loaded = {rel: _read_clip(root / rel, scan[rel][2]) for rel in fresh}
+    dims = {int(old_raw.shape[1])} if kept else set()
+    dims |= {int(x.shape[1]) for x, _ in loaded.values()}
+    if len(dims) != 1:
+        raise RuntimeError(f"Mixed landmark widths {sorted(dims)} under {root}")
+    D = dims.pop()
+
+    clips, offset = [], 0
+    for rel in scan:
+        if rel in loaded:
+            length, label = loaded[rel][0].shape[0], loaded[rel][1]
+        else:
+            length, label = old_clips[rel]["length"], old_clips[rel]["label"]
+        mtime_ns, size, _ = scan[rel]
+        clips.append({"path": rel, "mtime_ns": mtime_ns, "size": size, "label": label,
+                      "offset": offset, "length": length})
+        offset += length
+
+    raw = np.empty((offset, D), dtype=np.float32)
+    for c in clips:
+        rel, o, n = c["path"], c["offset"], c["length"]
+        if rel in loaded:
+            raw[o : o + n] = loaded[rel][0]
+        else:
+            src = old_clips[rel]["offset"]
+            raw[o : o + n] = old_raw[src : src + n]
+
+    offsets = np.array([c["offset"] for c in clips], dtype=np.int64)
+    lengths = np.array([c["length"] for c in clips], dtype=np.int64)
+    names = {"raw": f"raw.{gen}.npy", "windows": {str(t): f"windows_T{t}.{gen}.npy" for t in Ts}}
+    arrays = {names["raw"]: raw}
+    for t in Ts:
+        old_windows = np.load(windows_path(pack, old, t), mmap_mode="r") \
+            if old and windows_path(pack, old, t) is not None else None
+        windows = np.empty((len(clips), t, D), dtype=np.float32)
+        redo = []
+        for i, c in enumerate(clips):
+            if old_windows is not None and c["path"] not in loaded:
+                windows[i] = old_windows[old_clips[c["path"]]["index"]]
+            else:
+                redo.append(i)
+        if redo:
+            windows[redo] = _windows(raw, offsets[redo], lengths[redo], t)
+        arrays[names["windows"][str(t)]] = windows
+    for i, c in enumerate(clips):
+        c["index"] = i
+    return clips, D, arrays, names
+
+
+def build_pack(root: Path, T: int, verbose: bool = True) -> Path:
+    """Create or incrementally refresh root's pack (raw frames + windows for T); returns the pack dir."""
+    pack = pack_dir_for(root)
+    pack.mkdir(parents=True, exist_ok=True)
+    scan = _scan(root)
+    if not scan:
+        raise RuntimeError(f"No .npz clips found under {root}")
+
+    old = load_index(pack)
+    old_clips = {c["path"]: c for c in old["clips"]} if old else {}
+    old_raw = np.load(raw_path(pack, old), mmap_mode="r") if old else None
+    # Every T the pack already has windows for is kept up to date alongside the one asked for.
+    Ts = sorted({int(t) for t in old["windows"]} | {T}) if old else [T]
+
+    def unchanged(rel):
+        c = old_clips.get(rel)
+        return c is not None and old_raw is not None and (c["mtime_ns"], c["size"]) == scan[rel][:2]
+
+    kept = [rel for rel in scan if unchanged(rel)]
+    removed = [rel for rel in old_clips if rel not in scan]
+    fresh = [rel for rel in scan if not unchanged(rel)]
+    if not fresh and not removed and windows_path(pack, old, T) is not None:
+        if verbose:
+            print(f"[pack] {pack}: up to date ({len(kept)} clips)")
+        return pack
+
+    t0 = time.perf_counter()
+    gen = old["generation"] + 1 if old else 1
+    if not fresh and not removed:
+        # Only T is new: raw and the other windows files stay as they are.
+        clips, D = old["clips"], old["dim"]
+        offsets = np.array([c["offset"] for c in clips], dtype=np.int64)
+        lengths = np.array([c["length"] for c in clips], dtype=np.int64)
+        names = {"raw": old["raw"], "windows": {**old["windows"], str(T): f"windows_T{T}.{gen}.npy"}}
+        arrays = {names["windows"][str(T)]: _windows(old_raw, offsets, lengths, T)}
+    else:
+        clips, D, arrays, names = _rebuild(pack, root, scan, old, old_clips, old_raw, fresh, kept, Ts, gen)
+
+    index = {"version": PACK_VERSION, "generation": gen, "root": str(root), "dim": D, **names, "clips": clips}
+    old_raw = None  # release the map
+    for name, arr in arrays.items():
+        _save(pack / name, arr)
+    with open(pack / "index.json.tmp", "w") as f:
+        json.dump(index, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pack / "index.json.tmp", pack / "index.json")  # commit
+    # The previous index's files are kept for one more build: a run that loaded it re-maps its
+    # windows file in each epoch's fresh DataLoader workers. Anything else (older generations,
+    # files of a build that crashed) is no longer referenced by a committed index.
+    live = _files(index) | (_files(old) if old else set())
+    for p in pack.glob("*.npy"):
+        if p.name not in live:
+            p.unlink()
+    if verbose:
+        print(f"[pack] {pack}: {len(clips)} clips ({len(fresh)} read, {len(kept)} reused, "
+              f"{len(removed)} removed) in {time.perf_counter() - t0:.2f} s")
+    return pack
+
+
+try:
+    from torch.utils.data import Dataset
+except ImportError:  # packing alone doesn't need torch
+    Dataset = object
+
+
+class PackedClipDS(Dataset):
+    """Drop-in for train_temporal.ClipFolderDS backed by a pack (built or refreshed on creation)."""
+
+    def __init__(self, root: Path, labels: List[str], T: int = 24):
+        pack = build_pack(root, T)
+        index = load_index(pack)
+        self.labels = labels
+        self.L2I = {s: i for i, s in enumerate(labels)}
+        self.T = T
+        self.in_dim = index["dim"]
+        self.windows_path = windows_path(pack, index, T)
+        rows = [(c["index"], self.L2I[c["label"]]) for c in index["clips"] if c["label"] in self.L2I]
+        if not rows:
+            raise RuntimeError(f"No clips for {labels} under {root}")
+        self.rows = np.array([r for r, _ in rows], dtype=np.int64)
+        self.y = np.array([y for _, y in rows], dtype=np.int64)
+        self._windows = None  # opened lazily so each DataLoader worker maps the file itself
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, i):
+        if self._windows is None:
+            self._windows = np.load(self.windows_path, mmap_mode="r")
+        return np.array(self._windows[self.rows[i]]), int(self.y[i])
+
+
+def bench(data_dir: Path, subdir: str, T: int, batch: int, workers: int, epochs: int):
+    from torch.utils.data import DataLoader
+    from train_temporal import ClipFolderDS, discover_labels
+
+    root = data_dir / subdir
+    labels = discover_labels(root, root)
+    for name, make in (("ClipFolderDS", lambda: ClipFolderDS(root, labels, T=T)),
+                       ("PackedClipDS", lambda: PackedClipDS(root, labels, T=T))):
+        t0 = time.perf_counter()
+        ds = make()
+        setup = time.perf_counter() - t0
+        dl = DataLoader(ds, batch_size=batch, shuffle=True, num_workers=workers)
+        t0 = time.perf_counter()
+        n = 0
+        for _ in range(epochs):
+            for x, _ in dl:
+                n += x.shape[0]
+        dt = time.perf_counter() - t0
+        print(f"{name:<13} setup {setup:6.2f} s   {n / dt:9.0f} samples/s   ({n} samples, {workers} workers)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build packed memory-mapped clip datasets")
+    ap.add_argument("--data_dir", type=Path, default=Path("data"))
+    ap.add_argument("--subdirs", nargs="+", default=["clips_train", "clips_val"])
+    ap.add_argument("--T", type=int, default=24)
+    ap.add_argument("--bench", action="store_true", help="Compare DataLoader throughput with ClipFolderDS")
+    ap.add_argument("--batch", type=int, default=64)
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--epochs", type=int, default=2)
+    args = ap.parse_args()
+
+    for sub in args.subdirs:
+        root = args.data_dir / sub
+        if not root.exists():
+            print(f"[pack] skip {root} (missing)")
+            continue
+        build_pack(root, args.T)
+        if args.bench:
+            bench(args.data_dir, sub, args.T, args.batch, args.workers, args.epochs)
+
+
+if __name__ == "__main__":
+    main()
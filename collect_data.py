@@ -2,11 +2,16 @@
 import argparse
 import cv2
 import time
+from contextlib import nullcontext
 from pathlib import Path
 
-import numpy as np
 import mediapipe as mp
 
+from landmark_features import landmarks_to_array, static_features
+from landmark_store import StoreWriter, add_store_args, handedness_label, new_session
+from live_pipeline import LivePipeline
+from sample_writer import SampleWriter, add_format_arg, samples_path
+
 # ======= CONFIG =======
 # Edit this list to your target static letters (exclude dynamic letters like J/Z).
 LABELS = [
@@ -15,27 +20,13 @@ LABELS = [
 CAPTURE_EVERY_N_FRAMES = 3
 DATA_DIR = Path("data"); DATA_DIR.mkdir(parents=True, exist_ok=True)
 CSV_PATH = DATA_DIR / "samples.csv"
+STORE_DIR = DATA_DIR / "store" / "letters"  # raw landmarks (landmark_store.py)
 
 mp_hands = mp.solutions.hands
 mp_drawing = mp.solutions.drawing_utils
 mp_styles = mp.solutions.drawing_styles
 
 
-def landmarks_to_feature(hand_landmarks):
-    """
-    Return a 63-D feature: (x,y,z) of 21 landmarks.
-    Normalised: (1) relative to wrist, (2) scale by max distance for size invariance.
-    """
-    pts = np.array([[lm.x, lm.y, lm.z] for lm in hand_landmarks.landmark], dtype=np.float32)
-    wrist = pts[0].copy()
-    pts -= wrist
-    scale = np.linalg.norm(pts, axis=1).max()
-    if scale < 1e-6:
-        scale = 1.0
-    pts /= scale
-    return pts.flatten()
-
-
 def open_camera(index: int):
     """Try AVFoundation first on macOS, fall back to default backend."""
     cap = cv2.VideoCapture(index, cv2.CAP_AVFOUNDATION)
@@ -49,6 +40,8 @@ def open_camera(index: int):
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--camera", type=int, default=0, help="Camera index (try 0..3)")
+    add_format_arg(ap)
+    add_store_args(ap, STORE_DIR)
     args = ap.parse_args()
 
     cap = open_camera(args.camera)
@@ -63,28 +56,22 @@ def main():
     capturing = False
     frame_idx = 0
     saved_counts = {lbl: 0 for lbl in LABELS}
+    store = None if args.no_store else StoreWriter(args.store, new_session("collect_data"))
 
     with mp_hands.Hands(
         model_complexity=1,
         max_num_hands=1,
         min_detection_confidence=0.6,
         min_tracking_confidence=0.6,
-    ) as hands:
-        while True:
-            ok, frame = cap.read()
-            if not ok:
-                print("[WARN] Empty frame from camera.")
-                break
+    ) as hands, SampleWriter(samples_path(CSV_PATH, args.format)) as writer, store or nullcontext(), \
+            LivePipeline(cap, hands.process) as live:
+        # Camera reads, hand detection and sample writes run on background threads
+        # (live_pipeline.py, sample_writer.py, landmark_store.py)
+        for item in live:
+            frame, res = item.frame, item.result
             frame_idx += 1
-            frame = cv2.flip(frame, 1)
             h, w = frame.shape[:2]
 
-            # Inference
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            rgb.flags.writeable = False
-            res = hands.process(rgb)
-            rgb.flags.writeable = True
-
             # Draw landmarks
             if res.multi_hand_landmarks:
                 mp_drawing.draw_landmarks(
@@ -97,16 +84,11 @@ def main():
 
             # Capture logic (space toggles capturing)
             if capturing and res.multi_hand_landmarks and frame_idx % CAPTURE_EVERY_N_FRAMES == 0:
-                feats = landmarks_to_feature(res.multi_hand_landmarks[0])
+                pts = landmarks_to_array(res.multi_hand_landmarks[0])
                 label = LABELS[active_label_idx]
-                row = ",".join([label] + [f"{v:.6f}" for v in feats]) + "\n"
-                if not CSV_PATH.exists():
-                    with open(CSV_PATH, "w") as f:
-                        f.write(",".join(["label"] + [f"f{i}" for i in range(len(feats))]) + "\n")
-                        f.write(row)
-                else:
-                    with open(CSV_PATH, "a") as f:
-                        f.write(row)
+                writer.write(label, static_features(pts))
+                if store is not None:
+                    store.write(label, pts, handedness_label(res))
                 saved_counts[label] += 1
 
             # HUD
@@ -1,15 +1,19 @@
 import argparse
+from contextlib import nullcontext
 from pathlib import Path
 
 import cv2
 import mediapipe as mp
-import numpy as np
+
+from landmark_features import PALM_LANDMARKS, landmarks_to_array, subset_features
+from landmark_store import StoreWriter, add_store_args, handedness_label, new_session
+from live_pipeline import LivePipeline
+from sample_writer import SampleWriter, add_format_arg, samples_path
 
 CAPTURE_EVERY_N_FRAMES = 3
 DATA_DIR = Path("data")
 DATA_DIR.mkdir(parents=True, exist_ok=True)
-
-PALM_LANDMARKS = [0, 5, 9, 13, 17]
+STORE_ROOT = DATA_DIR / "store"  # raw landmarks go to <store root>/r_<feature> (landmark_store.py)
 
 FEATURE_CONFIG = {
     "cross": {
@@ -61,27 +65,6 @@ def draw_feature_landmarks(frame, hand_landmarks, subset_indices, subset_connect
         cv2.circle(frame, (x, y), 4, color, -1)
 
 
-def extract_feature_subset(hand_landmarks, subset_indices):
-    """
-    Extract only relevant hand landmarks for a binary mini-model.
-    Normalization:
-    1) center all points by palm center
-    2) scale by palm width (index MCP to pinky MCP) for size invariance
-    """
-    pts = np.array([[lm.x, lm.y, lm.z] for lm in hand_landmarks.landmark], dtype=np.float32)
-    palm_center = pts[PALM_LANDMARKS].mean(axis=0, keepdims=True)
-    pts -= palm_center
-
-    palm_width = np.linalg.norm(pts[5] - pts[17])
-    if palm_width < 1e-6:
-        palm_width = np.linalg.norm(pts, axis=1).max()
-    if palm_width < 1e-6:
-        palm_width = 1.0
-    pts /= palm_width
-
-    return pts[subset_indices].flatten()
-
-
 def open_camera(index: int):
     cap = cv2.VideoCapture(index, cv2.CAP_AVFOUNDATION)
     if cap.isOpened():
@@ -90,18 +73,6 @@ def open_camera(index: int):
     return cv2.VideoCapture(index)
 
 
-def append_row(csv_path: Path, label: str, feats: np.ndarray):
-    row = ",".join([label] + [f"{v:.6f}" for v in feats]) + "\n"
-    if not csv_path.exists():
-        with open(csv_path, "w") as f:
-            header = ",".join(["label"] + [f"f{i}" for i in range(len(feats))]) + "\n"
-            f.write(header)
-            f.write(row)
-    else:
-        with open(csv_path, "a") as f:
-            f.write(row)
-
-
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--camera", type=int, default=0, help="Camera index (try 0..3)")
@@ -111,10 +82,12 @@ def main():
         required=True,
         help="Which R-sign characteristic to collect data for",
     )
+    add_format_arg(ap)
+    add_store_args(ap, STORE_ROOT, "Also append the raw landmarks to the landmark store <dir>/r_<feature>")
     args = ap.parse_args()
 
     feature_cfg = FEATURE_CONFIG[args.feature]
-    csv_path = feature_cfg["csv_path"]
+    csv_path = samples_path(feature_cfg["csv_path"], args.format)
     subset_indices = feature_cfg["landmarks"]
     subset_connections = build_subset_connections(subset_indices)
 
@@ -130,9 +103,12 @@ def main():
     capturing = False
     frame_idx = 0
     saved_counts = {lbl: 0 for lbl in LABELS}
+    store = None if args.no_store else StoreWriter(args.store / f"r_{args.feature}", new_session("collect_data_mini"))
 
     print(f"[INFO] Collecting feature: {args.feature}")
     print(f"[INFO] Writing to: {csv_path}")
+    if store is not None:
+        print(f"[INFO] Raw landmarks to: {store.store.root}")
     print(f"[INFO] Landmarks used: {subset_indices}")
     print("[INFO] Labels: 1=absent, 2=present")
 
@@ -141,21 +117,13 @@ def main():
         max_num_hands=1,
         min_detection_confidence=0.6,
         min_tracking_confidence=0.6,
-    ) as hands:
-        while True:
-            ok, frame = cap.read()
-            if not ok:
-                print("[WARN] Empty frame from camera.")
-                break
+    ) as hands, SampleWriter(csv_path) as writer, store or nullcontext(), \
+            LivePipeline(cap, hands.process) as live:
+        for item in live:
+            frame, res = item.frame, item.result
             frame_idx += 1
-            frame = cv2.flip(frame, 1)
             h, w = frame.shape[:2]
 
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            rgb.flags.writeable = False
-            res = hands.process(rgb)
-            rgb.flags.writeable = True
-
             if res.multi_hand_landmarks:
                 draw_feature_landmarks(
                     frame,
@@ -165,9 +133,11 @@ def main():
                 )
 
             if capturing and res.multi_hand_landmarks and frame_idx % CAPTURE_EVERY_N_FRAMES == 0:
-                feats = extract_feature_subset(res.multi_hand_landmarks[0], subset_indices)
+                pts = landmarks_to_array(res.multi_hand_landmarks[0])
                 label = LABELS[active_label_idx]
-                append_row(csv_path, label, feats)
+                writer.write(label, subset_features(pts, subset_indices))
+                if store is not None:
+                    store.write(label, pts, handedness_label(res))
                 saved_counts[label] += 1
 
             cv2.rectangle(frame, (0, 0), (w, 110), (0, 0, 0), -1)
@@ -6,6 +6,10 @@ import cv2
 import numpy as np
 import mediapipe as mp
 
+from landmark_features import landmarks_to_array
+from live_pipeline import LivePipeline, add_source_args, open_source
+from sample_writer import ClipWriter
+
 # Default static-letter list; change to your dynamic labels if you like
 DEFAULT_LABELS = [
     "HELLO", "THANK_YOU", "NAME", "PLEASE", "SORRY",
@@ -29,16 +33,21 @@ def parse_args():
                    help="Optional cap to auto-cut takes (0 disables)")
     p.add_argument("--mirror", action="store_true",
                    help="Mirror preview (helps user; landmarks remain normalized)")
+    p.add_argument("--two-hands", action="store_true",
+                   help="Track both hands and save [t,126] rows (left | right, absent hand = zeros)")
+    add_source_args(p)
     return p.parse_args()
 
 def flatten_landmarks(hand_landmarks):
     # Returns a flat [63] = 21*(x,y,z)
-    arr = np.zeros(63, dtype=np.float32)
-    for i, lm in enumerate(hand_landmarks.landmark[:21]):
-        j = i * 3
-        arr[j + 0] = lm.x
-        arr[j + 1] = lm.y
-        arr[j + 2] = lm.z
+    return landmarks_to_array(hand_landmarks).reshape(63)
+
+def flatten_two_hands(res):
+    # Returns a flat [126] = left hand 63 | right hand 63 (MediaPipe handedness); missing hand stays zero
+    arr = np.zeros(126, dtype=np.float32)
+    for lms, handed in zip(res.multi_hand_landmarks, res.multi_handedness):
+        slot = 0 if handed.classification[0].label == "Left" else 1
+        arr[slot * 63:(slot + 1) * 63] = flatten_landmarks(lms)
     return arr
 
 def ensure_dirs(base: Path, split: str, labels):
@@ -48,6 +57,22 @@ def ensure_dirs(base: Path, split: str, labels):
         (root / lab).mkdir(parents=True, exist_ok=True)
     return root
 
+def save_take(writer: ClipWriter, out_root: Path, label: str, kept_frames, min_frames: int) -> bool:
+    if len(kept_frames) < min_frames:
+        print(f"[Skip] not enough frames: {len(kept_frames)} < {min_frames}")
+        return False
+    arr = np.stack(kept_frames, axis=0).astype(np.float32)  # [t,63] or [t,126]
+    ts = int(time.time() * 1000)
+    out_dir = out_root / label
+    out_dir.mkdir(parents=True, exist_ok=True)
+    # _1, _2 ... when several takes land in one millisecond (replaying a recording)
+    out_path = writer.unique_path(out_dir / f"{label}_{ts}.npz")
+    # Save with string 'label' for readability; trainer accepts 'label' or 'y'.
+    # The file is written on the writer thread (sample_writer.py).
+    writer.save(out_path, x=arr, label=label)
+    print(f"[Saved] {out_path}  shape={arr.shape}")
+    return True
+
 def draw_hud(img, label, is_capturing, frames_in_take, total_saved, stride, min_frames):
     h, w = img.shape[:2]
     panel = img.copy()
@@ -78,58 +103,67 @@ def main():
     mp_hands = mp.solutions.hands
     hands = mp_hands.Hands(
         static_image_mode=False,
-        max_num_hands=1,
+        max_num_hands=2 if args.two_hands else 1,
         model_complexity=1,
         min_detection_confidence=0.6,
         min_tracking_confidence=0.6
     )
 
-    cap = cv2.VideoCapture(args.camera)
-    if not cap.isOpened():
-        raise RuntimeError("Cannot open camera")
+    cap = open_source(args.camera, args.video)
+    writer = ClipWriter()
 
-    capturing = False
+    # --headless records the whole input as takes of the first label, cut every --max_frames kept frames
+    capturing = args.headless
     frame_idx = 0
-    kept_frames = []  # list of [63] rows
+    kept_frames = []  # list of [63] (or [126] with --two-hands) rows
 
     win = "Temporal Collector"
-    cv2.namedWindow(win, cv2.WINDOW_NORMAL)
+    if not args.headless:
+        cv2.namedWindow(win, cv2.WINDOW_NORMAL)
 
     print("=== Temporal Collector ===")
     print(f"Output -> {out_root}")
     print(f"Labels : {labels}")
-    print("Controls: [1..9,0]=label  SPACE=start/stop  S=save  C=clear  Q=quit")
+    if not args.headless:
+        print("Controls: [1..9,0]=label  SPACE=start/stop  S=save  C=clear  Q=quit")
 
+    # Camera reads and hand detection run on background threads (live_pipeline.py).
+    # Frames are flipped for the selfie view; --mirror flips them back.
+    live = LivePipeline(cap, hands.process, flip=not args.mirror).start()
     try:
-        while True:
-            ok, frame = cap.read()
-            frame = cv2.flip(frame, 1)
-            if not ok:
-                break
-
-            if args.mirror:
-                frame = cv2.flip(frame, 1)
-
-            # MediaPipe expects RGB
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            res = hands.process(rgb)
+        for item in live:
+            frame, res = item.frame, item.result
 
             if res.multi_hand_landmarks:
                 # Draw landmarks for user feedback (on preview)
-                mp.solutions.drawing_utils.draw_landmarks(
-                    frame, res.multi_hand_landmarks[0], mp_hands.HAND_CONNECTIONS
-                )
+                if not args.headless:
+                    for hand_lms in res.multi_hand_landmarks:
+                        mp.solutions.drawing_utils.draw_landmarks(
+                            frame, hand_lms, mp_hands.HAND_CONNECTIONS
+                        )
 
                 if capturing:
                     frame_idx += 1
                     if frame_idx % args.capture_stride == 0:
-                        flat = flatten_landmarks(res.multi_hand_landmarks[0])
+                        with live.stats.timer("features"):
+                            if args.two_hands:
+                                flat = flatten_two_hands(res)
+                            else:
+                                flat = flatten_landmarks(res.multi_hand_landmarks[0])
                         kept_frames.append(flat)
 
                         # Auto-cut if max_frames reached
                         if args.max_frames > 0 and len(kept_frames) >= args.max_frames:
                             print(f"[Auto-cut] reached max_frames={args.max_frames}")
-                            capturing = False
+                            if args.headless:
+                                total_saved += save_take(writer, out_root, active_label, kept_frames, args.min_frames)
+                                frame_idx = 0
+                                kept_frames = []
+                            else:
+                                capturing = False
+
+            if args.headless:
+                continue
 
             draw_hud(frame, active_label, capturing, len(kept_frames),
                      total_saved, args.capture_stride, args.min_frames)
@@ -159,18 +193,7 @@ def main():
                     print("[Stop]")
 
             elif key in (ord('s'), ord('S')):  # save the take
-                if len(kept_frames) < args.min_frames:
-                    print(f"[Skip] not enough frames: {len(kept_frames)} < {args.min_frames}")
-                else:
-                    arr = np.stack(kept_frames, axis=0).astype(np.float32)  # [t,63]
-                    ts = int(time.time() * 1000)
-                    out_dir = out_root / active_label
-                    out_dir.mkdir(parents=True, exist_ok=True)
-                    out_path = out_dir / f"{active_label}_{ts}.npz"
-                    # Save with string 'label' for readability; trainer accepts 'label' or 'y'
-                    np.savez(out_path, x=arr, label=active_label)
-                    total_saved += 1
-                    print(f"[Saved] {out_path}  shape={arr.shape}")
+                total_saved += save_take(writer, out_root, active_label, kept_frames, args.min_frames)
                 # after save, reset current take (not capturing)
                 capturing = False
                 kept_frames = []
@@ -183,9 +206,18 @@ def main():
             elif key in (ord('q'), ord('Q')):  # quit
                 break
 
+    except KeyboardInterrupt:
+        pass
     finally:
+        live.stop()
+        if args.headless and kept_frames:
+            total_saved += save_take(writer, out_root, active_label, kept_frames, args.min_frames)
+        print(live.report())
+        writer.close()
+        print(writer.describe())
         cap.release()
-        cv2.destroyAllWindows()
+        if not args.headless:
+            cv2.destroyAllWindows()
         hands.close()
 
 if __name__ == "__main__":
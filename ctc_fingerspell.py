@@ -0,0 +1,275 @@
+# ctc_fingerspell.py
+"""
+Serving side of the fingerspelling CTC model (CTCModel in
+dynamic/scripts/encoders.py, trained by 03_train_ctc.py into models/ctc.pt).
+
+Input is one (T, 150) sequence of frame_feat rows per request (two hands
+ordered left-to-right in the image + 8 pose points, see
+01_extract_from_csv_walk.py), unnormalized as in training.
+
+Concurrent requests are micro-batched: the first request to arrive becomes the
+batch leader, waits up to max_wait_s for company, pads everything pending to
+the longest sequence and runs one masked forward pass (the encoder zeroes
+padded frames after every conv, so each item's output matches its unbatched
+run). Requests that arrive while a batch runs are picked up by the next one.
+
+Decoding (per request, in numpy):
+- greedy: best class per frame, runs collapsed; each character spans its run.
+- beam:   CTC prefix beam search, then a forced alignment of the best string
+          for per-character frame spans.
+
+Index 0 (" " in 03_train_ctc.py's VOCAB) is the CTC blank, so the model never
+emits spaces.
+"""
+import math
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+VOCAB = " " + "abcdefghijklmnopqrstuvwxyz"  # as in 03_train_ctc.py
+BLANK = 0
+SCRIPTS_DIR = Path(__file__).resolve().parent / "dynamic" / "scripts"
+
+NEG_INF = -math.inf
+
+
+def _lse(a: float, b: float) -> float:
+    if a == NEG_INF:
+        return b
+    if b == NEG_INF:
+        return a
+    m = max(a, b)
+    return m + math.log1p(math.exp(-abs(a - b)))
+
+
+# ---------------------------
+# Decoding
+# ---------------------------
+def _chars(logp: np.ndarray, spans) -> List[dict]:
+    """spans: [(label, start, end)] -> [{char, start, end, confidence}] (frames inclusive)."""
+    return [
+        {"char": VOCAB[label], "start": int(s), "end": int(e),
+         "confidence": float(np.exp(logp[s : e + 1, label].max()))}
+        for label, s, e in spans
+    ]
+
+
+def greedy_decode(logp: np.ndarray) -> List[dict]:
+    best = logp.argmax(axis=1)
+    change = np.flatnonzero(np.diff(best)) + 1
+    starts = np.concatenate([[0], change])
+    ends = np.concatenate([change, [best.shape[0]]]) - 1
+    return _chars(logp, [(int(best[s]), s, e) for s, e in zip(starts, ends) if best[s] != BLANK])
+
+
+def align(logp: np.ndarray, labels: Sequence[int]) -> List[tuple]:
+    """CTC Viterbi forced alignment of `labels` -> [(label, start, end)] per label."""
+    T = logp.shape[0]
+    ext = np.full(2 * len(labels) + 1, BLANK, dtype=np.intp)
+    ext[1::2] = labels
+    S = ext.shape[0]
+    # s may also come from s-2 when it is a label that differs from the one two back.
+    skip = np.zeros(S, dtype=bool)
+    skip[2:] = (ext[2:] != BLANK) & (ext[2:] != ext[:-2])
+
+    delta = np.full(S, NEG_INF)
+    delta[0] = logp[0, BLANK]
+    if S > 1:
+        delta[1] = logp[0, ext[1]]
+    back = np.zeros((T, S), dtype=np.int8)  # 0 stay, 1 from s-1, 2 from s-2
+    for t in range(1, T):
+        prev1 = np.concatenate([[NEG_INF], delta[:-1]])
+        prev2 = np.where(skip, np.concatenate([[NEG_INF, NEG_INF], delta[:-2]]), NEG_INF)
+        cand = np.stack([delta, prev1, prev2])
+        back[t] = cand.argmax(axis=0)
+        delta = cand.max(axis=0) + logp[t, ext]
+
+    s = S - 1 if S == 1 or delta[S - 1] >= delta[S - 2] else S - 2
+    path = np.empty(T, dtype=np.intp)
+    for t in range(T - 1, -1, -1):
+        path[t] = s
+        s -= int(back[t, s])
+    spans = []
+    for k in range(len(labels)):
+        frames = np.flatnonzero(path == 2 * k + 1)
+        if frames.size:
+            spans.append((int(labels[k]), int(frames[0]), int(frames[-1])))
+    return spans
+
+
+def beam_decode(logp: np.ndarray, beam_width: int = 8, prune_logp: float = -8.0, max_cands: int = 8) -> List[dict]:
+    """CTC prefix beam search; per frame only the max_cands best classes above prune_logp are expanded."""
+    beams = {(): (0.0, NEG_INF)}  # prefix -> (log p ending in blank, log p ending in a label)
+    max_cands = min(max_cands, logp.shape[1])
+    for row in logp:
+        cands = np.argpartition(-row, max_cands - 1)[:max_cands]
+        cands = cands[row[cands] > prune_logp]
+        nxt = defaultdict(lambda: [NEG_INF, NEG_INF])
+        for prefix, (pb, pnb) in beams.items():
+            total = _lse(pb, pnb)
+            last = prefix[-1] if prefix else None
+            for c in cands:
+                p = float(row[c])
+                if c == BLANK:
+                    entry = nxt[prefix]
+                    entry[0] = _lse(entry[0], total + p)
+                elif c == last:
+                    # A repeated letter needs a blank in between; otherwise it extends the last one.
+                    entry = nxt[prefix + (int(c),)]
+                    entry[1] = _lse(entry[1], pb + p)
+                    entry = nxt[prefix]
+                    entry[1] = _lse(entry[1], pnb + p)
+                else:
+                    entry = nxt[prefix + (int(c),)]
+                    entry[1] = _lse(entry[1], total + p)
+        ranked = sorted(nxt.items(), key=lambda kv: -_lse(*kv[1]))[:beam_width]
+        beams = {prefix: tuple(scores) for prefix, scores in ranked}
+    best = max(beams, key=lambda prefix: _lse(*beams[prefix]))
+    return _chars(logp, align(logp, best)) if best else []
+
+
+# ---------------------------
+# Micro-batching
+# ---------------------------
+class _Job:
+    __slots__ = ("item", "result", "error", "wake", "finished")
+
+    def __init__(self, item):
+        self.item = item
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.wake = threading.Event()
+        self.finished = False
+
+
+class MicroBatcher:
+    """
+    Groups concurrent submit() calls into run_batch(items) -> outputs calls
+    without a dedicated thread: a waiting caller leads each batch and hands the
+    lead to the oldest pending caller when it is done.
+    """
+
+    def __init__(self, run_batch: Callable[[list], list], max_batch: int = 16, max_wait_s: float = 0.002):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_s
+        self.batches = 0
+        self.items = 0
+        self._cond = threading.Condition()
+        self._pending: List[_Job] = []
+        self._leading = False
+
+    def submit(self, item):
+        job = _Job(item)
+        with self._cond:
+            self._pending.append(job)
+            lead = not self._leading
+            self._leading = True
+            self._cond.notify_all()
+        if not lead:
+            job.wake.wait()
+        while not job.finished:  # leading now (first in, or promoted)
+            self._lead()
+            if not job.finished:
+                job.wake.clear()
+                job.wake.wait()
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def _lead(self):
+        with self._cond:
+            deadline = time.monotonic() + self.max_wait_s
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[: self.max_batch]
+            del self._pending[: self.max_batch]
+        try:
+            outputs = self.run_batch([job.item for job in batch])
+            for job, out in zip(batch, outputs):
+                job.result = out
+        except Exception as e:
+            for job in batch:
+                job.error = e
+        with self._cond:
+            self.batches += 1
+            self.items += len(batch)
+            for job in batch:
+                job.finished = True
+                job.wake.set()
+            if self._pending:
+                self._pending[0].wake.set()  # promote the oldest waiter
+            else:
+                self._leading = False
+
+    def describe(self) -> dict:
+        return {"max_batch": self.max_batch, "max_wait_ms": 1000 * self.max_wait_s, "batches": self.batches,
+                "mean_batch": round(self.items / self.batches, 2) if self.batches else None}
+
+
+# ---------------------------
+# Model
+# ---------------------------
+def load_ctc_model(path: Path, device):
+    """models/ctc.pt (a CTCModel state_dict) -> eval-mode model; sizes are read from the weights."""
+    import torch
+
+    if str(SCRIPTS_DIR) not in sys.path:
+        sys.path.append(str(SCRIPTS_DIR))
+    from encoders import CTCModel  # type: ignore
+
+    state = torch.load(path, map_location=device)
+    hidden, input_size, _ = state["encoder.net.0.weight"].shape
+    model = CTCModel(vocab_size=state["classifier.weight"].shape[0], input_size=input_size, hidden_size=hidden)
+    model.load_state_dict(state, strict=True)
+    return model.to(device).eval()
+
+
+class CTCFingerspeller:
+    def __init__(self, model_path: Path, max_batch: int = 16, max_wait_s: float = 0.002, quantized: bool = False):
+        """quantized: dynamic int8 on CPU (ctc.int8.pt when up to date, else quantized on load; quantize_models.py)."""
+        import torch
+
+        self._torch = torch
+        self.backend = "torch-int8" if quantized else "torch"
+        self.artifact = None  # ctc.int8.pt when loaded from disk
+        self.device = torch.device("cuda" if torch.cuda.is_available() and not quantized else "cpu")
+        self.model = load_ctc_model(model_path, self.device)
+        self.input_size = self.model.encoder.net[0].in_channels
+        if quantized:
+            from quantize_models import int8_path_for, load_quantized_ctc, quantize_ctc_model
+
+            path = int8_path_for(model_path)
+            if path.exists() and path.stat().st_mtime >= Path(model_path).stat().st_mtime:
+                self.model = load_quantized_ctc(path)
+                self.artifact = path
+            else:
+                self.model = quantize_ctc_model(self.model)
+        self.batcher = MicroBatcher(self.log_probs_batch, max_batch=max_batch, max_wait_s=max_wait_s)
+
+    def log_probs_batch(self, seqs: List[np.ndarray]) -> List[np.ndarray]:
+        """Variable-length (T_i, F) sequences -> per-item (T_i, V) log-probabilities, one padded pass."""
+        torch = self._torch
+        lengths = [s.shape[0] for s in seqs]
+        X = np.zeros((len(seqs), max(lengths), self.input_size), dtype=np.float32)
+        for i, s in enumerate(seqs):
+            X[i, : lengths[i]] = s
+        mask = np.arange(X.shape[1])[None, :] < np.asarray(lengths)[:, None]
+        with torch.no_grad():
+            x = torch.from_numpy(X).to(self.device)
+            m = torch.from_numpy(mask).to(self.device)
+            logp = torch.log_softmax(self.model(x, m), dim=-1).cpu().numpy()
+        return [logp[i, :n] for i, n in enumerate(lengths)]
+
+    def predict(self, seq: np.ndarray, decoder: str = "greedy", beam_width: int = 8) -> dict:
+        logp = self.batcher.submit(np.asarray(seq, dtype=np.float32))
+        chars = beam_decode(logp, beam_width) if decoder == "beam" else greedy_decode(logp)
+        return {"text": "".join(c["char"] for c in chars), "chars": chars, "frames": int(logp.shape[0])}
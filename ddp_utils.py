@@ -0,0 +1,85 @@
+# ddp_utils.py
+"""
+CPU data-parallel training helpers (torch.distributed, gloo backend).
+
+    spawn(train, nprocs, args)   # runs train(rank, world, args) in nprocs local processes
+
+Each process gets cpu_count // nprocs intra-op threads (or --threads), a shard
+of the dataset via DistributedSampler, and a DistributedDataParallel model that
+all-reduces gradients after every backward. Only rank 0 should log and write
+checkpoints; unwrap() gives the plain module, so saved state_dicts are the
+same as single-process ones. world == 1 skips all of it.
+"""
+import os
+import socket
+from typing import List, Optional
+
+import torch
+import torch.distributed as dist
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data import DataLoader, DistributedSampler
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _entry(rank: int, fn, world: int, threads: int, args: tuple):
+    torch.set_num_threads(threads)
+    dist.init_process_group("gloo", rank=rank, world_size=world)
+    try:
+        fn(rank, world, *args)
+    finally:
+        dist.destroy_process_group()
+
+
+def spawn(fn, nprocs: int, *args, threads: Optional[int] = None):
+    """Run fn(rank, world, *args) in nprocs processes (fn must be importable, i.e. module level)."""
+    threads = threads or max(1, (os.cpu_count() or 1) // nprocs)
+    if nprocs <= 1:
+        torch.set_num_threads(threads)
+        return fn(0, 1, *args)
+    os.environ.setdefault("MASTER_ADDR", "127.0.0.1")
+    os.environ["MASTER_PORT"] = str(_free_port())
+    torch.multiprocessing.spawn(_entry, args=(fn, nprocs, threads, args), nprocs=nprocs, join=True)
+
+
+def wrap(model: torch.nn.Module, world: int) -> torch.nn.Module:
+    return DistributedDataParallel(model) if world > 1 else model
+
+
+def unwrap(model: torch.nn.Module) -> torch.nn.Module:
+    return model.module if isinstance(model, DistributedDataParallel) else model
+
+
+def sharded_loader(ds, batch: int, rank: int, world: int, shuffle: bool, drop_last: bool = False,
+                   collate_fn=None, num_workers: int = 0):
+    """DataLoader over this rank's shard; `batch` is the global batch, split evenly across ranks."""
+    if world <= 1:
+        return DataLoader(ds, batch_size=batch, shuffle=shuffle, drop_last=drop_last,
+                          collate_fn=collate_fn, num_workers=num_workers)
+    sampler = DistributedSampler(ds, num_replicas=world, rank=rank, shuffle=shuffle, drop_last=drop_last)
+    return DataLoader(ds, batch_size=max(1, batch // world), sampler=sampler, drop_last=drop_last,
+                      collate_fn=collate_fn, num_workers=num_workers)
+
+
+def set_epoch(loader: DataLoader, epoch: int):
+    """Reshuffle the shards each epoch (no-op for single-process loaders)."""
+    if isinstance(loader.sampler, DistributedSampler):
+        loader.sampler.set_epoch(epoch)
+
+
+def all_sum(values: List[float], world: int) -> List[float]:
+    """Sum per-rank counters (loss sums, correct, total) across processes."""
+    if world <= 1:
+        return list(values)
+    t = torch.tensor(values, dtype=torch.float64)
+    dist.all_reduce(t, op=dist.ReduceOp.SUM)
+    return t.tolist()
+
+
+def barrier(world: int):
+    if world > 1:
+        dist.barrier()
@@ -4,6 +4,9 @@ from torch.utils.data import DataLoader, Dataset
 import numpy as np, os, editdistance
 from encoders import CTCModel
 
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))  # repo root: ddp_utils
+
 VOCAB = " " + "".join([chr(i) for i in range(97,123)])  # " abcdef..."
 IDX2CHAR = list(VOCAB)
 CHAR2IDX = {c:i for i,c in enumerate(IDX2CHAR)}
@@ -26,7 +29,8 @@ def collate_fn(batch):
         lx.append(len(x)); ly.append(len(y))
     X = nn.utils.rnn.pad_sequence(xs, batch_first=True)
     Y = torch.cat(ys)
-    return X, Y, lx, ly
+    mask = torch.arange(X.shape[1])[None, :] < torch.tensor(lx)[:, None]
+    return X, Y, lx, ly, mask
 
 def greedy_decode(logits):
     probs = torch.argmax(logits, dim=-1)
@@ -38,26 +42,84 @@ def greedy_decode(logits):
         prev = p
     return "".join(seq)
 
-def main():
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    model = CTCModel(vocab_size=len(VOCAB)).to(device)
+def train(rank, world, args):
+    """One training process (rank 0 logs and saves; see ddp_utils.py for --procs > 1)."""
+    import time
+    import ddp_utils
+
+    torch.manual_seed(args.seed)  # same initial weights on every rank
+    device = "cuda" if torch.cuda.is_available() and world == 1 else "cpu"
+    net = CTCModel(vocab_size=len(VOCAB)).to(device)
+    model = ddp_utils.wrap(net, world)
     criterion = nn.CTCLoss(blank=0, zero_infinity=True)
     optimizer = optim.Adam(model.parameters(), lr=1e-3)
 
-    train = DataLoader(SignDataset("features/train"), batch_size=32, shuffle=True, collate_fn=collate_fn)
-    val = DataLoader(SignDataset("features/val"), batch_size=16, shuffle=False, collate_fn=collate_fn)
+    train = ddp_utils.sharded_loader(SignDataset(os.path.join(args.features, "train")), args.batch, rank, world,
+                                     shuffle=True, collate_fn=collate_fn)
+    val = DataLoader(SignDataset(os.path.join(args.features, "val")), batch_size=16, shuffle=False, collate_fn=collate_fn)
 
-    for epoch in range(10):
-        model.train(); tloss=0
-        for X,Y,lx,ly in train:
-            X,Y = X.to(device),Y.to(device)
-            logits = model(X)
+    for epoch in range(args.epochs):
+        ddp_utils.set_epoch(train, epoch)
+        model.train(); tloss=0; n=0; t0=time.perf_counter()
+        for X,Y,lx,ly,mask in train:
+            X,Y,mask = X.to(device),Y.to(device),mask.to(device)
+            logits = model(X, mask)
             logp = nn.functional.log_softmax(logits, dim=-1).transpose(0,1)
             loss = criterion(logp, Y, torch.tensor(lx), torch.tensor(ly))
             optimizer.zero_grad(); loss.backward(); optimizer.step()
-            tloss += loss.item()
-        print(f"Epoch {epoch+1}: train_loss {tloss/len(train):.3f}")
-    torch.save(model.state_dict(), "models/ctc.pt")
+            tloss += loss.item(); n += X.shape[0]
+        tloss, steps, n = ddp_utils.all_sum([tloss, len(train), n], world)
+        if rank == 0:
+            print(f"Epoch {epoch+1}: train_loss {tloss/steps:.3f} | {n/(time.perf_counter()-t0):.0f} samples/s")
+    if rank == 0:
+        torch.save(ddp_utils.unwrap(model).state_dict(), args.out)
+        if args.quantize:
+            report_quantized(args.out, val, criterion)
+
+def evaluate(model, loader, criterion):
+    """Mean CTC loss and greedy-decoding character error rate on CPU."""
+    model.eval(); tloss=0; errs=0; chars=0
+    with torch.no_grad():
+        for X,Y,lx,ly,mask in loader:
+            logits = model(X, mask)
+            logp = nn.functional.log_softmax(logits, dim=-1)
+            tloss += criterion(logp.transpose(0,1), Y, torch.tensor(lx), torch.tensor(ly)).item()
+            targets = torch.split(Y, ly)
+            for i in range(X.shape[0]):
+                ref = "".join(IDX2CHAR[c] for c in targets[i].tolist())
+                errs += editdistance.eval(greedy_decode(logp[i, :lx[i]]), ref); chars += len(ref)
+    return tloss/max(1,len(loader)), errs/max(1,chars)
+
+def report_quantized(model_path, val, criterion):
+    """Write <model>.int8.pt (quantize_models.py) and print the val loss / CER delta and CPU latency."""
+    from ctc_fingerspell import load_ctc_model
+    from quantize_models import load_quantized_ctc, print_speed, save_quantized_ctc
+
+    out = save_quantized_ctc(model_path)
+    model = load_ctc_model(model_path, torch.device("cpu"))
+    qmodel = load_quantized_ctc(out)
+    print(f"Saved {out}")
+    (l_f, cer_f), (l_q, cer_q) = evaluate(model, val, criterion), evaluate(qmodel, val, criterion)
+    print(f"  val loss float32 {l_f:.3f}  int8 {l_q:.3f}   CER float32 {cer_f:.3f}  int8 {cer_q:.3f}  (delta {cer_q-cer_f:+.3f})")
+    F = model.encoder.net[0].in_channels
+    print_speed(model, qmodel, [(f"batch {b} x 100", (torch.randn(b, 100, F),)) for b in (1, 16)])
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--features", default="features")
+    ap.add_argument("--out", default="models/ctc.pt")
+    ap.add_argument("--epochs", type=int, default=10)
+    ap.add_argument("--batch", type=int, default=32, help="Global batch size (split across --procs)")
+    ap.add_argument("--procs", type=int, default=1, help="Data-parallel training processes (DDP over gloo)")
+    ap.add_argument("--threads", type=int, default=0, help="Torch threads per process (0: cores / procs)")
+    ap.add_argument("--quantize", action="store_true",
+                    help="Also write <out>.int8.pt (dynamic int8) and report its val loss / CER delta and latency")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    import ddp_utils
+    ddp_utils.spawn(train, args.procs, args, threads=args.threads or None)
 
 if __name__ == "__main__":
     main()
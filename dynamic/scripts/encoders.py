@@ -13,9 +13,19 @@ class TemporalEncoder(nn.Module):
             input_size = hidden_size
         self.net = nn.Sequential(*layers)
 
-    def forward(self, x):  # (B,T,F)
+    def forward(self, x, mask=None):  # (B,T,F), mask (B,T) true on real frames
         x = x.transpose(1,2)       # (B,F,T)
-        x = self.net(x)
+        if mask is None:
+            x = self.net(x)
+        else:
+            # Zero padded frames after every conv, so a padded batch item sees the same
+            # zero borders as it would alone and its outputs don't depend on the batch.
+            m = mask.unsqueeze(1).to(x.dtype)
+            x = x * m
+            for layer in self.net:
+                x = layer(x)
+                if not isinstance(layer, (nn.ReLU, nn.Dropout)):  # convs (or their int8 im2col form)
+                    x = x * m
         return x.transpose(1,2)    # (B,T,H)
 
 class CTCModel(nn.Module):
@@ -24,6 +34,6 @@ class CTCModel(nn.Module):
         self.encoder = TemporalEncoder(input_size, hidden_size)
         self.classifier = nn.Linear(hidden_size, vocab_size)
 
-    def forward(self, x):
-        x = self.encoder(x)
+    def forward(self, x, mask=None):
+        x = self.encoder(x, mask)
         return self.classifier(x)
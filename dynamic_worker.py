@@ -0,0 +1,485 @@
+# dynamic_worker.py
+"""
+Out-of-process I3D workers for /predict_dynamic.
+
+Topology (everything on one machine talks over Unix domain sockets):
+
+    server.py --(DynamicWorkerClient)--> broker.sock --> worker-0.sock
+                                                     --> worker-1.sock ...
+
+Messages are length-prefixed JSON. Clips never go through the socket: the
+client writes the preprocessed uint8 clip into a POSIX shared-memory block it
+owns and only sends the block name, shape and dtype. The broker forwards that
+header to an idle worker, so adding workers adds no copies.
+
+Examples:
+    # one worker
+    python dynamic_worker.py worker --socket /tmp/sgsl-dyn-0.sock
+    # local stand-in broker with 4 workers
+    python dynamic_worker.py broker --socket /tmp/sgsl-dyn.sock --workers 4
+    # throughput scaling from 1..4 workers (random weights if nslt_100.pt is missing)
+    python dynamic_worker.py bench --max-workers 4 --requests 16
+    # point the API at the broker
+    DYNAMIC_WORKER_SOCKET=/tmp/sgsl-dyn.sock uvicorn server:app
+"""
+import argparse
+import json
+import os
+import queue
+import signal
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent
+DEFAULT_WEIGHTS = REPO_ROOT / "WLASL" / "wlasl_model_test" / "nslt_100.pt"
+DEFAULT_LABELS = REPO_ROOT / "WLASL" / "wlasl_model_test" / "wlasl_class_list_100.txt"
+
+_LEN = struct.Struct("!I")
+
+
+# ---------------------------
+# Framing & shared memory
+# ---------------------------
+def send_msg(sock: socket.socket, obj: dict):
+    data = json.dumps(obj).encode()
+    sock.sendall(_LEN.pack(len(data)) + data)
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("socket closed")
+        buf += chunk
+    return bytes(buf)
+
+
+def recv_msg(sock: socket.socket) -> dict:
+    (n,) = _LEN.unpack(_recv_exact(sock, _LEN.size))
+    return json.loads(_recv_exact(sock, n))
+
+
+def attach_shm(name: str) -> shared_memory.SharedMemory:
+    """Attach to a block owned by another process without taking over its cleanup."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python >= 3.13
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+        except Exception:
+            pass
+        return shm
+
+
+class ClipBuffer:
+    """Reusable shared-memory block owned by one client connection."""
+
+    def __init__(self, nbytes: int):
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, nbytes))
+
+    @property
+    def size(self) -> int:
+        return self.shm.size
+
+    def write(self, clip: np.ndarray) -> dict:
+        view = np.ndarray(clip.shape, dtype=clip.dtype, buffer=self.shm.buf)
+        view[...] = clip
+        return {"shm": self.shm.name, "shape": list(clip.shape), "dtype": str(clip.dtype)}
+
+    def close(self):
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# ---------------------------
+# Worker
+# ---------------------------
+class _ShmCache:
+    """Keeps recently used client blocks mapped; clients reuse their buffer per connection."""
+
+    def __init__(self, capacity: int = 16):
+        self.capacity = capacity
+        self._items: "OrderedDict[str, shared_memory.SharedMemory]" = OrderedDict()
+
+    def get(self, name: str) -> shared_memory.SharedMemory:
+        shm = self._items.pop(name, None)
+        if shm is None:
+            shm = attach_shm(name)
+        self._items[name] = shm
+        while len(self._items) > self.capacity:
+            _, old = self._items.popitem(last=False)
+            old.close()
+        return shm
+
+
+class _WorkerHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server
+        while True:
+            try:
+                msg = recv_msg(self.request)
+            except (ConnectionError, OSError):
+                return
+            try:
+                reply = server.dispatch(msg)
+            except Exception as e:
+                reply = {"error": f"{type(e).__name__}: {e}"}
+            send_msg(self.request, reply)
+
+
+class WorkerServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, predictor, version: str):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _WorkerHandler)
+        self.predictor = predictor
+        self.version = version
+        self.shm_cache = _ShmCache()
+        self._lock = threading.Lock()  # one forward at a time; torch already uses all intra-op threads
+        self.served = 0
+
+    def dispatch(self, msg: dict) -> dict:
+        op = msg.get("op")
+        if op == "ping":
+            return {"ok": True}
+        if op == "describe":
+            return {"pid": os.getpid(), "version": self.version, "served": self.served,
+                    "backend": self.predictor.backend}
+        if op != "predict":
+            return {"error": f"Unknown op: {op}"}
+        with self._lock:
+            shm = self.shm_cache.get(msg["shm"])
+            clip = np.ndarray(tuple(msg["shape"]), dtype=np.dtype(msg["dtype"]), buffer=shm.buf)
+            out = self.predictor.predict_clip(clip, focus_labels=msg.get("labels"))
+            self.served += 1
+        return out
+
+
+def run_worker(socket_path: str, weights: Optional[Path], labels: Path, threads: int = 0):
+    import torch
+    from model_registry import artifact_version
+    from wlasl_dynamic import WLASLDynamicPredictor
+
+    if threads > 0:
+        torch.set_num_threads(threads)
+    predictor = WLASLDynamicPredictor(weights_path=weights, class_list_path=labels)
+    version = artifact_version([weights]) if weights is not None else "random-init"
+    server = WorkerServer(socket_path, predictor, version)
+    print(f"[worker {os.getpid()}] serving {version} on {socket_path}", flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+# ---------------------------
+# Broker (local stand-in)
+# ---------------------------
+class _BrokerHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server
+        while True:
+            try:
+                msg = recv_msg(self.request)
+            except (ConnectionError, OSError):
+                return
+            if msg.get("op") == "describe":
+                send_msg(self.request, {"broker": True, "workers": server.describe_workers()})
+                continue
+            path, conn = server.idle.get()
+            try:
+                send_msg(conn, msg)
+                reply = recv_msg(conn)
+            except Exception as e:
+                reply = {"error": f"worker failed: {e}"}
+                conn.close()
+                try:
+                    conn = connect(path)
+                except OSError:
+                    pass  # retried on the next request that picks this worker
+            finally:
+                server.idle.put((path, conn))
+            send_msg(self.request, reply)
+
+
+class BrokerServer(socketserver.ThreadingUnixStreamServer):
+    """Forwards each request header to whichever worker is idle (one connection per worker)."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, worker_paths: List[str]):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _BrokerHandler)
+        self.worker_paths = worker_paths
+        self.idle: "queue.Queue[tuple]" = queue.Queue()
+        for path in worker_paths:
+            self.idle.put((path, connect(path)))
+
+    def describe_workers(self) -> List[dict]:
+        out = []
+        for path in self.worker_paths:
+            try:
+                with connect(path) as s:
+                    send_msg(s, {"op": "describe"})
+                    out.append(recv_msg(s))
+            except Exception as e:
+                out.append({"socket": path, "error": str(e)})
+        return out
+
+
+def connect(path: str, timeout: float = 0.0) -> socket.socket:
+    deadline = time.monotonic() + timeout
+    while True:
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            s.connect(path)
+            return s
+        except (FileNotFoundError, ConnectionRefusedError):
+            s.close()
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.1)
+
+
+def spawn_workers(n: int, socket_dir: str, weights: Optional[Path], labels: Path,
+                  threads: int = 0, startup_timeout: float = 300.0):
+    """Start n worker processes and wait until each socket answers a ping."""
+    procs, paths = [], []
+    for i in range(n):
+        path = os.path.join(socket_dir, f"worker-{i}.sock")
+        cmd = [sys.executable, str(Path(__file__).resolve()), "worker", "--socket", path,
+               "--labels", str(labels), "--threads", str(threads)]
+        cmd += ["--weights", str(weights)] if weights is not None else ["--random-init"]
+        procs.append(subprocess.Popen(cmd, cwd=str(REPO_ROOT)))
+        paths.append(path)
+    for path in paths:
+        with connect(path, timeout=startup_timeout) as s:
+            send_msg(s, {"op": "ping"})
+            recv_msg(s)
+    return procs, paths
+
+
+def stop_workers(procs):
+    for p in procs:
+        p.terminate()
+    for p in procs:
+        try:
+            p.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            p.kill()
+
+
+# ---------------------------
+# Client used by server.py
+# ---------------------------
+class DynamicWorkerClient:
+    """
+    Drop-in for WLASLDynamicPredictor.predict that preprocesses locally and runs
+    the forward pass in a worker (or broker) process. Each pooled connection owns
+    one shared-memory clip buffer, so concurrent requests never share a block.
+    """
+
+    backend = "worker"  # the workers' own engine is reported by describe()
+
+    def __init__(self, address: str, pool_size: int = 4, timeout: float = 120.0):
+        self.address = address
+        self.timeout = timeout
+        self._pool: "queue.LifoQueue[tuple]" = queue.LifoQueue()
+        for _ in range(pool_size):
+            self._pool.put((None, None))
+        self._all_buffers: List[ClipBuffer] = []
+        self._buffers_lock = threading.Lock()
+
+    def _buffer_for(self, buf: Optional[ClipBuffer], nbytes: int) -> ClipBuffer:
+        if buf is not None and buf.size >= nbytes:
+            return buf
+        new = ClipBuffer(nbytes)
+        with self._buffers_lock:
+            if buf is not None:
+                buf.close()
+                self._all_buffers.remove(buf)
+            self._all_buffers.append(new)
+        return new
+
+    def _call(self, msg: dict, clip: Optional[np.ndarray] = None) -> dict:
+        conn, buf = self._pool.get()
+        try:
+            if conn is None:
+                conn = connect(self.address)
+                conn.settimeout(self.timeout)
+            if clip is not None:
+                buf = self._buffer_for(buf, clip.nbytes)
+                msg = {**msg, **buf.write(clip)}
+            send_msg(conn, msg)
+            return recv_msg(conn)
+        except Exception:
+            if conn is not None:
+                conn.close()
+            conn = None
+            raise
+        finally:
+            self._pool.put((conn, buf))
+
+    def predict_clip(self, clip: np.ndarray, focus_labels: Optional[List[str]] = None) -> dict:
+        return self._call({"op": "predict", "labels": focus_labels}, clip=clip)
+
+    def predict(self, frames: List[np.ndarray], focus_labels: Optional[List[str]] = None) -> dict:
+        from wlasl_dynamic import preprocess_clip_uint8
+
+        clip = preprocess_clip_uint8(frames)
+        if clip is None:
+            return {"error": "No frames to process."}
+        return self.predict_clip(clip, focus_labels=focus_labels)
+
+    def describe(self) -> dict:
+        return self._call({"op": "describe"})
+
+    def served_version(self) -> str:
+        """Weights version the workers report (several joined by "+" while they disagree)."""
+        info = self.describe()
+        workers = info["workers"] if info.get("broker") else [info]
+        return "+".join(sorted({w.get("version", "unreachable") for w in workers}))
+
+    def close(self):
+        while not self._pool.empty():
+            conn, _ = self._pool.get_nowait()
+            if conn is not None:
+                conn.close()
+        with self._buffers_lock:
+            for buf in self._all_buffers:
+                buf.close()
+            self._all_buffers = []
+
+
+# ---------------------------
+# Benchmark
+# ---------------------------
+def bench(args):
+    weights = None if args.random_init else args.weights
+    if weights is not None and not weights.exists():
+        print(f"[bench] {weights} not found; benchmarking with random init")
+        weights = None
+    rng = np.random.default_rng(0)
+    clip = rng.integers(0, 256, size=(args.frames, 224, 224, 3), dtype=np.uint8)
+
+    print(f"cpu count: {os.cpu_count()} | clip: {clip.shape} | requests per run: {args.requests}")
+    print(f"{'workers':>7} {'threads/w':>9} {'clips/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'speedup':>8}")
+    base = None
+    for n in range(1, args.max_workers + 1):
+        threads = args.threads or max(1, (os.cpu_count() or 1) // n)
+        with tempfile.TemporaryDirectory(prefix="sgsl-dyn-") as tmp:
+            procs, paths = spawn_workers(n, tmp, weights, args.labels, threads=threads)
+            broker = BrokerServer(os.path.join(tmp, "broker.sock"), paths)
+            bt = threading.Thread(target=broker.serve_forever, daemon=True)
+            bt.start()
+            client = DynamicWorkerClient(broker.server_address, pool_size=n * 2)
+            try:
+                client.predict_clip(clip)  # warm every code path once
+                lat = []
+                lat_lock = threading.Lock()
+                todo = queue.Queue()
+                for _ in range(args.requests):
+                    todo.put(1)
+
+                def _drain():
+                    while True:
+                        try:
+                            todo.get_nowait()
+                        except queue.Empty:
+                            return
+                        t0 = time.perf_counter()
+                        client.predict_clip(clip)
+                        with lat_lock:
+                            lat.append(time.perf_counter() - t0)
+
+                t0 = time.perf_counter()
+                ths = [threading.Thread(target=_drain) for _ in range(n * 2)]
+                for t in ths:
+                    t.start()
+                for t in ths:
+                    t.join()
+                wall = time.perf_counter() - t0
+            finally:
+                client.close()
+                broker.shutdown()
+                broker.server_close()
+                stop_workers(procs)
+        tput = args.requests / wall
+        base = base or tput
+        p50, p95 = np.percentile(np.array(lat) * 1000, [50, 95])
+        print(f"{n:>7} {threads:>9} {tput:>8.2f} {p50:>8.0f} {p95:>8.0f} {tput / base:>7.2f}x", flush=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Out-of-process I3D workers for /predict_dynamic")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    def add_model_args(p):
+        p.add_argument("--weights", type=Path, default=DEFAULT_WEIGHTS)
+        p.add_argument("--labels", type=Path, default=DEFAULT_LABELS)
+        p.add_argument("--random-init", action="store_true", help="Skip weights (topology benchmarks only)")
+        p.add_argument("--threads", type=int, default=0, help="torch threads per worker (0 = torch default)")
+
+    w = sub.add_parser("worker", help="Run one worker process")
+    w.add_argument("--socket", required=True)
+    add_model_args(w)
+
+    b = sub.add_parser("broker", help="Run a local broker in front of N spawned workers")
+    b.add_argument("--socket", required=True)
+    b.add_argument("--workers", type=int, default=2)
+    add_model_args(b)
+
+    bn = sub.add_parser("bench", help="Measure throughput as workers are added")
+    bn.add_argument("--max-workers", type=int, default=4)
+    bn.add_argument("--requests", type=int, default=16)
+    bn.add_argument("--frames", type=int, default=64)
+    add_model_args(bn)
+
+    args = ap.parse_args()
+    if args.cmd == "worker":
+        run_worker(args.socket, None if args.random_init else args.weights, args.labels, args.threads)
+    elif args.cmd == "broker":
+        weights = None if args.random_init else args.weights
+        sock_dir = tempfile.mkdtemp(prefix="sgsl-dyn-")
+        procs, paths = spawn_workers(args.workers, sock_dir, weights, args.labels, threads=args.threads)
+        broker = BrokerServer(args.socket, paths)
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # run the cleanup below
+        print(f"[broker] {args.workers} workers behind {args.socket}", flush=True)
+        try:
+            broker.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            broker.server_close()
+            stop_workers(procs)
+            if os.path.exists(args.socket):
+                os.unlink(args.socket)
+    else:
+        bench(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# export_temporal.py
+"""
+Export a train_temporal.py checkpoint (LSTM or TCN) to TorchScript and/or
+ONNX next to it (seq_model.pt -> seq_model.ts / seq_model.onnx), then check
+parity against the eager model before keeping the files.
+
+The torchscript / onnx sequence backends (inference_backends.py) load these
+artifacts when they are at least as new as the checkpoint, so serving with
+INFERENCE_BACKENDS=sequence=onnx never builds the eager module.
+
+Parity: random sequences at several batch sizes (the batch axis is dynamic)
+must match eager logits within --atol and agree on every top-1. A failing
+export is deleted and the script exits non-zero.
+
+Examples:
+    python export_temporal.py                                   # models/seq_model.pt, both formats
+    python export_temporal.py --ckpt models/dyn_seq_model.pt --formats onnx
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from inference_backends import create_engine, export_sequence_onnx, trace_sequence_model
+from infer_temporal import load_checkpoint
+
+SUFFIX = {"torchscript": ".ts", "onnx": ".onnx"}
+
+
+def export(model, meta: dict, fmt: str, path: Path):
+    if fmt == "torchscript":
+        trace_sequence_model(model, meta["T"], meta["in_dim"]).save(str(path))
+    else:
+        export_sequence_onnx(model, meta["T"], meta["in_dim"], str(path))
+
+
+def parity(model, engine, meta: dict, batches, seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    worst, agree, total = 0.0, 0, 0
+    for b in batches:
+        X = rng.normal(0, 0.5, size=(b, meta["T"], meta["in_dim"])).astype(np.float32)
+        with torch.no_grad():
+            ref = model(torch.from_numpy(X)).numpy()
+        out = engine.predict_batch(X)
+        worst = max(worst, float(np.abs(out - ref).max()))
+        agree += int((out.argmax(1) == ref.argmax(1)).sum())
+        total += b
+    return {"max_abs_diff": worst, "top1_agree": agree / total}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Export a sequence model to TorchScript / ONNX with a parity check")
+    ap.add_argument("--ckpt", type=Path, default=Path("models/seq_model.pt"))
+    ap.add_argument("--formats", nargs="+", choices=sorted(SUFFIX), default=["torchscript", "onnx"])
+    ap.add_argument("--atol", type=float, default=1e-4)
+    ap.add_argument("--batches", type=int, nargs="+", default=[1, 7, 64])
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    model, meta = load_checkpoint(args.ckpt, torch.device("cpu"))
+    print(f"{args.ckpt}: T={meta['T']} in_dim={meta['in_dim']} classes={meta['num_classes']}")
+    failed = False
+    for fmt in args.formats:
+        path = args.ckpt.with_suffix(SUFFIX[fmt])
+        t0 = time.perf_counter()
+        export(model, meta, fmt, path)
+        engine = create_engine("sequence", fmt, ckpt_path=args.ckpt)
+        if engine.artifact != path:
+            raise RuntimeError(f"{fmt} engine did not pick up {path}")
+        result = parity(model, engine, meta, args.batches, args.seed)
+        ok = result["max_abs_diff"] <= args.atol and result["top1_agree"] == 1.0
+        print(f"  {fmt:<12} {path}  {time.perf_counter() - t0:.2f} s  max|diff| {result['max_abs_diff']:.2e}  "
+              f"top1 {100 * result['top1_agree']:.1f}%  {'OK' if ok else 'FAILED'}")
+        if not ok:
+            path.unlink()
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# fingerspell_decoder.py
+"""
+Lexicon-constrained fingerspelling decoder over the static letter stream.
+
+The lesson vocabulary is compiled into a prefix trie stored as flat arrays
+(parent, letter, word id per node). Each trie node is an HMM state "currently
+showing this letter, having spelled the prefix up to it"; per frame a state
+either stays (self-loop) or is entered from its parent. The root is an idle
+state with a flat score that absorbs frames before the first letter.
+
+Decoding is an exact Viterbi pass vectorized over all trie nodes, so a frame
+costs a handful of numpy ops on arrays of length n_nodes (~17 us for a lesson
+vocabulary, ~55 us for 2000 words). Pruning to a beam costs more than it saves
+at these sizes, so there is none. Tries are cached per (vocabulary, class set)
+and shared by every decoder; a decoder only holds its score vector and a ring
+of bit-packed backpointers for the last `history` frames (n_nodes / 8 bytes
+per frame), so memory stays bounded however long a session streams without a
+reset. Segments are found per letter with a vectorized scan of that node's
+backpointer bits rather than a per-frame walk; a letter that began before the
+kept history is reported as starting at its first kept frame.
+
+Input rows are per-frame class log-probabilities (see frame_log_probs), in the
+order of the static model's class_names.
+"""
+import math
+import threading
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+NEG_INF = -np.inf
+
+
+def frame_log_probs(scores: np.ndarray, kind: str = "decision", temperature: float = 1.0) -> np.ndarray:
+    """(T, C) decision scores (or probabilities when kind == "proba") -> (T, C) log-probabilities."""
+    scores = np.asarray(scores, dtype=np.float64)
+    if kind == "proba":
+        return np.log(np.maximum(scores, 1e-12))
+    z = scores / temperature
+    z = z - z.max(axis=1, keepdims=True)
+    return z - np.log(np.exp(z).sum(axis=1, keepdims=True))
+
+
+class LexiconTrie:
+    def __init__(self, words: Sequence[str], class_names: Sequence[str]):
+        label_to_idx = {}
+        for i, name in enumerate(class_names):
+            label_to_idx.setdefault(name.strip().upper(), i)
+
+        parent, letter, word_id = [0], [-1], [-1]
+        children = [{}]
+        self.words: List[str] = []
+        self.skipped: List[str] = []  # words with letters the static model can't produce
+        for raw in words:
+            word = "".join(ch for ch in str(raw).upper() if not ch.isspace())
+            if not word or word in self.words:
+                continue
+            if any(ch not in label_to_idx for ch in word):
+                self.skipped.append(word)
+                continue
+            node = 0
+            for ch in word:
+                nxt = children[node].get(ch)
+                if nxt is None:
+                    nxt = len(parent)
+                    children[node][ch] = nxt
+                    children.append({})
+                    parent.append(node)
+                    letter.append(label_to_idx[ch])
+                    word_id.append(-1)
+                node = nxt
+            word_id[node] = len(self.words)
+            self.words.append(word)
+
+        self.class_names = list(class_names)
+        self.parent = np.asarray(parent, dtype=np.intp)
+        self.letter = np.asarray(letter, dtype=np.intp)
+        self.word_id = np.asarray(word_id, dtype=np.intp)
+        self.terminals = np.nonzero(self.word_id >= 0)[0]
+        # Root has no letter; index 0 is a safe gather target, overwritten by the idle score.
+        self.letter_gather = np.where(self.letter >= 0, self.letter, 0)
+
+    @property
+    def n_nodes(self) -> int:
+        return self.parent.shape[0]
+
+    def prefix(self, node: int) -> str:
+        out = []
+        while node > 0:
+            out.append(self.class_names[self.letter[node]])
+            node = self.parent[node]
+        return "".join(reversed(out))
+
+
+@lru_cache(maxsize=64)
+def _cached_trie(words: Tuple[str, ...], class_names: Tuple[str, ...]) -> LexiconTrie:
+    return LexiconTrie(words, class_names)
+
+
+def get_trie(words: Sequence[str], class_names: Sequence[str]) -> LexiconTrie:
+    """Shared trie for a vocabulary (order-insensitive) and class set."""
+    key = tuple(sorted({str(w).strip().upper() for w in words if str(w).strip()}))
+    return _cached_trie(key, tuple(class_names))
+
+
+class FingerspellDecoder:
+    def __init__(self, trie: LexiconTrie, stay_prob: float = 0.8, idle_logp: Optional[float] = None,
+                 history: int = 2048):
+        """
+        stay_prob: prior of remaining on the current letter for another frame
+                   (the rest goes to advancing to a child letter).
+        idle_logp: per-frame score of the idle (no letter yet) state; defaults to
+                   a uniform guess over the classes.
+        history:   frames of backpointers kept for segments (~68 s at 30 fps).
+        """
+        self.trie = trie
+        self.history = history
+        self.log_stay = math.log(stay_prob)
+        self.log_advance = math.log(1.0 - stay_prob)
+        self.idle_logp = idle_logp if idle_logp is not None else -math.log(max(len(trie.class_names), 2))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.delta = np.full(self.trie.n_nodes, NEG_INF)
+        self.delta[0] = 0.0
+        self.offset = 0.0  # running max subtracted from delta (keeps scores bounded)
+        self.frames = 0
+        # Ring over the last `history` frames, packed: bit set where the node was entered from its parent.
+        self.backptr = np.zeros((self.history, (self.trie.n_nodes + 7) // 8), dtype=np.uint8)
+
+    def _step(self, row: np.ndarray):
+        trie = self.trie
+        emit = row[trie.letter_gather]
+        emit[0] = self.idle_logp
+        stay = self.delta + self.log_stay
+        advance = self.delta[trie.parent] + self.log_advance
+        advance[0] = NEG_INF
+        entered = advance > stay
+        new = np.where(entered, advance, stay) + emit
+        top = new.max()
+        self.delta = new - top
+        self.offset += top
+        self.backptr[self.frames % self.history] = np.packbits(entered)
+        self.frames += 1
+
+    def push(self, log_probs: np.ndarray, segments: bool = False) -> dict:
+        """Consume (C,) or (T, C) frame log-probabilities; return the current hypothesis."""
+        rows = np.atleast_2d(np.asarray(log_probs, dtype=np.float64))
+        with self._lock:
+            for row in rows:
+                self._step(row)
+            return self._result(segments)
+
+    def result(self, segments: bool = True) -> dict:
+        with self._lock:
+            return self._result(segments)
+
+    def _result(self, segments: bool) -> dict:
+        trie = self.trie
+        best_node = int(np.argmax(self.delta))
+        out = {
+            "word": None,
+            "score": None,
+            "prefix": trie.prefix(best_node),
+            "frames": self.frames,
+            "segments": [],
+        }
+        if trie.terminals.size:
+            term_scores = self.delta[trie.terminals]
+            i = int(np.argmax(term_scores))
+            if np.isfinite(term_scores[i]):
+                node = int(trie.terminals[i])
+                out["word"] = trie.words[trie.word_id[node]]
+                out["score"] = float(term_scores[i] + self.offset)
+                if segments:
+                    out["segments"] = self.segments(node)
+        return out
+
+    def segments(self, node: int) -> List[dict]:
+        """Backtrace from `node` at the last frame -> [{letter, start, end}] (frame indices, inclusive)."""
+        first = max(0, self.frames - self.history)
+        rows = np.arange(first, self.frames) % self.history
+        segs = []
+        t = self.frames  # the letter at `node` ends at t - 1 and began at its last entry before t
+        while node > 0 and t > first:
+            bits = (self.backptr[rows[: t - first], node >> 3] >> (7 - (node & 7))) & 1
+            hits = np.flatnonzero(bits)
+            start = first + int(hits[-1]) if hits.size else first
+            segs.append({
+                "letter": self.trie.class_names[self.trie.letter[node]],
+                "start": start,
+                "end": t - 1,
+            })
+            t = start
+            node = self.trie.parent[node]
+        segs.reverse()
+        return segs
@@ -1,4 +1,5 @@
 # infer.py
+import argparse
 import cv2
 import json
 from pathlib import Path
@@ -8,6 +9,10 @@ import numpy as np
 import mediapipe as mp
 import joblib
 
+from landmark_features import landmarks_to_feature
+from live_pipeline import LivePipeline, add_source_args, open_source
+from motion_gate import MotionGate
+
 # ======= PATHS =======
 MODELS_DIR = Path("models")
 MODEL_PATH = MODELS_DIR / "hand_static.joblib"
@@ -29,19 +34,9 @@ mp_styles = mp.solutions.drawing_styles
 # ======= SETTINGS =======
 PRED_WINDOW = 7            # number of frames to smooth over
 CONF_MARGIN = 0.25         # minimum margin between top-2 scores to display
-CAMERA_INDEX = 0           # change if wrong webcam is used
-
-
-def landmarks_to_feature(hand_landmarks):
-    """Convert MediaPipe hand landmarks to normalized 63D feature vector."""
-    pts = np.array([[lm.x, lm.y, lm.z] for lm in hand_landmarks.landmark], dtype=np.float32)
-    wrist = pts[0].copy()
-    pts -= wrist
-    scale = np.linalg.norm(pts, axis=1).max()
-    if scale < 1e-6:
-        scale = 1.0
-    pts /= scale
-    return pts.flatten()
+CAMERA_INDEX = 0           # default --camera
+GATE_THRESHOLD = 0.02      # reuse last prediction while the hand moves less than this (0 = off)
+GATE_MAX_STALE = 10        # always reclassify after this many reused frames
 
 
 def decision_margin(dec):
@@ -56,76 +51,62 @@ def softmax_np(x: np.ndarray) -> np.ndarray:
     return exps / np.sum(exps)
 
 
-def open_camera(index: int):
-    """Try AVFoundation on macOS, fallback otherwise."""
-    cap = cv2.VideoCapture(index, cv2.CAP_AVFOUNDATION)
-    if cap.isOpened():
-        return cap
-    cap.release()
-    cap = cv2.VideoCapture(index)
-    return cap
+def classify(x: np.ndarray):
+    """x: (1, 63) -> (pred_idx, margin, confidence)"""
+    if hasattr(clf, "decision_function"):
+        dec = clf.decision_function(x).ravel()
+        pred_idx = int(np.argmax(dec))
+        probs = softmax_np(dec)
+        return pred_idx, decision_margin(dec), float(probs[pred_idx])
+    probs = clf.predict_proba(x).ravel()
+    top2 = np.sort(probs)[-2:]
+    pred_idx = int(np.argmax(probs))
+    return pred_idx, float(top2[-1] - top2[-2]), float(probs[pred_idx])
 
 
 def main():
-    cap = open_camera(CAMERA_INDEX)
-    if not cap.isOpened():
-        raise RuntimeError(
-            f"Could not open webcam (index {CAMERA_INDEX}). "
-            "Try changing CAMERA_INDEX or granting camera permissions."
-        )
+    ap = argparse.ArgumentParser(description="Static letter inference from a webcam or a recording")
+    ap.add_argument("--camera", type=int, default=CAMERA_INDEX, help="Webcam index")
+    add_source_args(ap)
+    args = ap.parse_args()
 
+    cap = open_source(args.camera, args.video)
     vote_buf = deque(maxlen=PRED_WINDOW)
+    gate = MotionGate(GATE_THRESHOLD, GATE_MAX_STALE)
+    shown = None
 
     with mp_hands.Hands(
         model_complexity=1,
         max_num_hands=1,
         min_detection_confidence=0.6,
         min_tracking_confidence=0.6,
-    ) as hands:
-        while True:
-            ok, frame = cap.read()
-            if not ok:
-                print("[WARN] Empty frame from camera.")
-                break
-
-            frame = cv2.flip(frame, 1)
+    ) as hands, LivePipeline(cap, hands.process) as live:
+        # Camera reads and hand detection run on background threads (live_pipeline.py)
+        for item in live:
+            frame, res = item.frame, item.result
             h, w = frame.shape[:2]
 
-            # Detect hands
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            rgb.flags.writeable = False
-            res = hands.process(rgb)
-            rgb.flags.writeable = True
-
             pred_text = "—"
             margin_val = 0.0
             conf_val = 0.0
 
             if res.multi_hand_landmarks:
                 hand_lms = res.multi_hand_landmarks[0]
-                mp_drawing.draw_landmarks(
-                    frame,
-                    hand_lms,
-                    mp_hands.HAND_CONNECTIONS,
-                    mp_styles.get_default_hand_landmarks_style(),
-                    mp_styles.get_default_hand_connections_style(),
-                )
-
-                x = landmarks_to_feature(hand_lms).reshape(1, -1)
-
-                # Prediction & margin
-                if hasattr(clf, "decision_function"):
-                    dec = clf.decision_function(x).ravel()
-                    margin_val = decision_margin(dec)
-                    pred_idx = int(np.argmax(dec))
-                    probs = softmax_np(dec)
-                    conf_val = float(probs[pred_idx])
-                else:
-                    probs = clf.predict_proba(x).ravel()
-                    top2 = np.sort(probs)[-2:]
-                    margin_val = float(top2[-1] - top2[-2])
-                    pred_idx = int(np.argmax(probs))
-                    conf_val = float(probs[pred_idx])
+                if not args.headless:
+                    mp_drawing.draw_landmarks(
+                        frame,
+                        hand_lms,
+                        mp_hands.HAND_CONNECTIONS,
+                        mp_styles.get_default_hand_landmarks_style(),
+                        mp_styles.get_default_hand_connections_style(),
+                    )
+
+                with live.stats.timer("features"):
+                    x = landmarks_to_feature(hand_lms).reshape(1, -1)
+
+                # Prediction & margin (reused while the hand is stationary)
+                with live.stats.timer("classify"):
+                    (pred_idx, margin_val, conf_val), _ = gate.run(x, lambda: classify(x))
 
                 vote_buf.append(class_names[pred_idx])
 
@@ -134,6 +115,12 @@ def main():
                     if margin_val >= CONF_MARGIN:
                         pred_text = vote
 
+            if args.headless:
+                if pred_text != shown:
+                    print(f"frame {item.index}: {pred_text}")
+                    shown = pred_text
+                continue
+
             # UI overlay
             cv2.rectangle(frame, (0, 0), (w, 105), (0, 0, 0), -1)
             cv2.putText(
@@ -150,7 +137,7 @@ def main():
                 2,
             )
             cv2.putText(
-                frame, "Press 'Q' to quit", (10, h - 10),
+                frame, f"Press 'Q' to quit   skipped {gate.skip_fraction * 100:.0f}%", (10, h - 10),
                 cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1
             )
 
@@ -159,7 +146,8 @@ def main():
                 break
 
     cap.release()
-    cv2.destroyAllWindows()
+    if not args.headless:
+        cv2.destroyAllWindows()
 
 
 if __name__ == "__main__":
@@ -8,24 +8,18 @@ import joblib
 import mediapipe as mp
 import numpy as np
 
+from landmark_features import PALM_LANDMARKS, landmarks_to_subset_feature
+from live_pipeline import LivePipeline, add_source_args, open_source
+
 MODELS_DIR = Path("models")
 MODEL_PATH = MODELS_DIR / "r_cross_svm.joblib"
 CLASSES_PATH = MODELS_DIR / "r_cross_classes.json"
 
-PALM_LANDMARKS = [0, 5, 9, 13, 17]
 CROSS_LANDMARKS = [0, 5, 6, 7, 8, 9, 10, 11, 12, 13, 17]
 
 mp_hands = mp.solutions.hands
 
 
-def open_camera(index: int):
-    cap = cv2.VideoCapture(index, cv2.CAP_AVFOUNDATION)
-    if cap.isOpened():
-        return cap
-    cap.release()
-    return cv2.VideoCapture(index)
-
-
 def build_subset_connections(subset_indices):
     subset = set(subset_indices)
     return [(a, b) for a, b in mp_hands.HAND_CONNECTIONS if a in subset and b in subset]
@@ -47,21 +41,6 @@ def draw_feature_landmarks(frame, hand_landmarks, subset_indices, subset_connect
         cv2.circle(frame, (x, y), 4, color, -1)
 
 
-def extract_feature_subset(hand_landmarks, subset_indices):
-    pts = np.array([[lm.x, lm.y, lm.z] for lm in hand_landmarks.landmark], dtype=np.float32)
-    palm_center = pts[PALM_LANDMARKS].mean(axis=0, keepdims=True)
-    pts -= palm_center
-
-    palm_width = np.linalg.norm(pts[5] - pts[17])
-    if palm_width < 1e-6:
-        palm_width = np.linalg.norm(pts, axis=1).max()
-    if palm_width < 1e-6:
-        palm_width = 1.0
-    pts /= palm_width
-
-    return pts[subset_indices].flatten()
-
-
 def sigmoid(x: float) -> float:
     if x >= 0:
         z = np.exp(-x)
@@ -75,6 +54,22 @@ def softmax_np(x: np.ndarray) -> np.ndarray:
     return exps / np.sum(exps)
 
 
+def classify(clf, x: np.ndarray):
+    """x: (1, D) -> (pred_idx, probs, margin)"""
+    if hasattr(clf, "decision_function"):
+        dec = np.asarray(clf.decision_function(x))
+        if dec.ndim == 1:
+            score = float(dec[0])
+            probs = np.array([1.0 - sigmoid(score), sigmoid(score)], dtype=np.float32)
+            return int(score >= 0.0), probs, abs(score)
+        dec = dec.ravel()
+        top2 = np.sort(dec)[-2:]
+        return int(np.argmax(dec)), softmax_np(dec), float(top2[-1] - top2[-2])
+    probs = clf.predict_proba(x).ravel()
+    top2 = np.sort(probs)[-2:]
+    return int(np.argmax(probs)), probs, float(top2[-1] - top2[-2])
+
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--camera", type=int, default=0, help="Camera index")
@@ -87,6 +82,7 @@ def main():
     )
     ap.add_argument("--min-det", type=float, default=0.6, help="MediaPipe min_detection_confidence")
     ap.add_argument("--min-track", type=float, default=0.6, help="MediaPipe min_tracking_confidence")
+    add_source_args(ap)
     args = ap.parse_args()
 
     assert MODEL_PATH.exists() and CLASSES_PATH.exists(), (
@@ -100,33 +96,19 @@ def main():
     subset_connections = build_subset_connections(CROSS_LANDMARKS)
     vote_buf = deque(maxlen=max(1, args.window))
 
-    cap = open_camera(args.camera)
-    if not cap.isOpened():
-        raise RuntimeError(
-            f"Could not open webcam (index {args.camera}). "
-            "Try --camera 0..3 and check camera permissions."
-        )
+    cap = open_source(args.camera, args.video)
+    shown = None
 
     with mp_hands.Hands(
         model_complexity=1,
         max_num_hands=1,
         min_detection_confidence=args.min_det,
         min_tracking_confidence=args.min_track,
-    ) as hands:
-        while True:
-            ok, frame = cap.read()
-            if not ok:
-                print("[WARN] Empty frame from camera.")
-                break
-
-            frame = cv2.flip(frame, 1)
+    ) as hands, LivePipeline(cap, hands.process) as live:
+        for item in live:
+            frame, res = item.frame, item.result
             h, w = frame.shape[:2]
 
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            rgb.flags.writeable = False
-            res = hands.process(rgb)
-            rgb.flags.writeable = True
-
             stable_pred = "—"
             current_pred = "—"
             conf_val = 0.0
@@ -135,28 +117,13 @@ def main():
 
             if res.multi_hand_landmarks:
                 hand_lms = res.multi_hand_landmarks[0]
-                draw_feature_landmarks(frame, hand_lms, CROSS_LANDMARKS, subset_connections)
-
-                x = extract_feature_subset(hand_lms, CROSS_LANDMARKS).reshape(1, -1)
-
-                if hasattr(clf, "decision_function"):
-                    dec = np.asarray(clf.decision_function(x))
-                    if dec.ndim == 1:
-                        score = float(dec[0])
-                        probs = np.array([1.0 - sigmoid(score), sigmoid(score)], dtype=np.float32)
-                        pred_idx = int(score >= 0.0)
-                        margin_val = abs(score)
-                    else:
-                        dec = dec.ravel()
-                        probs = softmax_np(dec)
-                        pred_idx = int(np.argmax(dec))
-                        top2 = np.sort(dec)[-2:]
-                        margin_val = float(top2[-1] - top2[-2])
-                else:
-                    probs = clf.predict_proba(x).ravel()
-                    pred_idx = int(np.argmax(probs))
-                    top2 = np.sort(probs)[-2:]
-                    margin_val = float(top2[-1] - top2[-2])
+                if not args.headless:
+                    draw_feature_landmarks(frame, hand_lms, CROSS_LANDMARKS, subset_connections)
+
+                with live.stats.timer("features"):
+                    x = landmarks_to_subset_feature(hand_lms, CROSS_LANDMARKS).reshape(1, -1)
+                with live.stats.timer("classify"):
+                    pred_idx, probs, margin_val = classify(clf, x)
 
                 current_pred = class_names[pred_idx]
                 conf_val = float(probs[pred_idx])
@@ -167,6 +134,12 @@ def main():
                 if len(vote_buf) == vote_buf.maxlen and margin_val >= args.margin:
                     stable_pred = Counter(vote_buf).most_common(1)[0][0]
 
+            if args.headless:
+                if stable_pred != shown:
+                    print(f"frame {item.index}: {stable_pred}")
+                    shown = stable_pred
+                continue
+
             cv2.rectangle(frame, (0, 0), (w, 125), (0, 0, 0), -1)
             cv2.putText(
                 frame,
@@ -210,7 +183,8 @@ def main():
                 break
 
     cap.release()
-    cv2.destroyAllWindows()
+    if not args.headless:
+        cv2.destroyAllWindows()
 
 
 if __name__ == "__main__":
@@ -1,39 +1,126 @@
 import json
+import threading
 from pathlib import Path
 import numpy as np
 import torch
-from temporal_model import SignSeqModel
-from seq_utils import normalize_landmarks, pad_or_crop, to_tensor, softmax_np
+from temporal_model import build_seq_model
+from seq_utils import normalize_landmarks, pad_or_crop, softmax_np
+
+
+def labels_path_for(ckpt_path) -> Path:
+    """<name>_model.pt -> <name>_labels.json (train_temporal.py --name)."""
+    ckpt_path = Path(ckpt_path)
+    name = ckpt_path.stem[: -len("_model")] if ckpt_path.stem.endswith("_model") else ckpt_path.stem
+    return ckpt_path.with_name(f"{name}_labels.json")
+
+
+def checkpoint_meta(ckpt: dict, ckpt_path) -> dict:
+    """T, labels, num_classes, in_dim and model_cfg of a loaded train_temporal.py checkpoint."""
+    T = int(ckpt.get("T", 24))
+    labels = ckpt.get("labels", None)
+    meta_json = labels_path_for(Path(ckpt_path))
+    if meta_json.exists():
+        meta = json.loads(meta_json.read_text())
+        labels = meta.get("labels", labels)
+        T = meta.get("T", T)
+    num_classes = int(ckpt.get("num_classes", len(labels) if labels else 1))
+    cfg = ckpt.get("model_cfg", {"in_dim":63,"hidden":128,"layers":2,"bidirectional":True})
+    return {"T": T, "labels": labels, "num_classes": num_classes, "in_dim": cfg["in_dim"], "model_cfg": cfg}
+
+
+def build_model(ckpt: dict, meta: dict, device):
+    model = build_seq_model(meta["model_cfg"], meta["num_classes"])
+    model.load_state_dict(ckpt["state_dict"], strict=True)
+    return model.to(device).eval()
+
+
+def load_checkpoint(ckpt_path, device):
+    """Build the eval-mode model (LSTM or TCN, per model_cfg) from a train_temporal.py checkpoint -> (model, meta)."""
+    ckpt = torch.load(Path(ckpt_path), map_location=device)
+    meta = checkpoint_meta(ckpt, ckpt_path)
+    return build_model(ckpt, meta, device), meta
+
 
 class TemporalInfer:
-    def __init__(self, ckpt_path="models/seq_model.pt"):
+    def __init__(self, ckpt_path="models/seq_model.pt", backend=None):
+        """backend: inference_backends name ("torch", "torchscript", "onnx"); None reads the config."""
+        from inference_backends import create_engine
+
         self.ckpt_path = Path(ckpt_path)
-        dev = "cuda" if torch.cuda.is_available() else "cpu"
-        self.device = torch.device(dev)
-        ckpt = torch.load(self.ckpt_path, map_location=self.device)
-        self.T = int(ckpt.get("T", 24))
-        self.labels = ckpt.get("labels", None)
-        meta_json = self.ckpt_path.with_name("seq_labels.json")
-        if meta_json.exists():
-            meta = json.loads(meta_json.read_text())
-            self.labels = meta.get("labels", self.labels)
-            self.T = meta.get("T", self.T)
-        num_classes = int(ckpt.get("num_classes", len(self.labels) if self.labels else 1))
-        cfg = ckpt.get("model_cfg", {"in_dim":63,"hidden":128,"layers":2,"bidirectional":True})
-        self.model = SignSeqModel(in_dim=cfg["in_dim"], hidden=cfg["hidden"],
-                                  num_layers=cfg["layers"], num_classes=num_classes,
-                                  bidirectional=cfg.get("bidirectional", True))
-        self.model.load_state_dict(ckpt["state_dict"], strict=True)
-        self.model.to(self.device).eval()
-
-    @torch.no_grad()
+        self.engine = create_engine("sequence", backend, ckpt_path=self.ckpt_path)
+        self.backend = self.engine.name
+        self.T = self.engine.T
+        self.labels = self.engine.labels
+        self.in_dim = self.engine.in_dim
+        # Unidirectional LSTM and TCN checkpoints can be stepped frame by frame (sequence_sessions.py).
+        self.causal = not self.engine.bidirectional
+        self._step_model = None
+        self._step_lock = threading.Lock()
+        # Case-insensitive lookup for allowlists.
+        self.label_index = {str(lab).strip().upper(): i for i, lab in enumerate(self.labels or [])}
+
+    def prepare_batch(self, seqs) -> np.ndarray:
+        """Ragged list of [t_i, in_dim] raw sequences -> (N, T, in_dim) normalized float32 batch."""
+        X = np.empty((len(seqs), self.T, self.in_dim), dtype=np.float32)
+        for i, seq in enumerate(seqs):
+            seq = np.asarray(seq, dtype=np.float32)
+            if seq.ndim != 2 or seq.shape[0] == 0 or seq.shape[1] != self.in_dim:
+                raise ValueError(f"Expected [t,{self.in_dim}], got {list(seq.shape)}")
+            X[i] = pad_or_crop(seq, self.T)
+        # Normalization is per frame, so padding first and normalizing all N*T frames at once
+        # gives the same result as normalizing each sequence before pad_or_crop.
+        return normalize_landmarks(X.reshape(-1, self.in_dim)).reshape(X.shape)
+
+    def logits_batch(self, seqs) -> np.ndarray:
+        return self.engine.predict_batch(self.prepare_batch(seqs))
+
+    def logits(self, seq_np: np.ndarray) -> np.ndarray:
+        return self.logits_batch([seq_np])[0]
+
+    def predict_batch(self, seqs):
+        """One forward for a ragged list of sequences -> [{label, confidence, margin}] in input order."""
+        return self.results(self.logits_batch(seqs))
+
+    def results(self, logits: np.ndarray):
+        """(N, C) logits -> [{label, confidence, margin}]."""
+        z = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probs = z / z.sum(axis=1, keepdims=True)
+        top = probs.argmax(axis=1)
+        top_p = probs[np.arange(len(probs)), top]
+        top2 = np.partition(probs, -2, axis=1)[:, -2] if probs.shape[1] >= 2 else np.zeros(len(probs))
+        return [
+            {"label": self.labels[t] if (self.labels and t < len(self.labels)) else str(t),
+             "confidence": float(p), "margin": float(p - p2)}
+            for t, p, p2 in zip(top.tolist(), top_p, top2)
+        ]
+
     def predict(self, seq_np: np.ndarray):
-        seq_np = normalize_landmarks(seq_np)
-        seq_np = pad_or_crop(seq_np, self.T)
-        x = to_tensor(seq_np).to(self.device)
-        logits = self.model(x)[0].cpu().numpy()
-        probs = softmax_np(logits)
-        top = int(np.argmax(probs))
-        top2 = float(np.partition(probs, -2)[-2]) if probs.size >= 2 else 0.0
-        label = self.labels[top] if (self.labels and top < len(self.labels)) else str(top)
-        return {"label": label, "confidence": float(probs[top]), "margin": float(probs[top]-top2)}
+        return self.predict_batch([seq_np])[0]
+
+    def predict_topk(self, seq_np: np.ndarray, focus_labels=None, k: int = 10):
+        """Same response shape as WLASLDynamicPredictor.predict: {"top10": [{label, score}], "used_frames"}."""
+        logits = self.logits(seq_np)
+        index = np.arange(logits.shape[0])
+        if focus_labels:
+            keys = [lab.strip().upper() for lab in focus_labels if lab]
+            allowed = sorted({self.label_index[key] for key in keys if key in self.label_index})
+            if allowed:  # unknown labels only: fall back to the full head, like /predict_dynamic
+                index = np.asarray(allowed)
+        probs = softmax_np(logits[index])
+        order = np.argsort(-probs, kind="stable")[:k]
+        top = [{"label": self.labels[index[j]] if self.labels else str(index[j]), "score": float(probs[j])}
+               for j in order]
+        return {"top10": top, "used_frames": self.T}
+
+    def step(self, frames: np.ndarray, state=None):
+        """Causal models: run already-normalized [t, in_dim] frames on from `state` -> (logits, state)."""
+        if not self.causal:
+            raise RuntimeError("step() needs a causal checkpoint (train_temporal.py --arch tcn, or without --bidirectional)")
+        with self._step_lock:
+            if self._step_model is None:
+                # The eager module on CPU: exported backends don't expose the recurrent/conv state.
+                self._step_model, _ = load_checkpoint(self.ckpt_path, torch.device("cpu"))
+        with torch.no_grad():
+            x = torch.from_numpy(np.ascontiguousarray(frames, dtype=np.float32))[None]
+            logits, state = self._step_model.step(x, state)
+        return logits[0].numpy(), state
@@ -7,8 +7,11 @@ import joblib
 import mediapipe as mp
 import numpy as np
 
+from landmark_features import landmarks_to_array, normalize_palm
+from live_pipeline import LivePipeline, add_source_args, open_source
+from motion_gate import MotionGate
+
 MODELS_DIR = Path("models")
-PALM_LANDMARKS = [0, 5, 9, 13, 17]
 
 CHECK_CONFIGS = [
     {
@@ -50,14 +53,6 @@ mp_drawing = mp.solutions.drawing_utils
 mp_styles = mp.solutions.drawing_styles
 
 
-def open_camera(index: int):
-    cap = cv2.VideoCapture(index, cv2.CAP_AVFOUNDATION)
-    if cap.isOpened():
-        return cap
-    cap.release()
-    return cv2.VideoCapture(index)
-
-
 def build_subset_connections(subset_indices):
     subset = set(subset_indices)
     return [(a, b) for a, b in mp_hands.HAND_CONNECTIONS if a in subset and b in subset]
@@ -78,21 +73,6 @@ def draw_subset_highlight(frame, hand_landmarks, subset_indices, subset_connecti
         cv2.circle(frame, (x, y), 5, (0, 60, 255), -1)
 
 
-def extract_subset_feature(hand_landmarks, subset_indices):
-    pts = np.array([[lm.x, lm.y, lm.z] for lm in hand_landmarks.landmark], dtype=np.float32)
-    palm_center = pts[PALM_LANDMARKS].mean(axis=0, keepdims=True)
-    pts -= palm_center
-
-    palm_width = np.linalg.norm(pts[5] - pts[17])
-    if palm_width < 1e-6:
-        palm_width = np.linalg.norm(pts, axis=1).max()
-    if palm_width < 1e-6:
-        palm_width = 1.0
-    pts /= palm_width
-
-    return pts[subset_indices].flatten()
-
-
 def sigmoid(x: float) -> float:
     if x >= 0:
         z = np.exp(-x)
@@ -183,43 +163,50 @@ def predict_binary_check(model, class_names, x):
     return pred_label, margin, present_score
 
 
+def run_checks(checks, pts, mini_margin):
+    """pts: palm-normalized (21, 3) hand. Returns (details, failing_check) with failing_check=None when every check passes."""
+    details = []
+    failing_check = None
+    for check in checks:
+        x = pts[check["landmarks"]].reshape(1, -1)
+        pred_label, margin, present_score = predict_binary_check(
+            check["model"], check["classes"], x
+        )
+        passed = pred_label == "present" and margin >= mini_margin
+        details.append(f"{check['id']}:{'ok' if passed else 'x'}")
+        if not passed and failing_check is None:
+            failing_check = check
+    return details, failing_check
+
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--camera", type=int, default=0, help="Camera index")
     ap.add_argument("--mini-margin", type=float, default=0.1, help="Mini-check margin threshold")
     ap.add_argument("--min-det", type=float, default=0.6, help="MediaPipe min_detection_confidence")
     ap.add_argument("--min-track", type=float, default=0.6, help="MediaPipe min_tracking_confidence")
+    ap.add_argument("--gate-threshold", type=float, default=0.04,
+                    help="Reuse the last check results while landmarks move less than this (palm widths, 0 = off)")
+    ap.add_argument("--gate-max-stale", type=int, default=10, help="Re-run the checks after this many reused frames")
+    add_source_args(ap)
     args = ap.parse_args()
 
     checks = load_checks()
+    gate = MotionGate(args.gate_threshold, args.gate_max_stale)
 
-    cap = open_camera(args.camera)
-    if not cap.isOpened():
-        raise RuntimeError(
-            f"Could not open webcam (index {args.camera}). "
-            "Try --camera 0..3 and check camera permissions."
-        )
+    cap = open_source(args.camera, args.video)
+    shown = None
 
     with mp_hands.Hands(
         model_complexity=1,
         max_num_hands=1,
         min_detection_confidence=args.min_det,
         min_tracking_confidence=args.min_track,
-    ) as hands:
-        while True:
-            ok, frame = cap.read()
-            if not ok:
-                print("[WARN] Empty frame from camera.")
-                break
-
-            frame = cv2.flip(frame, 1)
+    ) as hands, LivePipeline(cap, hands.process) as live:
+        for item in live:
+            frame, res = item.frame, item.result
             h, w = frame.shape[:2]
 
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            rgb.flags.writeable = False
-            res = hands.process(rgb)
-            rgb.flags.writeable = True
-
             status_text = "No hand detected"
             stage_text = "-"
             fix_text = "Show one hand clearly in frame."
@@ -228,28 +215,24 @@ def main():
 
             if res.multi_hand_landmarks:
                 hand_lms = res.multi_hand_landmarks[0]
-                mp_drawing.draw_landmarks(
-                    frame,
-                    hand_lms,
-                    mp_hands.HAND_CONNECTIONS,
-                    mp_styles.get_default_hand_landmarks_style(),
-                    mp_styles.get_default_hand_connections_style(),
-                )
-
-                details = []
-
-                for check in checks:
-                    x = extract_subset_feature(hand_lms, check["landmarks"]).reshape(1, -1)
-                    pred_label, margin, present_score = predict_binary_check(
-                        check["model"], check["classes"], x
+                if not args.headless:
+                    mp_drawing.draw_landmarks(
+                        frame,
+                        hand_lms,
+                        mp_hands.HAND_CONNECTIONS,
+                        mp_styles.get_default_hand_landmarks_style(),
+                        mp_styles.get_default_hand_connections_style(),
                     )
-                    passed = pred_label == "present" and margin >= args.mini_margin
-                    details.append(f"{check['id']}:{'ok' if passed else 'x'}")
 
-                    if not passed and failing_check is None:
-                        failing_check = check
-                        stage_text = check["label"]
-                        fix_text = check["fix"]
+                with live.stats.timer("features"):
+                    pts = normalize_palm(landmarks_to_array(hand_lms))  # once per frame, shared by every check
+                with live.stats.timer("classify"):
+                    (details, failing_check), _ = gate.run(
+                        pts.reshape(-1), lambda: run_checks(checks, pts, args.mini_margin)
+                    )
+                if failing_check is not None:
+                    stage_text = failing_check["label"]
+                    fix_text = failing_check["fix"]
 
                 details_text = " ".join(details)
 
@@ -259,12 +242,19 @@ def main():
                     fix_text = "Good job. Hold steady."
                 else:
                     status_text = "R needs correction"
-                    draw_subset_highlight(
-                        frame,
-                        hand_lms,
-                        failing_check["landmarks"],
-                        failing_check["connections"],
-                    )
+                    if not args.headless:
+                        draw_subset_highlight(
+                            frame,
+                            hand_lms,
+                            failing_check["landmarks"],
+                            failing_check["connections"],
+                        )
+
+            if args.headless:
+                if (status_text, stage_text) != shown:
+                    print(f"frame {item.index}: {status_text} | {stage_text} | {details_text}")
+                    shown = (status_text, stage_text)
+                continue
 
             cv2.rectangle(frame, (0, 0), (w, 135), (0, 0, 0), -1)
             cv2.putText(
@@ -318,7 +308,8 @@ def main():
                 break
 
     cap.release()
-    cv2.destroyAllWindows()
+    if not args.headless:
+        cv2.destroyAllWindows()
 
 
 if __name__ == "__main__":
@@ -7,8 +7,9 @@ import joblib
 import mediapipe as mp
 import numpy as np
 
+from landmark_features import landmarks_to_array, normalize_palm
+
 MODELS_DIR = Path("models")
-PALM_LANDMARKS = [0, 5, 9, 13, 17]
 
 CHECK_CONFIGS = [
     {
@@ -78,21 +79,6 @@ def draw_subset_highlight(frame, hand_landmarks, subset_indices, subset_connecti
         cv2.circle(frame, (x, y), 5, (0, 60, 255), -1)
 
 
-def extract_subset_feature(hand_landmarks, subset_indices):
-    pts = np.array([[lm.x, lm.y, lm.z] for lm in hand_landmarks.landmark], dtype=np.float32)
-    palm_center = pts[PALM_LANDMARKS].mean(axis=0, keepdims=True)
-    pts -= palm_center
-
-    palm_width = np.linalg.norm(pts[5] - pts[17])
-    if palm_width < 1e-6:
-        palm_width = np.linalg.norm(pts, axis=1).max()
-    if palm_width < 1e-6:
-        palm_width = 1.0
-    pts /= palm_width
-
-    return pts[subset_indices].flatten()
-
-
 def sigmoid(x: float) -> float:
     if x >= 0:
         z = np.exp(-x)
@@ -231,8 +217,9 @@ def main():
                 )
 
                 details = []
+                pts = normalize_palm(landmarks_to_array(hand_lms))  # once per frame, shared by every check
                 for check in checks:
-                    x = extract_subset_feature(hand_lms, check["landmarks"]).reshape(1, -1)
+                    x = pts[check["landmarks"]].reshape(1, -1)
                     pred_label, margin, present_score = predict_binary_check(
                         check["model"], check["classes"], x
                     )
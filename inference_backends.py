@@ -0,0 +1,340 @@
+# inference_backends.py
+"""
+Pluggable inference engines for the static, sequence and dynamic models.
+
+An engine wraps one model artifact behind a common interface:
+
+    engine = create_engine("sequence", "onnx", ckpt_path="models/seq_model.pt")
+    engine.warmup()
+    logits = engine.predict_batch(X)     # batched numpy in, numpy scores out
+    engine.describe()
+
+Inputs per kind:
+    static    (N, 63) normalized landmarks            -> (N, C) decision scores / probabilities
+    sequence  (N, T, in_dim) normalized sequences     -> (N, C) logits
+    dynamic   (N, T, 224, 224, 3) uint8 clips         -> (N, C) logits (max over time)
+
+The backend for each kind comes from INFERENCE_BACKENDS (e.g.
+"sequence=onnx,dynamic=torchscript"), else models/backends.json, else
+DEFAULT_BACKENDS. Label handling (allowlists, top-k, label names) stays in the
+route-level wrappers, so switching backends needs no route changes:
+TemporalInfer and WLASLDynamicPredictor only call predict_batch, and the
+static engines build the StaticScorer the static routes use (engine.scorer),
+whose allowlist subsets score only the listed classes of the folded matrix.
+See bench_backends.py for latency and agreement across backends.
+"""
+import importlib.util
+import io
+import json
+import os
+import warnings
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Type
+
+import numpy as np
+
+MODELS_DIR = Path("models")
+BACKENDS_CONFIG = MODELS_DIR / "backends.json"
+DEFAULT_BACKENDS = {"static": "numpy", "sequence": "torch", "dynamic": "torch"}
+
+BACKENDS: Dict[str, Dict[str, Type["InferenceEngine"]]] = {}
+
+
+def register_backend(kind: str, name: str):
+    def deco(cls):
+        cls.kind = kind
+        cls.name = name
+        BACKENDS.setdefault(kind, {})[name] = cls
+        return cls
+    return deco
+
+
+def available_backends(kind: str) -> List[str]:
+    """Registered backends for `kind` whose optional dependencies are installed."""
+    return [name for name, cls in BACKENDS.get(kind, {}).items() if cls.available()]
+
+
+def backend_for(kind: str) -> str:
+    env = os.environ.get("INFERENCE_BACKENDS", "")
+    for item in env.split(","):
+        k, _, v = item.partition("=")
+        if k.strip() == kind and v.strip():
+            return v.strip()
+    if BACKENDS_CONFIG.exists():
+        cfg = json.loads(BACKENDS_CONFIG.read_text())
+        if cfg.get(kind):
+            return cfg[kind]
+    return DEFAULT_BACKENDS[kind]
+
+
+def create_engine(kind: str, backend: Optional[str] = None, **spec) -> "InferenceEngine":
+    backend = backend or backend_for(kind)
+    cls = BACKENDS.get(kind, {}).get(backend)
+    if cls is None:
+        raise RuntimeError(f"Unknown {kind} backend '{backend}'. Registered: {sorted(BACKENDS.get(kind, {}))}")
+    if not cls.available():
+        raise RuntimeError(f"{kind} backend '{backend}' needs {', '.join(cls.requires)} (not installed).")
+    return cls(**spec).load()
+
+
+class InferenceEngine:
+    kind = ""
+    name = ""
+    requires: Tuple[str, ...] = ()
+
+    @classmethod
+    def available(cls) -> bool:
+        return all(importlib.util.find_spec(m) is not None for m in cls.requires)
+
+    def load(self) -> "InferenceEngine":
+        return self
+
+    def example_input(self, n: int = 1) -> np.ndarray:
+        raise NotImplementedError
+
+    def predict_batch(self, X: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def warmup(self):
+        self.predict_batch(self.example_input(1))
+
+    def describe(self) -> dict:
+        return {"kind": self.kind, "backend": self.name}
+
+
+# ---------------------------
+# Static letters (sklearn artifacts)
+# ---------------------------
+class _StaticEngine(InferenceEngine):
+    fold = True
+
+    def __init__(self, clf, class_names):
+        self.clf = clf
+        self.class_names = list(class_names)
+
+    def load(self):
+        from static_scorer import StaticScorer
+
+        self.scorer = StaticScorer(self.clf, self.class_names, fold=self.fold)
+        if self.fold and self.scorer.kind != "linear":
+            raise RuntimeError(f"{type(self.clf).__name__} is not a foldable linear model; use the sklearn backend.")
+        return self
+
+    def example_input(self, n: int = 1) -> np.ndarray:
+        return np.zeros((n, 63), dtype=np.float32)
+
+    def predict_batch(self, X: np.ndarray) -> np.ndarray:
+        return self.scorer.scores(X)
+
+
+@register_backend("static", "numpy")
+class NumpyStaticEngine(_StaticEngine):
+    """StandardScaler + linear head folded into one matmul (see static_scorer.py)."""
+    requires = ("sklearn",)
+    fold = True
+
+
+@register_backend("static", "sklearn")
+class SklearnStaticEngine(_StaticEngine):
+    requires = ("sklearn",)
+    fold = False
+
+
+# ---------------------------
+# Landmark sequences (train_temporal.py checkpoints)
+# ---------------------------
+class _SequenceEngine(InferenceEngine):
+    requires = ("torch",)
+
+    def __init__(self, ckpt_path="models/seq_model.pt"):
+        self.ckpt_path = Path(ckpt_path)
+
+    def load(self):
+        import torch
+        from infer_temporal import checkpoint_meta
+
+        self._torch = torch
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self._ckpt = torch.load(self.ckpt_path, map_location=self.device)
+        meta = checkpoint_meta(self._ckpt, self.ckpt_path)
+        self._meta = meta
+        self.T = meta["T"]
+        self.labels = meta["labels"]
+        self.in_dim = meta["in_dim"]
+        self.num_classes = meta["num_classes"]
+        self.model_cfg = meta["model_cfg"]
+        self.bidirectional = self.model_cfg.get("arch", "lstm") == "lstm" and self.model_cfg.get("bidirectional", True)
+        self.model = None
+        self.artifact = None  # exported file the engine runs, if any
+        self.compile()
+        self._ckpt = None
+        return self
+
+    def eager(self):
+        """The eager model (SignSeqModel / SignTCNModel); exported backends only build it when no artifact exists."""
+        from infer_temporal import build_model
+
+        return build_model(self._ckpt, self._meta, self.device)
+
+    def compile(self):
+        self.model = self.eager()
+
+    def sibling(self, suffix: str) -> Optional[Path]:
+        """Exported artifact next to the checkpoint, if it is at least as new."""
+        path = self.ckpt_path.with_suffix(suffix)
+        if path.exists() and path.stat().st_mtime >= self.ckpt_path.stat().st_mtime:
+            return path
+        return None
+
+    def example_input(self, n: int = 1) -> np.ndarray:
+        return np.zeros((n, self.T, self.in_dim), dtype=np.float32)
+
+    def predict_batch(self, X: np.ndarray) -> np.ndarray:
+        with self._torch.no_grad():
+            x = self._torch.from_numpy(np.ascontiguousarray(X, dtype=np.float32)).to(self.device)
+            return self.model(x).cpu().numpy()
+
+    def describe(self) -> dict:
+        return {**super().describe(), "checkpoint": str(self.ckpt_path), "T": self.T,
+                "artifact": str(self.artifact) if self.artifact else None}
+
+
+@register_backend("sequence", "torch")
+class TorchSequenceEngine(_SequenceEngine):
+    pass
+
+
+@register_backend("sequence", "torch-int8")
+class Int8SequenceEngine(_SequenceEngine):
+    """Dynamic int8 LSTM/Linear on CPU; loads seq_model.int8.pt when present (quantize_models.py), else quantizes on load."""
+
+    def compile(self):
+        from quantize_models import int8_path_for, load_quantized_sequence, quantize_sequence_model
+
+        self.device = self._torch.device("cpu")  # quantized kernels are CPU-only
+        path = int8_path_for(self.ckpt_path)
+        if path.exists() and path.stat().st_mtime >= self.ckpt_path.stat().st_mtime:
+            self.model = load_quantized_sequence(path, self._meta)
+            self.artifact = path
+            return
+        self.model = quantize_sequence_model(self.eager())
+
+
+@register_backend("sequence", "torchscript")
+class TorchScriptSequenceEngine(_SequenceEngine):
+    """Loads models/seq_model.ts when present (export_temporal.py), else traces and freezes the checkpoint."""
+
+    def compile(self):
+        torch = self._torch
+        path = self.sibling(".ts")
+        if path is not None:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", FutureWarning)  # torch.jit deprecation notice
+                self.model = torch.jit.load(str(path), map_location=self.device).eval()
+            self.artifact = path
+            return
+        self.model = trace_sequence_model(self.eager(), self.T, self.in_dim, self.device)
+
+
+def trace_sequence_model(model, T: int, in_dim: int, device="cpu"):
+    """Trace + freeze a sequence model; the batch dimension stays dynamic."""
+    import torch
+
+    with torch.no_grad(), warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # tracer warnings about the LSTM's batch_first/shape checks
+        example = torch.zeros(1, T, in_dim, device=device)
+        return torch.jit.freeze(torch.jit.trace(model, example))
+
+
+def export_sequence_onnx(model, T: int, in_dim: int, f):
+    """Export a sequence model to ONNX with a dynamic batch axis (f: path or file-like)."""
+    import torch
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        torch.onnx.export(
+            model, torch.zeros(1, T, in_dim), f,
+            input_names=["x"], output_names=["logits"],
+            dynamic_axes={"x": {0: "batch"}, "logits": {0: "batch"}},
+            opset_version=17, dynamo=False,
+        )
+
+
+@register_backend("sequence", "onnx")
+class OnnxSequenceEngine(_SequenceEngine):
+    """ONNX Runtime on CPU; uses models/seq_model.onnx when present (export_temporal.py), else exports in memory."""
+    requires = ("torch", "onnxruntime")
+
+    def compile(self):
+        import onnxruntime as ort
+
+        path = self.sibling(".onnx")
+        if path is not None:
+            source = str(path)
+            self.artifact = path
+        else:
+            buf = io.BytesIO()
+            export_sequence_onnx(self.eager().cpu(), self.T, self.in_dim, buf)
+            source = buf.getvalue()
+        self.session = ort.InferenceSession(source, providers=["CPUExecutionProvider"])
+
+    def predict_batch(self, X: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {"x": np.ascontiguousarray(X, dtype=np.float32)})[0]
+
+
+# ---------------------------
+# Dynamic signs (I3D / WLASL)
+# ---------------------------
+class _DynamicEngine(InferenceEngine):
+    requires = ("torch",)
+
+    def __init__(self, weights_path: Optional[Path], num_classes: int = 100):
+        self.weights_path = weights_path
+        self.num_classes = num_classes
+
+    def load(self):
+        import torch
+        from wlasl_dynamic import load_i3d
+
+        self._torch = torch
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.model = load_i3d(self.weights_path, self.num_classes, self.device)
+        self.compile()
+        return self
+
+    def compile(self):
+        pass
+
+    def example_input(self, n: int = 1) -> np.ndarray:
+        from wlasl_dynamic import CLIP_FRAMES, CLIP_SIZE
+
+        return np.zeros((n, CLIP_FRAMES, CLIP_SIZE, CLIP_SIZE, 3), dtype=np.uint8)
+
+    def to_tensor(self, clips: np.ndarray):
+        """(N, T, H, W, 3) uint8 -> (N, 3, T, H, W) float in [-1, 1]."""
+        x = (clips.astype(np.float32) / 255.0) * 2 - 1
+        return self._torch.from_numpy(x).permute(0, 4, 1, 2, 3).to(self.device)
+
+    def predict_batch(self, X: np.ndarray) -> np.ndarray:
+        with self._torch.no_grad():
+            out = self.model(self.to_tensor(X))
+            out = self._torch.max(out, dim=2)[0] if out.shape[2] > 1 else out.squeeze(2)
+            return out.cpu().numpy()
+
+    def describe(self) -> dict:
+        return {**super().describe(), "weights": str(self.weights_path) if self.weights_path else "random-init"}
+
+
+@register_backend("dynamic", "torch")
+class TorchDynamicEngine(_DynamicEngine):
+    pass
+
+
+@register_backend("dynamic", "torchscript")
+class TorchScriptDynamicEngine(_DynamicEngine):
+    def compile(self):
+        torch = self._torch
+        with torch.no_grad(), warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            example = self.to_tensor(self.example_input(1))
+            self.model = torch.jit.freeze(torch.jit.trace(self.model, example))
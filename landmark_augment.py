@@ -0,0 +1,178 @@
+# landmark_augment.py
+"""
+Vectorized augmentation of whole landmark batches (numpy, no per-sample loops).
+
+Accepted shapes: (B, 63) / (B, 21, 3) static features, or (B, T, 63) /
+(B, T, 126) sequences (two-hand rows are [left 63 | right 63], an absent hand
+is all zeros and stays zero). Per sample:
+
+    rotate     random 3D rotation about each hand's wrist (uniform +-rotate_deg per axis)
+    scale      per-axis proportions x (1 + N(0, axis_scale)); hand size x U(scale) only
+               with normalize=None, since "max" and "middle_mcp" rescale it away
+    noise      N(0, noise) jitter per landmark (and per frame)
+    mirror     with prob mirror_p: flip x about the wrist; two-hand rows also swap slots
+    time warp  sequences only: resample frames on a random monotonic time grid
+
+and the result is re-normalized the way the model's inputs are:
+"max" (train.py / samples.csv: wrist-centred, max distance 1), "middle_mcp"
+(seq_utils.normalize_landmarks) or None, using landmark_features.
+
+    aug = LandmarkAugment(normalize="middle_mcp", seed=0)
+    Xb = aug(Xb)                       # (B, T, D) float32 in, same shape out
+
+AugmentCollate runs it on each collated batch inside DataLoader workers, so it
+overlaps with training. python landmark_augment.py --bench prints samples/s.
+"""
+import argparse
+import os
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+from landmark_features import normalize_middle_mcp, normalize_wrist_max
+
+
+def _rotations(rng: np.random.Generator, n: int, max_deg: float) -> np.ndarray:
+    """(n, 3, 3) rotation matrices Rz @ Ry @ Rx with angles uniform in +-max_deg."""
+    a = np.deg2rad(rng.uniform(-max_deg, max_deg, size=(n, 3)))
+    c, s = np.cos(a), np.sin(a)
+    one, zero = np.ones(n), np.zeros(n)
+    rx = np.stack([one, zero, zero, zero, c[:, 0], -s[:, 0], zero, s[:, 0], c[:, 0]], 1).reshape(n, 3, 3)
+    ry = np.stack([c[:, 1], zero, s[:, 1], zero, one, zero, -s[:, 1], zero, c[:, 1]], 1).reshape(n, 3, 3)
+    rz = np.stack([c[:, 2], -s[:, 2], zero, s[:, 2], c[:, 2], zero, zero, zero, one], 1).reshape(n, 3, 3)
+    return rz @ ry @ rx
+
+
+class LandmarkAugment:
+    def __init__(self, rotate_deg: float = 15.0, scale: Tuple[float, float] = (0.85, 1.15),
+                 axis_scale: float = 0.05, noise: float = 0.01, mirror_p: float = 0.0,
+                 time_warp: float = 0.3, normalize: Optional[str] = "middle_mcp", seed: Optional[int] = None):
+        if normalize not in ("max", "middle_mcp", None):
+            raise ValueError(f"normalize must be 'max', 'middle_mcp' or None, got {normalize!r}")
+        self.rotate_deg = rotate_deg
+        self.scale = scale
+        self.axis_scale = axis_scale
+        self.noise = noise
+        self.mirror_p = mirror_p
+        self.time_warp = time_warp
+        self.normalize = normalize
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
+    def reseed(self, seed: int):
+        self.rng = np.random.default_rng(seed)
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        shape = X.shape
+        if X.ndim == 3 and shape[1:] == (21, 3):  # (B, 21, 3) static
+            pts = X[:, None, None]
+        elif X.ndim == 2 and shape[1] == 63:  # (B, 63) static
+            pts = X.reshape(shape[0], 1, 1, 21, 3)
+        elif X.ndim == 3 and shape[2] % 63 == 0:  # (B, T, 63 * hands)
+            pts = X.reshape(shape[0], shape[1], shape[2] // 63, 21, 3)
+        else:
+            raise ValueError(f"Expected (B,63), (B,21,3) or (B,T,63*k) landmarks, got {shape}")
+        return self.apply(pts).reshape(shape)
+
+    def apply(self, pts: np.ndarray) -> np.ndarray:
+        """(B, T, H, 21, 3) -> augmented copy of the same shape."""
+        rng = self.rng
+        B, T, H = pts.shape[:3]
+        present = np.abs(pts).reshape(B, T, H, -1).max(axis=-1) > 0  # (B, T, H)
+        wrist = pts[:, :, :, 0:1, :]
+        out = pts - wrist
+
+        if self.time_warp > 0 and T > 1:
+            out, wrist, present = self._time_warp(rng, out, wrist, present)
+
+        # Rotation, size and proportions in one (B, 3, 3) matrix per sample.
+        M = np.eye(3, dtype=np.float32)[None].repeat(B, 0)
+        if self.rotate_deg > 0:
+            M = _rotations(rng, B, self.rotate_deg).astype(np.float32)
+        s = 1 + rng.normal(0, self.axis_scale, size=(B, 3))
+        if self.normalize is None:  # both normalizations are scale-invariant
+            s = s * rng.uniform(*self.scale, size=(B, 1))
+        M = M * s.astype(np.float32)[:, None, :]
+        mirror = rng.random(B) < self.mirror_p
+        M[mirror, :, 0] *= -1  # x -> -x before rotating
+        out = out @ M.transpose(0, 2, 1)[:, None, None]  # row vectors: p' = M p
+
+        if self.noise > 0:
+            out = out + self.noise * rng.standard_normal(size=out.shape, dtype=np.float32)
+        out = out + wrist
+        if mirror.any() and H == 2:
+            out[mirror] = out[mirror][:, :, ::-1]  # a mirrored left hand is a right hand
+            present[mirror] = present[mirror][:, :, ::-1]
+        out = np.where(present[..., None, None], out, 0.0).astype(np.float32)
+
+        if self.normalize == "max":
+            out = normalize_wrist_max(out)  # absent (all-zero) hands stay zero
+        elif self.normalize == "middle_mcp":
+            out = normalize_middle_mcp(out)
+        return out
+
+    def _time_warp(self, rng, out, wrist, present):
+        """Resample on grid (t / (T-1)) ** gamma * (T-1), gamma = exp(U(-w, w)): speeds one end up, slows the other."""
+        B, T = out.shape[:2]
+        gamma = np.exp(rng.uniform(-self.time_warp, self.time_warp, size=(B, 1)))
+        grid = (np.linspace(0, 1, T)[None] ** gamma) * (T - 1)  # (B, T), monotonic, ends fixed
+        i0 = np.minimum(np.floor(grid).astype(np.int64), T - 2)
+        frac = (grid - i0).astype(np.float32)[:, :, None, None, None]
+        b = np.arange(B)[:, None]
+
+        def lerp(a):
+            return a[b, i0] * (1 - frac) + a[b, i0 + 1] * frac
+
+        # A hand is present only if both neighbouring frames have it (no blending with zeros).
+        return lerp(out), lerp(wrist), present[b, i0] & present[b, i0 + 1]
+
+
+class AugmentCollate:
+    """collate_fn: default collate, then augment the whole batch (runs in the DataLoader worker)."""
+
+    def __init__(self, augment: LandmarkAugment):
+        self.augment = augment
+        self._pid = None
+
+    def __call__(self, batch):
+        import torch
+        from torch.utils.data import default_collate
+
+        if self._pid != os.getpid():  # forked workers start with the same RNG state; reseed per process
+            self._pid = os.getpid()
+            self.augment.reseed(torch.initial_seed() % 2**32)
+        x, y = default_collate(batch)
+        return torch.from_numpy(self.augment(x.numpy())), y
+
+
+def bench(batch: int, T: int, dims, seconds: float = 2.0):
+    rng = np.random.default_rng(0)
+    for label, shape, norm in [("static", (batch * T, 63), "max")] + [
+            (f"seq {d}", (batch, T, d), "middle_mcp") for d in dims]:
+        aug = LandmarkAugment(normalize=norm, mirror_p=0.5, seed=0)
+        X = rng.normal(0, 0.3, size=shape).astype(np.float32)
+        aug(X)
+        n, t0 = 0, time.perf_counter()
+        while time.perf_counter() - t0 < seconds:
+            aug(X)
+            n += shape[0]
+        dt = time.perf_counter() - t0
+        unit = "frames" if label == "static" else "sequences"
+        print(f"{label:<8} {str(shape):<16} {n / dt:12.0f} {unit}/s   {1000 * dt * shape[0] / n:7.3f} ms/batch")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Landmark batch augmentation throughput")
+    ap.add_argument("--bench", action="store_true")
+    ap.add_argument("--batch", type=int, default=64)
+    ap.add_argument("--T", type=int, default=24)
+    args = ap.parse_args()
+    if not args.bench:
+        ap.error("nothing to do (try --bench)")
+    bench(args.batch, args.T, (63, 126))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+# landmark_features.py
+"""
+MediaPipe hand landmarks -> model features, shared by the collectors, the
+live scripts, the trainers and the server.
+
+Conversion:
+    landmarks_to_array(hand_landmarks)       one proto -> (21, 3) float32
+    hands_to_array(multi_hand_landmarks)     list of protos -> (N, 21, 3)
+
+Normalizations, batched over (..., 21, 3) arrays:
+    normalize_wrist_max   wrist-centred, max landmark distance 1
+                          (static letter models: collect_data.py / samples.csv, infer.py, server)
+    normalize_palm        centred on the palm landmarks, scaled by palm width
+                          (R mini-models: collect_data_mini.py, infer_r_*, infer_with_feedback_r*)
+    normalize_middle_mcp  wrist-centred, wrist -> middle MCP distance 1
+                          (sequence models: seq_utils.normalize_landmarks)
+
+Each one reproduces the per-script code it replaced bit for bit, so models
+trained on features from the old code see identical inputs.
+python landmark_features.py --check verifies that against the old
+implementations; --bench prints per-frame vs batched timings.
+"""
+import argparse
+import itertools
+import time
+from operator import attrgetter
+
+import numpy as np
+
+WRIST = 0
+INDEX_MCP = 5
+MIDDLE_MCP = 9
+PINKY_MCP = 17
+PALM_LANDMARKS = [0, 5, 9, 13, 17]
+
+_xyz = attrgetter("x", "y", "z")
+
+
+# ---------------------------
+# Proto -> array
+# ---------------------------
+def landmarks_to_array(hand_landmarks) -> np.ndarray:
+    """MediaPipe NormalizedLandmarkList -> (21, 3) float32 [x, y, z]."""
+    flat = itertools.chain.from_iterable(map(_xyz, hand_landmarks.landmark))
+    return np.fromiter(flat, dtype=np.float32, count=63).reshape(21, 3)
+
+
+def hands_to_array(multi_hand_landmarks) -> np.ndarray:
+    """results.multi_hand_landmarks -> (N, 21, 3) float32 (N = 0 when no hand was found)."""
+    hands = multi_hand_landmarks or []
+    flat = itertools.chain.from_iterable(itertools.chain.from_iterable(map(_xyz, h.landmark) for h in hands))
+    return np.fromiter(flat, dtype=np.float32, count=63 * len(hands)).reshape(len(hands), 21, 3)
+
+
+# ---------------------------
+# Normalizations over (..., 21, 3)
+# ---------------------------
+def normalize_wrist_max(pts: np.ndarray, eps: float = 1e-6) -> np.ndarray:
+    """Wrist-centred, divided by the largest wrist distance (1 if the hand is degenerate)."""
+    pts = np.asarray(pts, dtype=np.float32)
+    centered = pts - pts[..., WRIST:WRIST + 1, :]
+    scale = np.linalg.norm(centered, axis=-1).max(axis=-1, keepdims=True)
+    scale[scale < eps] = 1.0
+    centered /= scale[..., None]
+    return centered
+
+
+def normalize_palm(pts: np.ndarray, eps: float = 1e-6) -> np.ndarray:
+    """Centred on the mean palm landmark, divided by the index MCP - pinky MCP distance
+    (falling back to the largest distance from the palm centre, then 1)."""
+    pts = np.asarray(pts, dtype=np.float32)
+    palm = np.add.reduce(pts[..., PALM_LANDMARKS, :], axis=-2, keepdims=True) / np.float32(len(PALM_LANDMARKS))
+    centered = pts - palm
+    d = centered[..., INDEX_MCP, :] - centered[..., PINKY_MCP, :]
+    # d @ d goes through the same dot product as np.linalg.norm on one vector, so widths match it exactly.
+    width = np.sqrt((d[..., None, :] @ d[..., :, None])[..., 0])
+    small = width < eps
+    if small.any():
+        width[small] = np.linalg.norm(centered, axis=-1).max(axis=-1, keepdims=True)[small]
+        width[width < eps] = 1.0
+    centered /= width[..., None]
+    return centered
+
+
+def normalize_middle_mcp(pts: np.ndarray, eps: float = 1e-6) -> np.ndarray:
+    """Wrist-centred, divided by the wrist -> middle MCP distance (at least eps; all-zero hands stay zero).
+    Keeps the input dtype."""
+    centered = pts - pts[..., WRIST:WRIST + 1, :]
+    scale = np.linalg.norm(centered[..., MIDDLE_MCP, :], axis=-1, keepdims=True)
+    return centered / np.maximum(scale, eps)[..., None, :]
+
+
+# ---------------------------
+# Model features
+# ---------------------------
+def static_features(pts: np.ndarray) -> np.ndarray:
+    """(..., 21, 3) raw landmarks -> (..., 63) static letter-model features."""
+    pts = np.asarray(pts)
+    return normalize_wrist_max(pts).reshape(*pts.shape[:-2], 63)
+
+
+def subset_features(pts: np.ndarray, subset) -> np.ndarray:
+    """(..., 21, 3) raw landmarks -> (..., 3 * len(subset)) palm-normalized features of the subset landmarks."""
+    pts = np.asarray(pts)
+    return normalize_palm(pts)[..., subset, :].reshape(*pts.shape[:-2], 3 * len(subset))
+
+
+def landmarks_to_feature(hand_landmarks) -> np.ndarray:
+    """One MediaPipe hand -> 63-D static feature."""
+    return static_features(landmarks_to_array(hand_landmarks))
+
+
+def landmarks_to_subset_feature(hand_landmarks, subset) -> np.ndarray:
+    """One MediaPipe hand -> palm-normalized features of the subset landmarks."""
+    return subset_features(landmarks_to_array(hand_landmarks), subset)
+
+
+# ---------------------------
+# Self-check against the implementations these replace
+# ---------------------------
+def _old_wrist_max(hand_landmarks):
+    # infer.py / collect_data.py landmarks_to_feature (server.py landmarks_to_feature_np on arrays)
+    pts = np.array([[lm.x, lm.y, lm.z] for lm in hand_landmarks.landmark], dtype=np.float32)
+    wrist = pts[0].copy()
+    pts -= wrist
+    scale = np.linalg.norm(pts, axis=1).max()
+    if scale < 1e-6:
+        scale = 1.0
+    pts /= scale
+    return pts.flatten()
+
+
+def _old_palm(hand_landmarks, subset_indices):
+    # collect_data_mini.py / infer_r_*.py extract_feature_subset, infer_with_feedback_r*.py extract_subset_feature
+    pts = np.array([[lm.x, lm.y, lm.z] for lm in hand_landmarks.landmark], dtype=np.float32)
+    palm_center = pts[PALM_LANDMARKS].mean(axis=0, keepdims=True)
+    pts -= palm_center
+    palm_width = np.linalg.norm(pts[5] - pts[17])
+    if palm_width < 1e-6:
+        palm_width = np.linalg.norm(pts, axis=1).max()
+    if palm_width < 1e-6:
+        palm_width = 1.0
+    pts /= palm_width
+    return pts[subset_indices].flatten()
+
+
+def _old_middle_mcp(seq, eps=1e-6):
+    # seq_utils.normalize_landmarks
+    T, D = seq.shape
+    xyz = seq.reshape(T, D // 3 // 21, 21, 3)
+    centered = xyz - xyz[:, :, 0:1, :]
+    scale = np.maximum(np.linalg.norm(centered[:, :, 9, :], axis=-1, keepdims=True), eps)
+    return (centered / scale[:, :, None, :]).reshape(T, D)
+
+
+def _fake_hands(n: int, seed: int = 0):
+    """Random hands as (N, 21, 3) float32 plus lookalike protos, with degenerate cases mixed in."""
+    from types import SimpleNamespace
+
+    rng = np.random.default_rng(seed)
+    raw = rng.uniform(0, 1, size=(n, 21, 3)) * rng.choice([1e-4, 0.2, 1.0, 30.0], size=(n, 1, 1))
+    raw[0::17] = raw[0::17, :1]  # every landmark on the wrist
+    raw[1::19, PINKY_MCP] = raw[1::19, INDEX_MCP]  # zero palm width
+    raw[2::23] = 0
+    protos = [SimpleNamespace(landmark=[SimpleNamespace(x=float(x), y=float(y), z=float(z)) for x, y, z in hand])
+              for hand in raw]
+    return raw.astype(np.float32), protos
+
+
+def check(n: int = 5000) -> bool:
+    pts, protos = _fake_hands(n)
+    subset = [0, 4, 5, 8, 12, 16, 20]
+    seq = pts[: (n // 2) * 2].reshape(-1, 126)
+    results = {
+        "landmarks_to_array": np.array_equal(hands_to_array(protos), pts)
+        and all(np.array_equal(landmarks_to_array(p), x) for p, x in zip(protos, pts)),
+        "normalize_wrist_max": np.array_equal(static_features(pts), np.stack([_old_wrist_max(p) for p in protos]))
+        and all(np.array_equal(landmarks_to_feature(p), _old_wrist_max(p)) for p in protos[:500]),
+        "normalize_palm": np.array_equal(subset_features(pts, subset),
+                                         np.stack([_old_palm(p, subset) for p in protos]))
+        and all(np.array_equal(landmarks_to_subset_feature(p, subset), _old_palm(p, subset)) for p in protos[:500]),
+        "normalize_middle_mcp": np.array_equal(
+            normalize_middle_mcp(seq.reshape(-1, 2, 21, 3)).reshape(seq.shape), _old_middle_mcp(seq))
+        and np.array_equal(normalize_middle_mcp(pts.astype(np.float64)).reshape(n, 63),
+                           _old_middle_mcp(pts.reshape(n, 63).astype(np.float64))),
+    }
+    for name, ok in results.items():
+        print(f"{name:<22} {'identical' if ok else 'MISMATCH'}")
+    return all(results.values())
+
+
+def bench(n: int = 2000):
+    pts, protos = _fake_hands(n)
+    subset = [0, 4, 5, 8, 12, 16, 20]
+    rows = [
+        ("proto -> wrist/max", lambda: [_old_wrist_max(p) for p in protos], lambda: [landmarks_to_feature(p) for p in protos]),
+        ("proto -> palm", lambda: [_old_palm(p, subset) for p in protos],
+         lambda: [landmarks_to_subset_feature(p, subset) for p in protos]),
+        ("batch wrist/max", lambda: [_old_wrist_max(p) for p in protos], lambda: static_features(pts)),
+        ("batch palm", lambda: [_old_palm(p, subset) for p in protos], lambda: subset_features(pts, subset)),
+    ]
+    print(f"{'':<20} {'old us/hand':>12} {'new us/hand':>12}")
+    for label, old, new in rows:
+        times = []
+        for fn in (old, new):
+            fn()
+            best = float("inf")
+            for _ in range(5):
+                t0 = time.perf_counter()
+                fn()
+                best = min(best, time.perf_counter() - t0)
+            times.append(1e6 * best / n)
+        print(f"{label:<20} {times[0]:12.2f} {times[1]:12.2f}   ({times[0] / times[1]:.1f}x)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Landmark feature library self-check and benchmark")
+    ap.add_argument("--check", action="store_true", help="Compare against the per-script implementations")
+    ap.add_argument("--bench", action="store_true")
+    args = ap.parse_args()
+    if not (args.check or args.bench):
+        ap.error("nothing to do (--check / --bench)")
+    if args.check and not check():
+        raise SystemExit(1)
+    if args.bench:
+        bench()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+# landmark_store.py
+"""
+Columnar, memory-mapped store of raw MediaPipe hand landmarks, the master
+copy that every static / mini-model feature set is derived from.
+
+    <store>/
+      meta.json          committed row count, label and session names
+      landmarks.f32      (N, 21, 3) float32 raw landmarks (the collectors' flipped selfie frame)
+      label.i32          (N,) index into meta["labels"]
+      session.i32        (N,) index into meta["sessions"]
+      handedness.i8      (N,) 0 = Left, 1 = Right, -1 = unknown (MediaPipe's label)
+      views/<name>.f32   cached feature views, (N, D) float32, plus <name>.json
+
+Columns are append-only. meta.json is the commit point: rows are written to
+the column files first and become visible when meta.json is replaced, so a
+crash leaves at most an uncommitted tail, which the next append cuts off.
+
+Feature views are computed on first use with landmark_features, so they are
+bit for bit what the collectors would have written to their CSVs, and cached
+under views/. Later calls memory-map the cache and only compute rows added
+since it was written:
+
+    store = LandmarkStore("data/store/letters")
+    X = store.features("wrist_max")                      # == samples.csv features
+    X = store.features("palm", [0, 5, 6, 7, 8, 9, 10])   # == a samples_r_*.csv subset
+    y = store.labels
+
+collect_data.py and collect_data_mini.py append to a store by default
+(StoreWriter, on a background thread); train.py --store and
+train_r_mini_js.py --store read from one.
+python landmark_store.py DIR prints a summary, --bench times views vs CSV.
+"""
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+from landmark_features import normalize_middle_mcp, normalize_palm, normalize_wrist_max
+from sample_writer import BackgroundWriter
+
+FORMAT = "sgsl-landmarks-1"
+HANDEDNESS = ["Left", "Right"]
+NORMALIZATIONS = {
+    "wrist_max": normalize_wrist_max,    # static letter models (samples.csv)
+    "palm": normalize_palm,              # R mini-models (samples_r_*.csv)
+    "middle_mcp": normalize_middle_mcp,  # sequence models
+    "raw": None,
+}
+_COLUMNS = {  # name -> (dtype, per-row shape)
+    "landmarks": (np.float32, (21, 3)),
+    "label": (np.int32, ()),
+    "session": (np.int32, ()),
+    "handedness": (np.int8, ()),
+}
+_SUFFIX = {np.float32: ".f32", np.int32: ".i32", np.int8: ".i8"}
+_VIEW_CHUNK = 65536
+
+
+def new_session(prefix: str) -> str:
+    return f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}"
+
+
+def view_name(normalize: str, subset: Optional[Sequence[int]] = None) -> str:
+    return normalize + ("" if subset is None else "-" + ".".join(str(i) for i in subset))
+
+
+class LandmarkStore:
+    def __init__(self, root: Path, create: bool = False):
+        self.root = Path(root)
+        self._files = {}
+        self._pending = 0  # appended rows not yet committed
+        meta_path = self.root / "meta.json"
+        if meta_path.exists():
+            with open(meta_path) as f:
+                self.meta = json.load(f)
+            if self.meta.get("format") != FORMAT:
+                raise RuntimeError(f"{self.root} is not a landmark store ({FORMAT})")
+        elif create:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self.meta = {"format": FORMAT, "count": 0, "labels": [], "sessions": []}
+        else:
+            raise RuntimeError(f"No landmark store at {self.root} (collect_data.py / collect_data_mini.py create one)")
+
+    def __len__(self) -> int:
+        return self.meta["count"]
+
+    def _path(self, column: str) -> Path:
+        return self.root / (column + _SUFFIX[_COLUMNS[column][0]])
+
+    def column(self, name: str) -> np.ndarray:
+        """Committed rows of a column, memory-mapped read-only."""
+        dtype, shape = _COLUMNS[name]
+        if not len(self):
+            return np.zeros((0, *shape), dtype=dtype)
+        return np.memmap(self._path(name), dtype=dtype, mode="r", shape=(len(self), *shape))
+
+    # Columns -----------------------------------------------------------------
+    @property
+    def landmarks(self) -> np.ndarray:
+        return self.column("landmarks")
+
+    @property
+    def labels(self) -> np.ndarray:
+        return np.asarray(self.meta["labels"], dtype=str)[self.column("label")] if len(self) else np.zeros(0, str)
+
+    @property
+    def sessions(self) -> np.ndarray:
+        return np.asarray(self.meta["sessions"], dtype=str)[self.column("session")] if len(self) else np.zeros(0, str)
+
+    @property
+    def handedness(self) -> np.ndarray:
+        return self.column("handedness")
+
+    def select(self, labels=None, sessions=None, handedness: Optional[str] = None) -> np.ndarray:
+        """Boolean row mask; each given filter must match."""
+        mask = np.ones(len(self), dtype=bool)
+        if labels is not None:
+            mask &= np.isin(self.labels, list(labels))
+        if sessions is not None:
+            mask &= np.isin(self.sessions, list(sessions))
+        if handedness is not None:
+            mask &= self.handedness == HANDEDNESS.index(handedness)
+        return mask
+
+    # Appending -----------------------------------------------------------------
+    @staticmethod
+    def _index(names: list, name: str) -> int:
+        if name not in names:
+            names.append(name)
+        return names.index(name)
+
+    def append(self, pts: np.ndarray, labels, session: str, handedness=None, commit: bool = True) -> int:
+        """Add (n, 21, 3) raw landmarks with one label each (or one for all); returns the row count."""
+        pts = np.ascontiguousarray(pts, dtype=np.float32).reshape(-1, 21, 3)
+        n = len(pts)
+        labels = [labels] * n if isinstance(labels, str) else list(labels)
+        hands = handedness if isinstance(handedness, (list, tuple)) else [handedness] * n
+        if len(labels) != n or len(hands) != n:
+            raise ValueError(f"{n} rows but {len(labels)} labels / {len(hands)} handedness values")
+        if not self._files:
+            self._open_columns()
+        rows = {
+            "landmarks": pts,
+            "label": np.array([self._index(self.meta["labels"], l) for l in labels], dtype=np.int32),
+            "session": np.full(n, self._index(self.meta["sessions"], session), dtype=np.int32),
+            "handedness": np.array([HANDEDNESS.index(h) if h in HANDEDNESS else -1 for h in hands], dtype=np.int8),
+        }
+        for name, arr in rows.items():
+            self._files[name].write(arr.tobytes())
+        self._pending += n
+        if commit:
+            self.commit()
+        return len(self) + self._pending
+
+    def _open_columns(self):
+        """Open the column files for appending, cutting any uncommitted tail first."""
+        for name, (dtype, shape) in _COLUMNS.items():
+            path = self._path(name)
+            size = len(self) * np.dtype(dtype).itemsize * int(np.prod(shape))
+            if path.exists() and path.stat().st_size > size:
+                os.truncate(path, size)
+            self._files[name] = open(path, "ab")
+        self._pending = 0
+
+    def commit(self):
+        """Make appended rows visible: fsync the columns, then replace meta.json."""
+        if not self._pending:
+            return
+        for f in self._files.values():
+            f.flush()
+            os.fsync(f.fileno())
+        meta = {**self.meta, "count": len(self) + self._pending}
+        tmp = self.root / "meta.json.tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.root / "meta.json")
+        self.meta = meta
+        self._pending = 0
+
+    def close(self):
+        self.commit()
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+    # Feature views -----------------------------------------------------------
+    def features(self, normalize: str = "wrist_max", subset: Optional[Sequence[int]] = None) -> np.ndarray:
+        """(N, 3 * len(subset or 21)) float32 view, materialized on first use and cached under views/."""
+        if normalize not in NORMALIZATIONS:
+            raise ValueError(f"normalize must be one of {sorted(NORMALIZATIONS)}, got {normalize!r}")
+        idx = list(range(21)) if subset is None else [int(i) for i in subset]
+        dim = 3 * len(idx)
+        name = view_name(normalize, None if subset is None else idx)
+        data_path = self.root / "views" / f"{name}.f32"
+        info_path = data_path.with_suffix(".json")
+
+        done = 0
+        if info_path.exists() and data_path.exists():
+            with open(info_path) as f:
+                done = min(json.load(f)["count"], len(self))
+        if done < len(self):
+            data_path.parent.mkdir(exist_ok=True)
+            with open(data_path, "r+b" if data_path.exists() else "wb") as f:
+                f.truncate(done * dim * 4)
+                f.seek(done * dim * 4)
+                fn, raw = NORMALIZATIONS[normalize], self.landmarks
+                for start in range(done, len(self), _VIEW_CHUNK):
+                    pts = np.asarray(raw[start:start + _VIEW_CHUNK])
+                    out = fn(pts) if fn else pts
+                    f.write(np.ascontiguousarray(out[:, idx], dtype=np.float32).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            tmp = info_path.with_name(info_path.name + ".tmp")
+            with open(tmp, "w") as f:
+                json.dump({"count": len(self), "dim": dim, "normalize": normalize, "subset": None if subset is None else idx}, f)
+            os.replace(tmp, info_path)
+        if not len(self):
+            return np.zeros((0, dim), dtype=np.float32)
+        return np.memmap(data_path, dtype=np.float32, mode="r", shape=(len(self), dim))
+
+    def summary(self) -> str:
+        lines = [f"{self.root}: {len(self)} hands, {len(self.meta['sessions'])} sessions"]
+        if len(self):
+            names, counts = np.unique(self.labels, return_counts=True)
+            lines.append("  labels: " + ", ".join(f"{n}={c}" for n, c in zip(names, counts)))
+            hand_counts = np.bincount(self.handedness.astype(np.int64) + 1, minlength=3)
+            lines.append(f"  handedness: Left={hand_counts[1]} Right={hand_counts[2]} unknown={hand_counts[0]}")
+        views = sorted(p.stem for p in (self.root / "views").glob("*.f32"))
+        lines.append("  cached views: " + (", ".join(views) if views else "none"))
+        return "\n".join(lines)
+
+
+# ---------------------------
+# Collector side
+# ---------------------------
+class StoreWriter(BackgroundWriter):
+    """Appends hands to a store on a background thread; rows are committed every flush_seconds."""
+
+    def __init__(self, root: Path, session: str, flush_seconds: float = 1.0, max_queue: int = 100_000):
+        self.store = LandmarkStore(root, create=True)
+        self.session = session
+        super().__init__(f"store-writer-{self.store.root.name}", flush_seconds, max_queue)
+
+    def write(self, label: str, pts: np.ndarray, handedness: Optional[str] = None):
+        """Queue one (21, 3) raw hand (called on the camera loop; never blocks)."""
+        self._offer((label, np.array(pts, dtype=np.float32), handedness))
+
+    def _write_batch(self, items) -> int:
+        labels, pts, hands = zip(*items)
+        self.store.append(np.stack(pts), list(labels), self.session, list(hands), commit=False)
+        return len(items)
+
+    def _flush(self):
+        self.store.commit()
+
+    def _close_file(self):
+        self.store.close()
+
+    def describe(self) -> str:
+        return (f"[store] {self.store.root}: +{self.written} hands in session {self.session} "
+                f"({len(self.store)} total), {self.dropped} dropped")
+
+
+def add_store_args(ap, default: Path, help: str = "Also append the raw landmarks to this landmark store"):
+    ap.add_argument("--store", type=Path, default=default, help=f"{help} (default: {default})")
+    ap.add_argument("--no-store", action="store_true", help="Do not keep raw landmarks")
+
+
+def handedness_label(res, i: int = 0) -> Optional[str]:
+    """MediaPipe's "Left" / "Right" for hand i of a Hands result, if present."""
+    hands = getattr(res, "multi_handedness", None)
+    return hands[i].classification[0].label if hands and len(hands) > i else None
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+def bench(n: int = 100_000):
+    """Load the static 63-D features: CSV parse vs first materialization vs cached view."""
+    import tempfile
+
+    from landmark_features import _fake_hands, static_features
+
+    pts, _ = _fake_hands(200)
+    pts = np.tile(pts, (n // len(pts), 1, 1))
+    with tempfile.TemporaryDirectory() as d:
+        csv_path = Path(d) / "samples.csv"
+        X = static_features(pts)
+        with open(csv_path, "w") as f:
+            f.write(",".join(["label"] + [f"f{i}" for i in range(63)]) + "\n")
+            np.savetxt(f, X, fmt="A," + ",".join(["%.6f"] * 63))
+        store = LandmarkStore(Path(d) / "store", create=True)
+        store.append(pts, "A", "bench")
+        rows = []
+        t0 = time.perf_counter()
+        np.genfromtxt(csv_path, delimiter=",", dtype=str)[1:, 1:].astype(np.float32)
+        rows.append(("CSV (np.genfromtxt)", time.perf_counter() - t0))
+        t0 = time.perf_counter()
+        np.array(store.features("wrist_max"))
+        rows.append(("view, first use", time.perf_counter() - t0))
+        t0 = time.perf_counter()
+        V = np.array(LandmarkStore(store.root).features("wrist_max"))  # read into memory
+        rows.append(("view, cached", time.perf_counter() - t0))
+        assert np.array_equal(V, X)
+        for label, s in rows:
+            print(f"{label:<22} {1000 * s:9.1f} ms   ({n / s:12.0f} rows/s)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Raw landmark store summary and benchmark")
+    ap.add_argument("store", type=Path, nargs="*", help="Store directories to summarize")
+    ap.add_argument("--bench", action="store_true")
+    args = ap.parse_args()
+    if not (args.store or args.bench):
+        ap.error("nothing to do (give store directories or --bench)")
+    for root in args.store:
+        print(LandmarkStore(root).summary())
+    if args.bench:
+        bench()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+# live_pipeline.py
+"""
+Threaded camera -> MediaPipe -> consumer pipeline for the live scripts.
+
+    capture thread    source.read() as fast as the camera delivers
+          |  FrameQueue (latest frame wins)
+    landmark thread   flip, BGR -> RGB, hands.process()
+          |  FrameQueue (latest frame wins)
+    main thread       the script's loop: classify / collect, draw, imshow, waitKey
+
+Each queue holds at most `queue_size` items. When a stage falls behind, the
+oldest waiting frame is dropped (and counted), so a MediaPipe stall never
+blocks the camera and the consumer always works on the freshest frame.
+OpenCV windows stay on the main thread, as macOS requires.
+
+Sources (open_source): a webcam, a video file or a directory of frames
+(--camera / --video, see add_source_args). Recorded sources never drop
+frames; every stage waits instead, so a replay processes every frame and
+its timings are reproducible. With --headless the scripts skip drawing and
+windows, which lets them run on a machine without a display.
+
+    src = open_source(args.camera, args.video)
+    with mp_hands.Hands(...) as hands, LivePipeline(src, hands.process) as live:
+        for item in live:           # LiveFrame: .frame (BGR, flipped), .result, .index
+            with live.stats.timer("classify"):
+                ...
+            if quit:
+                break
+
+On exit the pipeline prints overall FPS and, per stage (capture, mediapipe,
+plus any timer the script adds), FPS, mean / p95 latency and dropped frames,
+then the capture -> consumer-done latency.
+"""
+import collections
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional
+
+import cv2
+
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+# ---------------------------
+# Sources
+# ---------------------------
+def open_camera(index: int):
+    """Try AVFoundation first on macOS, fall back to the default backend."""
+    cap = cv2.VideoCapture(index, cv2.CAP_AVFOUNDATION)
+    if cap.isOpened():
+        return cap
+    cap.release()
+    return cv2.VideoCapture(index)
+
+
+class FrameDirSource:
+    """The image files of a directory, in name order, read like a capture."""
+
+    def __init__(self, directory: Path):
+        self.paths = sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+        self._next = 0
+
+    def isOpened(self) -> bool:
+        return bool(self.paths)
+
+    def read(self):
+        while self._next < len(self.paths):
+            frame = cv2.imread(str(self.paths[self._next]))
+            self._next += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def release(self):
+        self._next = len(self.paths)
+
+
+class InputSource:
+    def __init__(self, cap, name: str, live: bool):
+        self.cap = cap
+        self.name = name
+        self.live = live  # a camera: drop stale frames rather than fall behind
+
+    def read(self):
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+
+def open_source(camera: int = 0, video: Optional[Path] = None) -> InputSource:
+    """A video file or frame directory if `video` is set, else the webcam."""
+    if video:
+        path = Path(video)
+        cap = FrameDirSource(path) if path.is_dir() else cv2.VideoCapture(str(path))
+        if not cap.isOpened():
+            raise RuntimeError(f"Could not open {path} (expected a video file or a directory of images).")
+        return InputSource(cap, str(path), live=False)
+    cap = open_camera(camera)
+    if not cap.isOpened():
+        raise RuntimeError(
+            f"Could not open webcam (index {camera}). "
+            "Try --camera 0..3 and check camera permissions."
+        )
+    return InputSource(cap, f"camera {camera}", live=True)
+
+
+def add_source_args(ap):
+    ap.add_argument("--video", type=Path, default=None,
+                    help="Read this video file or directory of frames instead of the webcam")
+    ap.add_argument("--headless", action="store_true",
+                    help="No drawing or windows; run until the input ends (Ctrl+C for a webcam)")
+
+
+# ---------------------------
+# Queue
+# ---------------------------
+class FrameQueue:
+    """Bounded handoff between two stages. drop_oldest=True: put never blocks and replaces the oldest item."""
+
+    def __init__(self, maxsize: int = 1, drop_oldest: bool = True):
+        self._items = collections.deque()
+        self._maxsize = max(1, maxsize)
+        self._drop_oldest = drop_oldest
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item) -> bool:
+        """False if the queue was closed (the receiving stage is gone)."""
+        with self._cond:
+            while not self._drop_oldest and len(self._items) >= self._maxsize and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return False
+            if len(self._items) >= self._maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify_all()
+            return True
+
+    def get(self):
+        """Next item, or None once the queue is closed and empty."""
+        with self._cond:
+            while not self._items and not self._closed:
+                self._cond.wait()
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+# ---------------------------
+# Stats
+# ---------------------------
+class StageStats:
+    def __init__(self, window: int = 2000):
+        self.count = 0
+        self.total_s = 0.0
+        self.recent = collections.deque(maxlen=window)  # for p95
+        self.first_t: Optional[float] = None
+        self.last_t = 0.0
+
+    def add(self, seconds: float, now: float):
+        if self.first_t is None:
+            self.first_t = now
+        self.last_t = now
+        self.count += 1
+        self.total_s += seconds
+        self.recent.append(seconds)
+
+    @property
+    def fps(self) -> float:
+        span = self.last_t - (self.first_t or 0.0)
+        return (self.count - 1) / span if self.count > 1 and span > 0 else 0.0
+
+    @property
+    def mean_ms(self) -> float:
+        return 1000 * self.total_s / self.count if self.count else 0.0
+
+    @property
+    def p95_ms(self) -> float:
+        if len(self.recent) < 2:
+            return self.mean_ms
+        return 1000 * statistics.quantiles(self.recent, n=20)[-1]
+
+
+class PipelineStats:
+    """Thread-safe named stage timings, reported in first-recorded order (the `last` names at the end)."""
+
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float):
+        now = time.perf_counter()
+        with self._lock:
+            self.stages.setdefault(stage, StageStats()).add(seconds, now)
+
+    @contextmanager
+    def timer(self, stage: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - t0)
+
+    def report(self, dropped: Optional[dict] = None, last=("consumer", "end-to-end")) -> str:
+        dropped = dropped or {}
+        lines = [f"{'stage':<12} {'frames':>7} {'fps':>7} {'mean ms':>8} {'p95 ms':>8} {'dropped':>8}"]
+        with self._lock:
+            for name, s in sorted(self.stages.items(), key=lambda kv: kv[0] in last and last.index(kv[0]) + 1):
+                drop = str(dropped[name]) if name in dropped else ""
+                lines.append(f"{name:<12} {s.count:>7} {s.fps:>7.1f} {s.mean_ms:>8.2f} {s.p95_ms:>8.2f} {drop:>8}")
+        return "\n".join(lines)
+
+
+# ---------------------------
+# Pipeline
+# ---------------------------
+class LiveFrame:
+    def __init__(self, index: int, frame, t_capture: float):
+        self.index = index  # capture counter (gaps = frames dropped upstream)
+        self.frame = frame  # BGR, flipped if the pipeline flips
+        self.result = None  # landmarker output (MediaPipe results)
+        self.t_capture = t_capture
+
+
+class LivePipeline:
+    def __init__(self, cap, landmarker: Callable, flip: bool = True, queue_size: int = 1,
+                 drop_frames: Optional[bool] = None, report: bool = True):
+        """
+        cap:         InputSource, or any object with read() -> (ok, frame) such as cv2.VideoCapture
+        landmarker:  called with the RGB frame (read-only), e.g. hands.process
+        flip:        mirror frames horizontally before landmarking (the scripts' selfie view)
+        drop_frames: latest-frame-wins queues; False makes every stage wait instead.
+                     Default: drop for live sources only.
+        """
+        if drop_frames is None:
+            drop_frames = getattr(cap, "live", True)
+        self.cap = cap
+        self.name = getattr(cap, "name", "camera")
+        self.live = drop_frames
+        self.landmarker = landmarker
+        self.flip = flip
+        self.report_on_exit = report
+        self.stats = PipelineStats()
+        self._to_landmarks = FrameQueue(queue_size, drop_oldest=drop_frames)
+        self._to_consumer = FrameQueue(queue_size, drop_oldest=drop_frames)
+        self._stop = threading.Event()
+        self._threads = []
+        self._error: Optional[BaseException] = None
+        self.t_start = 0.0
+        self.t_end = 0.0
+
+    # Stages ------------------------------------------------------------------
+    def _capture(self):
+        index = 0
+        try:
+            while not self._stop.is_set():
+                t0 = time.perf_counter()
+                ok, frame = self.cap.read()
+                if not ok:
+                    if self.live and not self._stop.is_set():
+                        print("[WARN] Empty frame from camera.")
+                    break
+                now = time.perf_counter()
+                self.stats.record("capture", now - t0)
+                if not self._to_landmarks.put(LiveFrame(index, frame, now)):
+                    break
+                index += 1
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._to_landmarks.close()
+
+    def _landmarks(self):
+        try:
+            while True:
+                item = self._to_landmarks.get()
+                if item is None:
+                    break
+                with self.stats.timer("mediapipe"):
+                    if self.flip:
+                        item.frame = cv2.flip(item.frame, 1)
+                    rgb = cv2.cvtColor(item.frame, cv2.COLOR_BGR2RGB)
+                    rgb.flags.writeable = False
+                    item.result = self.landmarker(rgb)
+                if not self._to_consumer.put(item):
+                    break
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._to_landmarks.close()
+            self._to_consumer.close()
+
+    # Control -----------------------------------------------------------------
+    def start(self) -> "LivePipeline":
+        self.t_start = time.perf_counter()
+        for name, target in (("live-capture", self._capture), ("live-landmarks", self._landmarks)):
+            t = threading.Thread(target=target, name=name, daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        self._to_consumer.close()
+        self._to_landmarks.close()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+        if not self.t_end:
+            self.t_end = time.perf_counter()
+
+    def __iter__(self):
+        while True:
+            item = self._to_consumer.get()
+            if item is None:
+                break
+            t0 = time.perf_counter()
+            yield item
+            now = time.perf_counter()
+            self.stats.record("consumer", now - t0)
+            self.stats.record("end-to-end", now - item.t_capture)
+        self.t_end = time.perf_counter()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> "LivePipeline":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        if self.report_on_exit:
+            print(self.report())
+        return exc_type is KeyboardInterrupt  # Ctrl+C ends a headless run like the input running out
+
+    # Reporting ---------------------------------------------------------------
+    @property
+    def dropped(self) -> dict:
+        """Frames that never reached a stage, keyed by the stage that skipped them."""
+        return {"mediapipe": self._to_landmarks.dropped, "consumer": self._to_consumer.dropped}
+
+    def report(self) -> str:
+        seconds = (self.t_end or time.perf_counter()) - self.t_start
+        done = self.stats.stages.get("consumer")
+        frames = done.count if done else 0
+        head = f"[live] {self.name}: {frames} frames in {seconds:.1f} s ({frames / max(seconds, 1e-9):.1f} fps)"
+        return head + "\n" + self.stats.report(self.dropped)
@@ -0,0 +1,278 @@
+# model_registry.py
+"""
+Versioned model slots with background reload and atomic swap.
+
+Each slot owns a loader (paths -> model object) and an optional warmup
+callable. A reload builds and warms the new model on a background thread and
+only then rebinds the slot's active version, so requests that already fetched
+the previous model finish on it untouched.
+
+A replaced version that has close() (sockets, shared memory) is closed once
+the requests holding it through lease() are done; models with close() must
+be used through lease(), not get().
+"""
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+def artifact_fingerprint(paths: Sequence[Path]) -> tuple:
+    """Cheap change detector: (name, mtime_ns, size) per artifact, None if missing."""
+    out = []
+    for p in paths:
+        try:
+            st = p.stat()
+            out.append((p.name, st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            out.append((p.name, None, None))
+    return tuple(out)
+
+
+def artifact_version(paths: Sequence[Path]) -> str:
+    """Short content hash over all existing artifacts (stable across restarts)."""
+    h = hashlib.sha1()
+    for p in paths:
+        if not p.exists():
+            continue
+        h.update(p.name.encode())
+        with open(p, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()[:12]
+
+
+class ModelVersion:
+    def __init__(self, model: Any, version: str, fingerprint: tuple, load_seconds: float):
+        self.model = model
+        self.version = version
+        self.fingerprint = fingerprint
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+        self.leases = 0  # requests currently using this version (ModelSlot.lease)
+        self.retired = False  # replaced by a newer version; closed when leases drops to 0
+
+    def close(self):
+        if hasattr(self.model, "close"):
+            try:
+                self.model.close()
+            except Exception as e:
+                print(f"[registry] failed to close retired model {self.version}: {e}")
+
+
+class ModelSlot:
+    def __init__(
+        self,
+        name: str,
+        paths: Sequence[Path],
+        loader: Callable[[], Any],
+        warmup: Optional[Callable[[Any], None]] = None,
+        lazy: bool = False,
+        version: Optional[Callable[[Any], str]] = None,
+    ):
+        self.name = name
+        self.paths = [Path(p) for p in paths]
+        self.loader = loader
+        self.warmup = warmup
+        self.lazy = lazy
+        self.version_of = version  # model -> version string; default: hash of the artifacts
+        self.active: Optional[ModelVersion] = None
+        self.last_error: Optional[str] = None
+        self.reloading = False
+        self.failed_fingerprint: Optional[tuple] = None
+        self._lock = threading.Lock()        # guards active/reloading
+        self._load_lock = threading.RLock()  # one build at a time per slot
+
+    def _build(self) -> ModelVersion:
+        fingerprint = artifact_fingerprint(self.paths)
+        t0 = time.perf_counter()
+        model = self.loader()
+        if self.warmup is not None:
+            self.warmup(model)
+        return ModelVersion(
+            model=model,
+            version=self.version_of(model) if self.version_of else artifact_version(self.paths),
+            fingerprint=fingerprint,
+            load_seconds=time.perf_counter() - t0,
+        )
+
+    def load(self) -> ModelVersion:
+        """Build, warm up and swap in a new version (blocking)."""
+        with self._load_lock:
+            try:
+                new = self._build()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                self.failed_fingerprint = artifact_fingerprint(self.paths)
+                raise
+            with self._lock:
+                old, self.active = self.active, new
+                self.last_error = None
+                close_old = old is not None and old.leases == 0
+                if old is not None:
+                    old.retired = True
+            if close_old:
+                old.close()
+            return new
+
+    def current(self) -> ModelVersion:
+        """The active version, loading on first use; read model and version from it, not from the slot twice."""
+        current = self.active
+        if current is None:
+            with self._load_lock:
+                current = self.active or self.load()
+        return current
+
+    def get(self) -> Any:
+        return self.current().model
+
+    @contextmanager
+    def lease(self):
+        """get() for the duration of a with-block: a hot reload closes the old version only after it."""
+        self.get()  # loads on first use
+        with self._lock:
+            current = self.active
+            current.leases += 1
+        try:
+            yield current.model
+        finally:
+            with self._lock:
+                current.leases -= 1
+                close = current.retired and current.leases == 0
+            if close:
+                current.close()
+
+    def is_stale(self, settle_seconds: float = 0.0) -> bool:
+        """
+        True when artifacts on disk differ from the served version. Files touched
+        within `settle_seconds` are ignored so a half-written artifact is never loaded,
+        and a fingerprint that already failed to load is not retried.
+        """
+        current = self.active
+        if current is None:
+            return False
+        fingerprint = artifact_fingerprint(self.paths)
+        if fingerprint == current.fingerprint or fingerprint == self.failed_fingerprint:
+            return False
+        newest = max((m for _, m, _ in fingerprint if m is not None), default=0)
+        return (time.time_ns() - newest) / 1e9 >= settle_seconds
+
+    def describe(self) -> dict:
+        current = self.active
+        return {
+            "loaded": current is not None,
+            "version": current.version if current else None,
+            "loaded_at": current.loaded_at if current else None,
+            "load_seconds": round(current.load_seconds, 3) if current else None,
+            "reloading": self.reloading,
+            "error": self.last_error,
+            "backend": getattr(current.model, "backend", None) if current else None,
+        }
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._slots: Dict[str, ModelSlot] = {}
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def register(
+        self,
+        name: str,
+        paths: Sequence[Path],
+        loader: Callable[[], Any],
+        warmup: Optional[Callable[[Any], None]] = None,
+        lazy: bool = False,
+        version: Optional[Callable[[Any], str]] = None,
+    ) -> ModelSlot:
+        slot = ModelSlot(name, paths, loader, warmup=warmup, lazy=lazy, version=version)
+        self._slots[name] = slot
+        if not lazy:
+            slot.load()
+        return slot
+
+    def names(self) -> List[str]:
+        return list(self._slots)
+
+    def slot(self, name: str) -> ModelSlot:
+        if name not in self._slots:
+            raise KeyError(f"Unknown model: {name}")
+        return self._slots[name]
+
+    def get(self, name: str) -> Any:
+        """Return the active model, loading lazily on first use."""
+        return self.slot(name).get()
+
+    def current(self, name: str) -> ModelVersion:
+        """Return the active ModelVersion (model + version from one snapshot)."""
+        return self.slot(name).current()
+
+    def lease(self, name: str):
+        """Context manager yielding the active model; see ModelSlot.lease."""
+        return self.slot(name).lease()
+
+    def reload(self, name: str, wait: bool = False) -> bool:
+        """
+        Reload a slot in the background. Returns False if a reload is already
+        running. The old version keeps serving until the new one is warm.
+        """
+        slot = self.slot(name)
+        with slot._lock:
+            if slot.reloading:
+                return False
+            slot.reloading = True
+
+        def _run():
+            try:
+                new = slot.load()
+                print(f"[registry] {name}: now serving {new.version} ({new.load_seconds:.2f}s)")
+            except Exception as e:
+                print(f"[registry] {name}: reload failed, keeping previous version: {e}")
+            finally:
+                slot.reloading = False
+
+        t = threading.Thread(target=_run, name=f"reload-{name}", daemon=True)
+        t.start()
+        if wait:
+            t.join()
+        return True
+
+    def check_for_updates(self, settle_seconds: float = 2.0) -> List[str]:
+        """Trigger a background reload for every loaded slot whose artifacts changed."""
+        started = []
+        for name, slot in self._slots.items():
+            if slot.is_stale(settle_seconds) and self.reload(name):
+                started.append(name)
+        return started
+
+    def start_watcher(self, interval: float):
+        if interval <= 0 or self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def _loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.check_for_updates()
+                except Exception as e:
+                    print(f"[registry] watcher error: {e}")
+
+        self._watcher = threading.Thread(target=_loop, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def close(self):
+        """Release resources held by active models that expose close()."""
+        for slot in self._slots.values():
+            if slot.active is not None:
+                slot.active.close()
+
+    def describe(self) -> Dict[str, dict]:
+        return {name: slot.describe() for name, slot in self._slots.items()}
@@ -0,0 +1,96 @@
+# motion_gate.py
+"""
+Skip classification while the hand is (nearly) stationary.
+
+MotionGate compares each frame's normalized landmarks with the landmarks that
+were last actually classified. If the mean per-landmark displacement is below
+`threshold`, the previous result is reused. A fresh classification is forced
+after `max_stale` consecutive reuses (or `max_age_s` seconds), so a slow drift
+can never freeze the output.
+
+Used by infer.py, infer_with_feedback_r.py and the server's per-session
+/predict_landmarks stream.
+"""
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+import numpy as np
+
+
+class MotionGate:
+    def __init__(self, threshold: float = 0.02, max_stale: int = 10, max_age_s: Optional[float] = None):
+        """
+        threshold: mean landmark displacement (in normalized hand units, i.e. the
+                   wrist-centered, max-distance-scaled space) below which to reuse.
+        max_stale: maximum consecutive reused frames before forcing a refresh.
+        max_age_s: optional wall-clock bound on the age of a reused result.
+        """
+        self.threshold = float(threshold)
+        self.max_stale = int(max_stale)
+        self.max_age_s = max_age_s
+        self._ref: Optional[np.ndarray] = None
+        self._result: Any = None
+        self._context: Hashable = None
+        self._stale = 0
+        self._t_ref = 0.0
+        self.frames = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0 and self.max_stale > 0
+
+    @property
+    def skip_fraction(self) -> float:
+        return self.skipped / self.frames if self.frames else 0.0
+
+    def reset(self):
+        self._ref = None
+        self._result = None
+        self._stale = 0
+
+    def displacement(self, pts: np.ndarray) -> float:
+        if self._ref is None:
+            return float("inf")
+        d = pts.reshape(-1, 3) - self._ref
+        return float(np.sqrt((d * d).sum(axis=1)).mean())
+
+    def lookup(self, pts: np.ndarray, context: Hashable = None) -> Tuple[bool, Any]:
+        """
+        Returns (hit, result). On a hit `result` is the reused previous result.
+        `context` must match the one stored with the result (e.g. model version or
+        label allowlist), otherwise the frame is always classified.
+        """
+        with self._lock:
+            self.frames += 1
+            if not self.enabled or self._ref is None or context != self._context:
+                return False, None
+            if self._stale >= self.max_stale:
+                return False, None
+            if self.max_age_s is not None and time.monotonic() - self._t_ref > self.max_age_s:
+                return False, None
+            if self.displacement(pts) >= self.threshold:
+                return False, None
+            self._stale += 1
+            self.skipped += 1
+            return True, self._result
+
+    def store(self, pts: np.ndarray, result: Any, context: Hashable = None):
+        ref = np.array(pts, dtype=np.float32).reshape(-1, 3)
+        with self._lock:
+            self._ref = ref
+            self._result = result
+            self._context = context
+            self._stale = 0
+            self._t_ref = time.monotonic()
+
+    def run(self, pts: np.ndarray, fn: Callable[[], Any], context: Hashable = None) -> Tuple[Any, bool]:
+        """Return (result, reused): fn() is only called when the gate is open."""
+        hit, result = self.lookup(pts, context)
+        if hit:
+            return result, True
+        result = fn()
+        self.store(pts, result, context)
+        return result, False
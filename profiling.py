@@ -0,0 +1,249 @@
+# profiling.py
+"""
+On-demand profiling for server.py, driven by the token-guarded /admin routes.
+
+- RouteProfiler: `arm(route, n)` runs cProfile around the next n requests of a
+  route and aggregates them into one pstats report.
+- MemoryTracker: tracemalloc start/stop, snapshot diffs against a baseline and
+  per-request peak traced memory for the wrapped routes.
+
+Both are off by default. When off, the wrappers cost one dict lookup (profiler)
+and one tracemalloc.is_tracing() call (memory) per request.
+
+cProfile only sees the thread it is enabled in. Sync routes run in a worker
+thread, so their profile covers the request alone. For async routes it also
+covers whatever else the event loop ran in the meantime. Only one request is
+profiled at a time; requests that overlap it run unprofiled and do not count
+toward n. tracemalloc peaks are process-wide, so under concurrency a request's
+peak can include other requests' allocations.
+"""
+import cProfile
+import functools
+import inspect
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Dict, Optional
+
+SORT_KEYS = ("cumulative", "tottime", "ncalls")
+
+
+def _wrap(fn, around):
+    """Wrap a sync or async route handler; around(fn, args, kwargs, is_async) makes the call."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await around(fn, args, kwargs, True)
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return around(fn, args, kwargs, False)
+    return wrapper
+
+
+class _Session:
+    def __init__(self, route: str, requests: int, sort: str, limit: int):
+        self.route = route
+        self.requested = requests
+        self.remaining = requests
+        self.sort = sort
+        self.limit = limit
+        self.stats: Optional[pstats.Stats] = None
+        self.seconds = 0.0
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+
+class RouteProfiler:
+    def __init__(self):
+        self.routes = set()
+        self._armed: Dict[str, _Session] = {}
+        self._results: Dict[str, _Session] = {}
+        self._busy = threading.Lock()  # one active cProfile at a time
+        self._lock = threading.Lock()
+
+    def profiled(self, route: str):
+        self.routes.add(route)
+
+        def deco(fn):
+            return _wrap(fn, functools.partial(self._around, route))
+        return deco
+
+    def _around(self, route: str, fn, args, kwargs, is_async: bool):
+        session = self._armed.get(route)
+        if session is None or not self._busy.acquire(blocking=False):
+            return fn(*args, **kwargs)
+        if is_async:
+            return self._run_async(session, fn, args, kwargs)
+        try:
+            prof = cProfile.Profile()
+            t0 = time.perf_counter()
+            prof.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                prof.disable()
+                self._record(session, prof, time.perf_counter() - t0)
+        finally:
+            self._busy.release()
+
+    async def _run_async(self, session: _Session, fn, args, kwargs):
+        try:
+            prof = cProfile.Profile()
+            t0 = time.perf_counter()
+            prof.enable()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                prof.disable()
+                self._record(session, prof, time.perf_counter() - t0)
+        finally:
+            self._busy.release()
+
+    def _record(self, session: _Session, prof: cProfile.Profile, seconds: float):
+        with self._lock:
+            if session.stats is None:
+                session.stats = pstats.Stats(prof)
+            else:
+                session.stats.add(prof)
+            session.seconds += seconds
+            session.remaining -= 1
+            if session.remaining <= 0 and self._armed.get(session.route) is session:
+                session.finished_at = time.time()
+                del self._armed[session.route]
+                self._results[session.route] = session
+
+    def arm(self, route: str, requests: int, sort: str = "cumulative", limit: int = 30):
+        """Profile the next `requests` requests of `route` (requests <= 0 cancels)."""
+        if route not in self.routes:
+            raise KeyError(route)
+        with self._lock:
+            self._armed.pop(route, None)
+            if requests > 0:
+                self._armed[route] = _Session(route, requests, sort, limit)
+
+    def report(self, route: str) -> dict:
+        with self._lock:
+            armed = self._armed.get(route)
+            if armed is not None:
+                return {"route": route, "status": "armed", "remaining": armed.remaining,
+                        "requested": armed.requested}
+            session = self._results.get(route)
+        if session is None:
+            return {"route": route, "status": "idle"}
+        return {
+            "route": route,
+            "status": "done",
+            "requests": session.requested,
+            "wall_seconds": round(session.seconds, 6),
+            "mean_ms": round(1000 * session.seconds / max(session.requested, 1), 3),
+            "finished_at": session.finished_at,
+            "functions": self._top(session),
+            "text": self._text(session),
+        }
+
+    @staticmethod
+    def _top(session: _Session):
+        stats = session.stats
+        order = {"cumulative": 3, "tottime": 2, "ncalls": 1}[session.sort]
+        rows = []
+        for (filename, line, name), (cc, nc, tt, ct, _) in stats.stats.items():
+            rows.append((f"{filename}:{line}({name})", nc, tt, ct))
+        rows.sort(key=lambda r: -r[order])
+        return [
+            {"function": f, "ncalls": nc, "tottime": round(tt, 6), "cumtime": round(ct, 6)}
+            for f, nc, tt, ct in rows[: session.limit]
+        ]
+
+    @staticmethod
+    def _text(session: _Session) -> str:
+        buf = io.StringIO()
+        session.stats.stream = buf
+        session.stats.sort_stats(session.sort).print_stats(session.limit)
+        return buf.getvalue()
+
+
+class MemoryTracker:
+    def __init__(self, history: int = 50):
+        self.routes = set()
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._peaks: Dict[str, deque] = {}
+        self._history = history
+
+    def tracked(self, route: str):
+        self.routes.add(route)
+        self._peaks[route] = deque(maxlen=self._history)
+
+        def deco(fn):
+            return _wrap(fn, functools.partial(self._around, route))
+        return deco
+
+    def _around(self, route: str, fn, args, kwargs, is_async: bool):
+        if not tracemalloc.is_tracing():
+            return fn(*args, **kwargs)
+        if is_async:
+            return self._run_async(route, fn, args, kwargs)
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._note(route, start, t0)
+
+    async def _run_async(self, route: str, fn, args, kwargs):
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            self._note(route, start, t0)
+
+    def _note(self, route: str, start: int, t0: float):
+        if not tracemalloc.is_tracing():
+            return
+        end, peak = tracemalloc.get_traced_memory()
+        self._peaks[route].append({
+            "at": time.time(),
+            "seconds": round(time.perf_counter() - t0, 6),
+            "peak_bytes": peak - start,  # above the level at request start
+            "retained_bytes": end - start,
+        })
+
+    def start(self, frames: int = 10):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._baseline = tracemalloc.take_snapshot()
+
+    def stop(self):
+        self._baseline = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def diff(self, limit: int = 20, key_type: str = "lineno") -> dict:
+        if not tracemalloc.is_tracing() or self._baseline is None:
+            raise RuntimeError("tracemalloc is not running; POST /admin/memory/start first.")
+        snap = tracemalloc.take_snapshot()
+        stats = snap.compare_to(self._baseline, key_type)
+        return {
+            "top": [
+                {"where": str(s.traceback), "size_diff": s.size_diff, "size": s.size,
+                 "count_diff": s.count_diff}
+                for s in stats[:limit]
+            ],
+            "total_diff": sum(s.size_diff for s in stats),
+        }
+
+    def describe(self) -> dict:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "tracing": tracing,
+            "traced_current": current,
+            "traced_peak": peak,
+            "requests": {route: list(peaks) for route, peaks in self._peaks.items()},
+        }
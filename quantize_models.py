@@ -0,0 +1,203 @@
+# quantize_models.py
+"""
+Dynamic int8 quantization (weights int8, activations quantized on the fly)
+for the CPU sequence models:
+
+    SignSeqModel / SignTCNModel  LSTM + Linear layers (the TCN's causal convs are Linear already)
+    CTCModel                     Conv1d layers are rewritten as im2col + Linear first (eager
+                                 dynamic quantization has no Conv1d), then Linear layers
+
+Quantized checkpoints sit next to the float ones (seq_model.pt ->
+seq_model.int8.pt, ctc.pt -> ctc.int8.pt) and are loaded by the "torch-int8"
+sequence backend (INFERENCE_BACKENDS=sequence=torch-int8) and by the CTC route
+with CTC_QUANTIZED=1. A missing or stale .int8.pt is quantized from the float
+checkpoint at load time instead.
+
+train_temporal.py --quantize and 03_train_ctc.py --quantize write them after
+training and print the accuracy delta and latency; for existing checkpoints:
+
+    python quantize_models.py --seq models/seq_model.pt --ctc models/ctc.pt
+"""
+import argparse
+import copy
+import statistics
+import time
+import warnings
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+
+QUANTIZED = "dynamic_int8"
+
+
+def int8_path_for(path) -> Path:
+    """seq_model.pt -> seq_model.int8.pt, seq_model.v2.pt -> seq_model.v2.int8.pt"""
+    path = Path(path)
+    if path.suffix == ".pt":
+        return path.with_suffix(".int8.pt")
+    return path.with_name(path.name + ".int8.pt")
+
+
+def _quantize(model: nn.Module, layers) -> nn.Module:
+    from torch.ao.quantization import quantize_dynamic
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # torch.ao.quantization deprecation notice
+        return quantize_dynamic(model, layers, dtype=torch.qint8)
+
+
+class Conv1dAsLinear(nn.Module):
+    """A stride-1 Conv1d over [B, C, T] as one Linear on the k shifted copies of the input (same output)."""
+
+    def __init__(self, conv: nn.Conv1d):
+        super().__init__()
+        if conv.stride[0] != 1 or conv.groups != 1 or not isinstance(conv.padding[0], int):
+            raise ValueError(f"Unsupported Conv1d for int8: {conv}")
+        self.kernel_size = conv.kernel_size[0]
+        self.dilation = conv.dilation[0]
+        self.padding = conv.padding[0]
+        self.linear = nn.Linear(conv.in_channels * self.kernel_size, conv.out_channels, bias=conv.bias is not None)
+        with torch.no_grad():
+            self.linear.weight.copy_(conv.weight.permute(0, 2, 1).reshape(conv.out_channels, -1))
+            if conv.bias is not None:
+                self.linear.bias.copy_(conv.bias)
+
+    def forward(self, x):
+        x = nn.functional.pad(x, (self.padding, self.padding)).transpose(1, 2)  # [B, T + 2p, C]
+        t = x.shape[1] - (self.kernel_size - 1) * self.dilation
+        taps = torch.cat([x[:, j * self.dilation : j * self.dilation + t] for j in range(self.kernel_size)], dim=2)
+        return self.linear(taps).transpose(1, 2)
+
+
+def _convs_to_linear(module: nn.Module):
+    for name, child in module.named_children():
+        if isinstance(child, nn.Conv1d):
+            setattr(module, name, Conv1dAsLinear(child))
+        else:
+            _convs_to_linear(child)
+
+
+def quantize_sequence_model(model: nn.Module) -> nn.Module:
+    return _quantize(copy.deepcopy(model).cpu().eval(), {nn.LSTM, nn.Linear})
+
+
+def quantize_ctc_model(model: nn.Module) -> nn.Module:
+    model = copy.deepcopy(model).cpu().eval()
+    _convs_to_linear(model)
+    return _quantize(model, {nn.Linear})
+
+
+# ---------------------------
+# Checkpoints
+# ---------------------------
+def save_quantized_sequence(ckpt_path, out=None) -> Path:
+    """Quantize a train_temporal.py checkpoint -> <name>_model.int8.pt (same metadata, int8 state_dict)."""
+    from infer_temporal import build_model, checkpoint_meta
+
+    ckpt = torch.load(ckpt_path, map_location="cpu")
+    model = build_model(ckpt, checkpoint_meta(ckpt, ckpt_path), torch.device("cpu"))
+    out = Path(out) if out else int8_path_for(ckpt_path)
+    torch.save({**ckpt, "state_dict": quantize_sequence_model(model).state_dict(), "quantized": QUANTIZED}, out)
+    return out
+
+
+def _load_int8(path) -> dict:
+    # Packed int8 weights are pickled as torch.ScriptObject, which weights_only loading must allowlist.
+    with torch.serialization.safe_globals([torch.ScriptObject]), warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)  # TypedStorage deprecation inside quantized tensor unpickling
+        ckpt = torch.load(path, map_location="cpu")
+    if ckpt.get("quantized") != QUANTIZED:
+        raise RuntimeError(f"{path} is not a {QUANTIZED} checkpoint")
+    return ckpt
+
+
+def load_quantized_sequence(path, meta: dict) -> nn.Module:
+    from temporal_model import build_seq_model
+
+    ckpt = _load_int8(path)
+    model = quantize_sequence_model(build_seq_model(meta["model_cfg"], meta["num_classes"]))
+    model.load_state_dict(ckpt["state_dict"])
+    return model.eval()
+
+
+def save_quantized_ctc(model_path, out=None) -> Path:
+    from ctc_fingerspell import load_ctc_model
+
+    model = load_ctc_model(Path(model_path), torch.device("cpu"))
+    out = Path(out) if out else int8_path_for(model_path)
+    torch.save({"state_dict": quantize_ctc_model(model).state_dict(), "quantized": QUANTIZED,
+                "vocab_size": model.classifier.out_features,
+                "input_size": model.encoder.net[0].in_channels,
+                "hidden_size": model.classifier.in_features}, out)
+    return out
+
+
+def load_quantized_ctc(path) -> nn.Module:
+    from ctc_fingerspell import SCRIPTS_DIR
+    import sys
+
+    if str(SCRIPTS_DIR) not in sys.path:
+        sys.path.append(str(SCRIPTS_DIR))
+    from encoders import CTCModel  # type: ignore
+
+    ckpt = _load_int8(path)
+    model = quantize_ctc_model(CTCModel(vocab_size=ckpt["vocab_size"], input_size=ckpt["input_size"],
+                                        hidden_size=ckpt["hidden_size"]))
+    model.load_state_dict(ckpt["state_dict"])
+    return model.eval()
+
+
+# ---------------------------
+# Report
+# ---------------------------
+def latency_ms(model: nn.Module, *inputs, runs: int = 50) -> float:
+    """Median CPU forward time in ms."""
+    times = []
+    with torch.no_grad():
+        for _ in range(5):
+            model(*inputs)
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            model(*inputs)
+            times.append(time.perf_counter() - t0)
+    return 1000 * statistics.median(times)
+
+
+def print_speed(float_model: nn.Module, q_model: nn.Module, shapes):
+    """shapes: [(label, example input tuple)] -> one float vs int8 latency line each."""
+    for label, inputs in shapes:
+        f, q = latency_ms(float_model, *inputs), latency_ms(q_model, *inputs)
+        print(f"  {label:<14} float32 {f:8.3f} ms   int8 {q:8.3f} ms   ({f / q:.2f}x)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Write dynamic int8 siblings of sequence / CTC checkpoints")
+    ap.add_argument("--seq", type=Path, nargs="*", default=[], help="train_temporal.py checkpoints")
+    ap.add_argument("--ctc", type=Path, nargs="*", default=[], help="03_train_ctc.py state_dicts")
+    args = ap.parse_args()
+    if not args.seq and not args.ctc:
+        ap.error("nothing to quantize (--seq / --ctc)")
+
+    torch.set_num_threads(1)
+    for path in args.seq:
+        from infer_temporal import load_checkpoint
+
+        out = save_quantized_sequence(path)
+        model, meta = load_checkpoint(path, torch.device("cpu"))
+        q = load_quantized_sequence(out, meta)
+        print(f"{path} -> {out}")
+        print_speed(model, q, [(f"batch {b}", (torch.randn(b, meta["T"], meta["in_dim"]),)) for b in (1, 64)])
+    for path in args.ctc:
+        from ctc_fingerspell import load_ctc_model
+
+        out = save_quantized_ctc(path)
+        model = load_ctc_model(path, torch.device("cpu"))
+        q = load_quantized_ctc(out)
+        print(f"{path} -> {out}")
+        F = model.encoder.net[0].in_channels
+        print_speed(model, q, [(f"batch {b} x 100", (torch.randn(b, 100, F),)) for b in (1, 16)])
+
+
+if __name__ == "__main__":
+    main()
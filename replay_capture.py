@@ -0,0 +1,214 @@
+# replay_capture.py
+"""
+Replay traffic captured by server.py (CAPTURE_DIR, see traffic_capture.py)
+through a model version offline, or against a running server, and report
+latency percentiles and prediction diffs against what was served.
+
+Local mode loads models from --models (any version's folder) with the same
+loaders as server.py and calls them in-process; the motion gate is bypassed,
+so every record is classified. --url sends the recorded requests to a running
+server instead (session_id included, so gating behaves as recorded).
+
+Examples:
+    python replay_capture.py captures/*.sgcap                      # current models, max speed
+    python replay_capture.py captures/*.sgcap --models models_v2 --show 20
+    python replay_capture.py captures/*.sgcap --speed recorded --speedup 4 --workers 4
+    python replay_capture.py captures/*.sgcap --url http://localhost:8000
+"""
+import argparse
+import base64
+import io
+import json
+import statistics
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from traffic_capture import read_capture
+
+
+def served_label(record) -> str:
+    out = record.meta["output"]
+    if record.kind in ("dynamic", "dynamic_landmarks"):
+        return out["top10"][0]["label"] if out.get("top10") else ""
+    if record.kind == "fingerspelling":
+        return out["text"]
+    return out.get("letter", "")
+
+
+class LocalTarget:
+    """In-process models from one model folder, loaded on first use per kind."""
+
+    def __init__(self, models_dir: Path):
+        self.models_dir = models_dir
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def model(self, kind: str):
+        with self._lock:
+            if kind not in self._models:
+                import server
+
+                if kind == "landmarks":
+                    self._models[kind] = server.load_static_model(self.models_dir)
+                elif kind == "sequence":
+                    self._models[kind] = server.load_temporal_runner(self.models_dir)
+                elif kind == "dynamic_landmarks":
+                    self._models[kind] = server.load_dynamic_landmarks_runner(self.models_dir)
+                elif kind == "fingerspelling":
+                    self._models[kind] = server.load_ctc_runner(self.models_dir)
+                else:
+                    self._models[kind] = server.load_dynamic_runner()
+            return self._models[kind]
+
+    def prepare(self, records):
+        """Load and warm each needed model before timing starts."""
+        seen = {}
+        for r in records:
+            seen.setdefault(r.kind, r)
+        for record in seen.values():
+            self(record)
+
+    def __call__(self, record) -> str:
+        meta = record.meta
+        model = self.model(record.kind)
+        if record.kind == "landmarks":
+            from server import landmarks_to_feature_np
+
+            x = landmarks_to_feature_np(record.payload.reshape(21, 3))
+            return model.predict(x, meta.get("labels"))["letter"]
+        if record.kind == "sequence":
+            return model.predict(record.payload)["label"]
+        if record.kind == "dynamic_landmarks":
+            out = model.predict_topk(record.payload, focus_labels=meta.get("labels"))
+            return out["top10"][0]["label"].lower() if out["top10"] else ""
+        if record.kind == "fingerspelling":
+            return model.predict(record.payload, decoder=meta.get("decoder", "greedy"))["text"]
+        from PIL import Image
+
+        frames = [np.array(Image.open(io.BytesIO(b)).convert("RGB")) for b in record.payload]
+        out = model.predict(frames, focus_labels=meta.get("labels"))
+        return out["top10"][0]["label"] if out.get("top10") else ""
+
+
+class HttpTarget:
+    def __init__(self, base_url: str, timeout: float = 120.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def prepare(self, records):
+        pass
+
+    def __call__(self, record) -> str:
+        meta = record.meta
+        if record.kind == "landmarks":
+            body = {"landmarks": record.payload.ravel().tolist(), "labels": meta.get("labels"),
+                    "session_id": meta.get("session_id")}
+        elif record.kind == "sequence":
+            body = {"sequence": record.payload.tolist()}
+        elif record.kind == "dynamic_landmarks":
+            body = {"sequence": record.payload.tolist(), "labels": meta.get("labels")}
+        elif record.kind == "fingerspelling":
+            body = {"frames": record.payload.tolist(), "decoder": meta.get("decoder", "greedy")}
+        else:
+            body = {"frames": [base64.b64encode(b).decode() for b in record.payload],
+                    "labels": meta.get("labels")}
+        req = urllib.request.Request(self.base_url + meta["route"], data=json.dumps(body).encode(),
+                                     headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as r:
+            out = json.loads(r.read())
+        if record.kind in ("dynamic", "dynamic_landmarks"):
+            return out["top10"][0]["label"] if out.get("top10") else ""
+        if record.kind == "fingerspelling":
+            return out["text"]
+        return out.get("letter", "")
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    arr = np.asarray(values)
+    return {p: float(np.percentile(arr, p)) for p in (50, 90, 99)} | {"max": float(arr.max())}
+
+
+def replay(records, target, speed: str, speedup: float, workers: int):
+    results = []
+    lock = threading.Lock()
+
+    def run(record):
+        t0 = time.perf_counter()
+        try:
+            label, error = target(record), None
+        except Exception as e:
+            label, error = None, str(e)
+        elapsed = time.perf_counter() - t0
+        with lock:
+            results.append((record, label, elapsed, error))
+
+    t_first = records[0].meta["t"] if records else 0.0
+    wall0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for record in records:
+            if speed == "recorded":
+                delay = (record.meta["t"] - t_first) / speedup - (time.perf_counter() - wall0)
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(run, record)
+    return results, time.perf_counter() - wall0
+
+
+def report(results, wall: float, show: int):
+    by_route = defaultdict(list)
+    for r in results:
+        by_route[r[0].meta["route"]].append(r)
+    print(f"{len(results)} requests replayed in {wall:.2f} s")
+    print(f"{'route':<20} {'n':>6} {'err':>5} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'served p50':>11} {'agree':>7}")
+    diffs = []
+    for route, rows in sorted(by_route.items()):
+        ok = [r for r in rows if r[3] is None]
+        lat = percentiles([1000 * r[2] for r in ok])
+        served = statistics.median(r[0].meta["latency_ms"] for r in rows)
+        agree = sum(served_label(r[0]) == r[1] for r in ok) / max(len(ok), 1)
+        diffs += [r for r in ok if served_label(r[0]) != r[1]]
+        print(f"{route:<20} {len(rows):>6} {len(rows) - len(ok):>5} {lat.get(50, 0):>8.2f} {lat.get(90, 0):>8.2f} "
+              f"{lat.get(99, 0):>8.2f} {lat.get('max', 0):>8.2f} {served:>11.2f} {100 * agree:>6.1f}%")
+    errors = [r for r in results if r[3] is not None]
+    if errors:
+        print(f"first error: {errors[0][3]}")
+    for record, label, _, _ in diffs[:show]:
+        meta = record.meta
+        print(f"  diff {meta['route']} t={meta['t']:.3f} served={served_label(record)!r} replay={label!r}"
+              + (f" labels={meta['labels']}" if meta.get("labels") else ""))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay captured inference traffic")
+    ap.add_argument("captures", type=Path, nargs="+")
+    ap.add_argument("--models", type=Path, default=Path("models"), help="Model folder for local replay")
+    ap.add_argument("--url", default="", help="Replay against a running server instead")
+    ap.add_argument("--routes", nargs="*", default=None, help="Only these routes, e.g. /predict_landmarks")
+    ap.add_argument("--speed", choices=["max", "recorded"], default="max")
+    ap.add_argument("--speedup", type=float, default=1.0, help="With --speed recorded: compress time by this factor")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--show", type=int, default=10, help="Prediction diffs to print")
+    args = ap.parse_args()
+
+    records = [r for path in args.captures for r in read_capture(path)
+               if args.routes is None or r.meta["route"] in args.routes]
+    records.sort(key=lambda r: r.meta["t"])
+    if not records:
+        raise SystemExit("No records to replay.")
+    target = HttpTarget(args.url) if args.url else LocalTarget(args.models)
+    target.prepare(records)
+    results, wall = replay(records, target, args.speed, args.speedup, args.workers)
+    report(results, wall, args.show)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+# sample_writer.py
+"""
+Background, batched writers for the data collectors, so disk I/O never runs
+on the camera loop.
+
+    SampleWriter  labelled feature rows (collect_data.py, collect_data_mini.py)
+                  -> CSV (label,f0..fN, "%.6f") or the binary .sgsmp format
+    ClipWriter    whole takes (collect_sequences.py) -> .npz, same keys as before
+
+The camera loop only copies the row into a queue. The writer thread drains
+whatever has queued up, formats it as one batch, writes it with one call
+and flushes + fsyncs every flush_seconds, so a hard kill loses at most that
+much. Closing the writer (or leaving its `with` block) writes out the rest.
+
+Crash safety:
+- rows are appended; a torn last line or record (crash mid-write) is cut
+  off the next time the file is opened for writing, and readers skip it
+- takes are written to <name>.npz.tmp and renamed, so a clip file is either
+  complete or absent
+
+.sgsmp layout (append-only, like traffic_capture.py): MAGIC, then per row
+
+    <I  label length>  <I  feature count>  <label UTF-8>  <float32 features>
+
+read_samples() loads either format; python sample_writer.py --to-csv converts
+.sgsmp files for tools that only read CSV, --bench times the camera-thread cost.
+"""
+import argparse
+import os
+import queue
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"SGSLSMP1"
+_HEADER = struct.Struct("<II")
+BINARY_SUFFIX = ".sgsmp"
+
+
+def samples_path(csv_path: Path, fmt: str) -> Path:
+    """data/samples.csv -> data/samples.sgsmp for fmt "bin"."""
+    return Path(csv_path).with_suffix(BINARY_SUFFIX) if fmt == "bin" else Path(csv_path)
+
+
+def add_format_arg(ap):
+    ap.add_argument("--format", choices=["csv", "bin"], default="csv",
+                    help=f"Sample file format: CSV, or the compact binary {BINARY_SUFFIX} (read_samples / --to-csv)")
+
+
+# ---------------------------
+# Writer thread
+# ---------------------------
+class BackgroundWriter:
+    """Bounded queue + writer thread; subclasses implement _write_batch (and _flush / _close_file)."""
+
+    def __init__(self, name: str, flush_seconds: float, max_queue: int):
+        self.flush_seconds = flush_seconds
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.write_s = 0.0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _offer(self, item):
+        """Never blocks; a full queue (disk stalled for a long time) drops and counts the item."""
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_batch(self, items) -> int:
+        """Write the items; returns how many were written (the rest count as dropped)."""
+        raise NotImplementedError
+
+    def _flush(self):
+        pass
+
+    def _close_file(self):
+        pass
+
+    def _run(self):
+        last_flush = time.monotonic()
+        done = False
+        while not done:
+            try:
+                items = [self._queue.get(timeout=self.flush_seconds)]
+            except queue.Empty:
+                items = []
+            while True:  # batch whatever else is already queued
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in items:
+                done = True
+                items = [i for i in items if i is not None]
+            if items:
+                t0 = time.perf_counter()
+                try:
+                    written = self._write_batch(items)
+                    self.written += written
+                    self.dropped += len(items) - written
+                    self.batches += 1
+                except Exception as e:
+                    self.dropped += len(items)
+                    print(f"[writer] failed to write {len(items)} item(s): {e}")
+                self.write_s += time.perf_counter() - t0
+            if done or time.monotonic() - last_flush >= self.flush_seconds:
+                self._flush()
+                last_flush = time.monotonic()
+        self._close_file()
+
+    def close(self, timeout: float = 30.0):
+        """Write out what is queued, then stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        print(self.describe())
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+
+# ---------------------------
+# Feature rows
+# ---------------------------
+class SampleWriter(BackgroundWriter):
+    def __init__(self, path: Path, flush_seconds: float = 1.0, max_queue: int = 100_000):
+        self.path = Path(path)
+        self.binary = self.path.suffix == BINARY_SUFFIX
+        self._file = None
+        self._n_features: Optional[int] = None
+        super().__init__(f"sample-writer-{self.path.name}", flush_seconds, max_queue)
+
+    def write(self, label: str, feats: np.ndarray):
+        """Queue one row (called on the camera loop; copies feats, never blocks)."""
+        self._offer((label, np.array(feats, dtype=np.float32).reshape(-1)))
+
+    def _open(self, n_features: int):
+        """Open for appending. An existing file's width wins over n_features (the first queued row's)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists() and self.path.stat().st_size:
+            _truncate_torn_tail(self.path, self.binary)
+            n_features = _existing_width(self.path, self.binary) or n_features
+        f = open(self.path, "ab")
+        if f.tell() == 0:
+            f.write(MAGIC if self.binary else _csv_header(n_features))
+        self._n_features = n_features
+        self._file = f
+
+    def _write_batch(self, items) -> int:
+        if self._file is None:
+            self._open(len(items[0][1]))
+        rows = [(label, feats) for label, feats in items if len(feats) == self._n_features]
+        if len(rows) < len(items):
+            print(f"[writer] {self.path}: dropping {len(items) - len(rows)} row(s) "
+                  f"that are not {self._n_features} features wide")
+        if not rows:
+            return 0
+        if self.binary:
+            parts = []
+            for label, feats in rows:
+                label_bytes = label.encode()
+                parts += [_HEADER.pack(len(label_bytes), len(feats)), label_bytes, feats.tobytes()]
+            self._file.write(b"".join(parts))
+        else:
+            self._file.write(_csv_rows([label for label, _ in rows], np.stack([feats for _, feats in rows])))
+        return len(rows)
+
+    def _flush(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def describe(self) -> str:
+        ms = 1000 * self.write_s / max(self.batches, 1)
+        return (f"[writer] {self.path}: {self.written} rows in {self.batches} batches "
+                f"({ms:.2f} ms/batch, off the camera loop), {self.dropped} dropped")
+
+
+def _csv_header(n_features: int) -> bytes:
+    return (",".join(["label"] + [f"f{i}" for i in range(n_features)]) + "\n").encode()
+
+
+def _csv_rows(labels, X: np.ndarray) -> bytes:
+    X = np.asarray(X, dtype=np.float64)
+    fmt = ",".join(["%.6f"] * X.shape[1])
+    return "".join(f"{label}," + fmt % tuple(row) + "\n" for label, row in zip(labels, X.tolist())).encode()
+
+
+def _truncate_torn_tail(path: Path, binary: bool):
+    """Cut a partial last row left by a crash mid-write."""
+    size = path.stat().st_size
+    if binary:
+        good = 0
+        if size >= len(MAGIC):
+            good = len(MAGIC)
+            for end in _record_ends(path):
+                good = end
+    else:
+        good = 0
+        with open(path, "rb") as f:  # scan back from the end for the last newline
+            end = size
+            while end > 0:
+                start = max(0, end - 4096)
+                f.seek(start)
+                i = f.read(end - start).rfind(b"\n")
+                if i >= 0:
+                    good = start + i + 1
+                    break
+                end = start
+    if good < size:
+        print(f"[writer] {path}: dropping {size - good} bytes of an incomplete last row")
+        os.truncate(path, good)
+
+
+def _existing_width(path: Path, binary: bool) -> Optional[int]:
+    """Features per row of an existing file: the CSV header, or the first .sgsmp record (None if no rows)."""
+    with open(path, "rb") as f:
+        if not binary:
+            line = f.readline()
+            return line.count(b",") if line.endswith(b"\n") else None
+        f.seek(len(MAGIC))
+        header = f.read(_HEADER.size)
+        return _HEADER.unpack(header)[1] if len(header) == _HEADER.size else None
+
+
+def _record_ends(path: Path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise RuntimeError(f"{path} is not a {BINARY_SUFFIX} sample file")
+        pos = len(MAGIC)
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            label_len, n = _HEADER.unpack(header)
+            body = label_len + 4 * n
+            if len(f.read(body)) < body:
+                return
+            pos += _HEADER.size + body
+            yield pos
+
+
+def read_samples(path: Path) -> Tuple[np.ndarray, np.ndarray]:
+    """CSV or .sgsmp -> (X float32 [N, F], labels [N]); a torn last row is ignored."""
+    path = Path(path)
+    if path.suffix != BINARY_SUFFIX:
+        text = path.read_text()
+        lines = text[: text.rfind("\n") + 1].splitlines()
+        data = np.genfromtxt(lines[1:], delimiter=",", dtype=str, ndmin=2) if len(lines) > 1 \
+            else np.zeros((0, 1), dtype=str)
+        return data[:, 1:].astype(np.float32), data[:, 0]
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise RuntimeError(f"{path} is not a {BINARY_SUFFIX} sample file")
+    labels, rows = [], []
+    pos = len(MAGIC)
+    while pos + _HEADER.size <= len(data):
+        label_len, n = _HEADER.unpack_from(data, pos)
+        start = pos + _HEADER.size
+        end = start + label_len + 4 * n
+        if end > len(data):
+            break
+        labels.append(data[start:start + label_len].decode())
+        rows.append(np.frombuffer(data, dtype=np.float32, count=n, offset=start + label_len))
+        pos = end
+    X = np.stack(rows) if rows else np.zeros((0, 0), dtype=np.float32)
+    return X, np.array(labels, dtype=str)
+
+
+# ---------------------------
+# Clips
+# ---------------------------
+class ClipWriter(BackgroundWriter):
+    def __init__(self, flush_seconds: float = 1.0, max_queue: int = 1000):
+        self._claimed = set()
+        super().__init__("clip-writer", flush_seconds, max_queue)
+
+    def unique_path(self, path: Path) -> Path:
+        """path, or path with _1, _2 ... added if it exists or is already queued."""
+        stem, n = path.stem, 1
+        while path.exists() or path in self._claimed:
+            path = path.with_name(f"{stem}_{n}{path.suffix}")
+            n += 1
+        self._claimed.add(path)
+        return path
+
+    def save(self, path: Path, **arrays):
+        """Queue np.savez(path, **arrays); the arrays must not be modified afterwards."""
+        self._offer((Path(path), arrays))
+
+    def _write_batch(self, items) -> int:
+        for path, arrays in items:
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "wb") as f:
+                np.savez(f, **arrays)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+            self._claimed.discard(path)
+        return len(items)
+
+    def describe(self) -> str:
+        return f"[writer] clips: {self.written} saved, {self.dropped} dropped, {self.queued} queued"
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+def to_csv(path: Path, chunk: int = 10_000) -> Path:
+    """Synchronous conversion (no queue, so no rows can be dropped); written to a .tmp and renamed."""
+    X, labels = read_samples(path)
+    out = Path(path).with_suffix(".csv")
+    if out.exists():
+        raise RuntimeError(f"{out} exists; not overwriting")
+    tmp = out.with_name(out.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_csv_header(X.shape[1]))
+        for i in range(0, len(X), chunk):
+            f.write(_csv_rows(labels[i : i + chunk], X[i : i + chunk]))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, out)
+    return out
+
+
+def bench(n: int = 3000, dim: int = 63):
+    """Camera-thread cost per sample: the old open/format/append/close vs SampleWriter.write."""
+    import tempfile
+
+    rng = np.random.default_rng(0)
+    X = rng.uniform(-1, 1, size=(n, dim)).astype(np.float32)
+    with tempfile.TemporaryDirectory() as d:
+        old_path = Path(d) / "old.csv"
+        t0 = time.perf_counter()
+        for feats in X:
+            row = ",".join(["A"] + [f"{v:.6f}" for v in feats]) + "\n"
+            with open(old_path, "a") as f:
+                f.write(row)
+        old = time.perf_counter() - t0
+        for suffix in (".csv", BINARY_SUFFIX):
+            writer = SampleWriter(Path(d) / f"new{suffix}")
+            t0 = time.perf_counter()
+            for feats in X:
+                writer.write("A", feats)
+            new = time.perf_counter() - t0
+            writer.close()
+            print(f"{suffix:<7} camera thread: old {1e6 * old / n:7.1f} us/row  new {1e6 * new / n:5.1f} us/row   "
+                  f"{writer.describe()}")
+            if suffix == ".csv":
+                assert (Path(d) / "new.csv").read_text().split("\n", 1)[1] == old_path.read_text()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Sample file tools")
+    ap.add_argument("--to-csv", type=Path, nargs="*", default=[], help=f"Convert {BINARY_SUFFIX} files to CSV")
+    ap.add_argument("--bench", action="store_true")
+    args = ap.parse_args()
+    if not (args.to_csv or args.bench):
+        ap.error("nothing to do (--to-csv / --bench)")
+    for path in args.to_csv:
+        print(f"{path} -> {to_csv(path)}")
+    if args.bench:
+        bench()
+
+
+if __name__ == "__main__":
+    main()
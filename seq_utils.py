@@ -1,6 +1,8 @@
 import numpy as np
 import torch
 
+from landmark_features import normalize_middle_mcp
+
 def pad_or_crop(seq: np.ndarray, T: int) -> np.ndarray:
     t = seq.shape[0]
     if t == T:
@@ -11,17 +13,15 @@ def pad_or_crop(seq: np.ndarray, T: int) -> np.ndarray:
     pad = np.repeat(last, T - t, axis=0)
     return np.concatenate([seq, pad], axis=0)
 
+# Two-hand rows are [left 63 | right 63] by MediaPipe handedness; an absent hand is all zeros.
+HAND_DIM = 63
+TWO_HAND_DIM = 2 * HAND_DIM
+
 def normalize_landmarks(seq: np.ndarray, eps: float = 1e-6) -> np.ndarray:
-    assert seq.ndim == 2 and seq.shape[1] == 63, f"expected [T,63], got {seq.shape}"
-    T = seq.shape[0]
-    xyz = seq.reshape(T, 21, 3)
-    wrist = xyz[:, 0:1, :]
-    centered = xyz - wrist
-    ref = centered[:, 9, :]  # middle_mcp
-    scale = np.linalg.norm(ref, axis=-1, keepdims=True)
-    scale = np.maximum(scale, eps)
-    centered = centered / scale[:, None, :]
-    return centered.reshape(T, 63)
+    """[T,63] or [T,126] raw landmarks -> same shape, each hand wrist-centred and scaled independently."""
+    assert seq.ndim == 2 and seq.shape[1] in (HAND_DIM, TWO_HAND_DIM), f"expected [T,63] or [T,126], got {seq.shape}"
+    T, D = seq.shape
+    return normalize_middle_mcp(seq.reshape(T, D // HAND_DIM, 21, 3), eps).reshape(T, D)
 
 def to_tensor(seq: np.ndarray) -> torch.Tensor:
     return torch.from_numpy(seq.astype(np.float32)).unsqueeze(0)
@@ -0,0 +1,69 @@
+# sequence_sessions.py
+"""
+Incremental sequence sessions for /predict_sequence_stream: clients append only
+the frames captured since their last call.
+
+Frames are normalized once, on arrival. The mode follows the checkpoint:
+- window (bidirectional models): a ring buffer holds the last T normalized
+  frames and each call runs the model once on it, exactly as /predict_sequence
+  would on the same last T frames (pad_or_crop semantics).
+- stateful (causal models: train_temporal.py --arch tcn, or an LSTM without
+  --bidirectional): the LSTM (h, c) or the TCN's buffered past conv inputs
+  are carried between calls, so a new frame costs one step plus the head. The prediction covers every frame since the last reset rather
+  than a T window, so clients should send reset at sign boundaries.
+
+Sessions live in a SessionStore with an idle TTL and a byte budget; each
+session costs T * in_dim floats (window) or the step state (stateful).
+"""
+import threading
+
+import numpy as np
+
+from seq_utils import normalize_landmarks, pad_or_crop
+from temporal_model import stream_state_floats
+
+_OVERHEAD_BYTES = 512  # object headers, lock, bookkeeping
+
+
+class SequenceStream:
+    def __init__(self, runner):
+        self.runner = runner
+        self.mode = "stateful" if runner.causal else "window"
+        self.frames = 0
+        self._lock = threading.Lock()
+        self._state = None  # stateful: model step() state
+        self._logits = None  # stateful: output after the last appended frame
+        self._ring = np.zeros((runner.T, runner.in_dim), dtype=np.float32) if self.mode == "window" else None
+
+    @property
+    def nbytes(self) -> int:
+        if self._ring is not None:
+            return self._ring.nbytes + _OVERHEAD_BYTES
+        return stream_state_floats(self.runner.engine.model_cfg) * 4 + _OVERHEAD_BYTES  # float32
+
+    def _window(self) -> np.ndarray:
+        T = self.runner.T
+        n = min(self.frames, T)
+        start = (self.frames - n) % T
+        idx = (start + np.arange(n)) % T
+        return pad_or_crop(self._ring[idx], T)
+
+    def append(self, raw: np.ndarray) -> dict:
+        """Add [t, in_dim] raw frames (t may be 0) -> {label, confidence, margin} over the stream so far."""
+        frames = normalize_landmarks(raw) if raw.shape[0] else raw
+        with self._lock:
+            if self.frames + frames.shape[0] == 0:
+                raise ValueError("No frames in this session yet.")
+            if self.mode == "stateful":
+                if frames.shape[0]:
+                    self._logits, self._state = self.runner.step(frames, self._state)
+                    self.frames += frames.shape[0]
+                logits = self._logits
+            else:
+                T = self.runner.T
+                self.frames += max(0, frames.shape[0] - T)  # frames that would scroll straight out
+                for row in frames[-T:]:
+                    self._ring[self.frames % T] = row
+                    self.frames += 1
+                logits = self.runner.engine.predict_batch(self._window()[None])[0]
+        return self.runner.results(logits[None])[0]
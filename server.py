@@ -1,26 +1,54 @@
 # server.py
+#
+# Cold start matters on autoscaled hosts, so nothing heavy is imported here:
+# numpy/PIL are bound lazily (imported on first attribute access), joblib/sklearn
+# load with the static model, mediapipe on the first /predict_image call and
+# torch/cv2 with the sequence/dynamic models. See bench_cold_start.py.
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import List, Optional, Tuple, Dict
+from typing import List, Optional, Tuple
 
 import base64
+import importlib
+import importlib.util
 import json
 import io
-import sys
-import numpy as np
-from PIL import Image
+import os
+import threading
+import time
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import joblib
 
-# Optional: run MediaPipe Hands server-side for image inputs
-try:
-    import mediapipe as mp
-    MP_AVAILABLE = True
-    mp_hands = mp.solutions.hands
-except Exception:
-    MP_AVAILABLE = False
+from model_registry import ModelRegistry
+from profiling import MemoryTracker, RouteProfiler, SORT_KEYS
+from session_store import SessionStore
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+    Resolved attributes are cached on the proxy, so later lookups cost the same
+    as a normal module attribute. importlib's import lock keeps it thread-safe.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr: str):
+        value = getattr(importlib.import_module(self._name), attr)
+        setattr(self, attr, value)
+        return value
+
+
+np = LazyModule("numpy")
+Image = LazyModule("PIL.Image")
+
+# Optional: run MediaPipe Hands server-side for image inputs (imported on first use)
+MP_AVAILABLE = importlib.util.find_spec("mediapipe") is not None
 
 # ---------------------------
 # Paths & Loading
@@ -28,17 +56,102 @@ except Exception:
 MODELS_DIR = Path("models")
 MODEL_PATH = MODELS_DIR / "hand_static.joblib"
 CLASSES_PATH = MODELS_DIR / "class_names.json"
-
-if not MODEL_PATH.exists() or not CLASSES_PATH.exists():
-    raise RuntimeError("Model files not found. Run train.py first.")
-
-clf = joblib.load(MODEL_PATH)
-class_names: List[str] = json.loads(CLASSES_PATH.read_text())
+HEAVY_MODEL_PATH = MODELS_DIR / "hand_static_heavy.joblib"
+CASCADE_PATH = MODELS_DIR / "cascade.json"
+SEQ_MODEL_PATH = MODELS_DIR / "seq_model.pt"
+SEQ_LABELS_JSON = MODELS_DIR / "seq_labels.json"
+SEQ_INT8_PATH = MODELS_DIR / "seq_model.int8.pt"  # read by the torch-int8 sequence backend (quantize_models.py)
+
+# Seconds between artifact checks for hot reload (0 disables the watcher).
+MODEL_WATCH_INTERVAL = float(os.environ.get("MODEL_WATCH_INTERVAL", "0"))
+# Shared secret for /admin/* routes; admin routes are disabled when unset.
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+# Use the fast->heavy static cascade when tune_cascade.py artifacts exist ("0" disables).
+STATIC_CASCADE = os.environ.get("STATIC_CASCADE", "1") != "0"
+# Registry slots loaded in the background at startup, so /health answers immediately.
+PRELOAD_MODELS = [m for m in os.environ.get("PRELOAD_MODELS", "static").split(",") if m]
+# Motion gate for /predict_landmarks streams that send a session_id (threshold 0 disables).
+MOTION_GATE_THRESHOLD = float(os.environ.get("MOTION_GATE_THRESHOLD", "0.02"))
+MOTION_GATE_MAX_STALE = int(os.environ.get("MOTION_GATE_MAX_STALE", "5"))
+SESSION_TTL = float(os.environ.get("SESSION_TTL", "300"))
+# Sampled request capture for replay_capture.py (off unless CAPTURE_DIR is set).
+CAPTURE_DIR = os.environ.get("CAPTURE_DIR", "")
+CAPTURE_SAMPLE_RATE = float(os.environ.get("CAPTURE_SAMPLE_RATE", "0.01"))
+CAPTURE_DYNAMIC_SAMPLE_RATE = float(os.environ.get("CAPTURE_DYNAMIC_SAMPLE_RATE", "0"))
+# Byte budget for /predict_sequence_stream sessions (least recently used evicted first).
+SEQ_SESSION_MEMORY_MB = float(os.environ.get("SEQ_SESSION_MEMORY_MB", "64"))
+# Micro-batching of concurrent /predict_fingerspelling requests (see ctc_fingerspell.py).
+CTC_MAX_BATCH = int(os.environ.get("CTC_MAX_BATCH", "16"))
+CTC_BATCH_WAIT_MS = float(os.environ.get("CTC_BATCH_WAIT_MS", "2"))
+# Dynamic int8 CTC model on CPU (models/ctc.int8.pt from quantize_models.py, else quantized on load).
+CTC_QUANTIZED = os.environ.get("CTC_QUANTIZED", "0") == "1"
+
+
+def load_static_model(models_dir: Path = MODELS_DIR):
+    """models_dir: another model version's folder (replay_capture.py); the registry uses MODELS_DIR."""
+    model_path = models_dir / MODEL_PATH.name
+    classes_path = models_dir / CLASSES_PATH.name
+    heavy_path = models_dir / HEAVY_MODEL_PATH.name
+    cascade_path = models_dir / CASCADE_PATH.name
+    if not model_path.exists() or not classes_path.exists():
+        raise RuntimeError("Model files not found. Run train.py first.")
+    import joblib
+    from inference_backends import backend_for, create_engine
+    from static_scorer import CascadeScorer, fold_linear_pipeline
+
+    class_names = json.loads(classes_path.read_text())
+    # The engine validates the backend: unknown names fail, and "numpy" refuses models it can't fold.
+    # Routes score through its StaticScorer, which adds the cached allowlist subsets.
+    backend = backend_for("static")
+    fast = create_engine("static", backend, clf=joblib.load(model_path), class_names=class_names).scorer
+    if STATIC_CASCADE and heavy_path.exists() and cascade_path.exists():
+        heavy_clf = joblib.load(heavy_path)
+        # The heavy stage is an RBF SVM / MLP by design; it only folds if it happens to be linear.
+        heavy_backend = backend if fold_linear_pipeline(heavy_clf) is not None else "sklearn"
+        heavy = create_engine("static", heavy_backend, clf=heavy_clf, class_names=class_names).scorer
+        return CascadeScorer.from_config(fast, heavy, cascade_path)
+    return fast
+
+
+def warmup_static_model(static):
+    static.predict(np.zeros((1, 63), dtype=np.float32))
+
+
+registry = ModelRegistry()
+motion_sessions = SessionStore(ttl_s=SESSION_TTL)
+# Admin-armed cProfile / tracemalloc hooks; both are no-ops until enabled via /admin.
+profiler = RouteProfiler()
+memory = MemoryTracker()
+capture = None  # TrafficCapture while CAPTURE_DIR is set
 
 # ---------------------------
 # FastAPI app
 # ---------------------------
-app = FastAPI(title="SgSL Static Letter API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global capture
+
+    def _preload():
+        for name in PRELOAD_MODELS:
+            try:
+                registry.get(name)
+            except Exception as e:
+                print(f"[startup] preloading {name} failed: {e}")
+
+    threading.Thread(target=_preload, name="preload-models", daemon=True).start()
+    registry.start_watcher(MODEL_WATCH_INTERVAL)
+    if CAPTURE_DIR:
+        from traffic_capture import TrafficCapture
+        capture = TrafficCapture(Path(CAPTURE_DIR), CAPTURE_SAMPLE_RATE, CAPTURE_DYNAMIC_SAMPLE_RATE)
+    yield
+    registry.stop_watcher()
+    registry.close()
+    if capture is not None:
+        capture.close()
+        capture = None
+
+
+app = FastAPI(title="SgSL Static Letter API", version="1.0.0", lifespan=lifespan)
 
 # CORS (adjust origins as needed)
 app.add_middleware(
@@ -58,48 +171,48 @@ def landmarks_to_feature_np(landmarks: np.ndarray) -> np.ndarray:
                like MediaPipe Hands outputs.
     Returns 1 x 63 normalized feature vector (wrist-centered, scale-invariant).
     """
+    from landmark_features import static_features
+
     if landmarks.shape != (21, 3):
         raise ValueError("Expected landmarks of shape (21, 3).")
-    pts = landmarks.astype(np.float32).copy()
-    wrist = pts[0].copy()
-    pts -= wrist
-    scale = np.linalg.norm(pts, axis=1).max()
-    if scale < 1e-6:
-        scale = 1.0
-    pts /= scale
-    return pts.reshape(1, -1)  # (1, 63)
-
+    return static_features(landmarks).reshape(1, -1)  # (1, 63)
 
-def decision_margin_from_scores(scores: np.ndarray) -> float:
-    """scores: 1D array of per-class decision_function or probs."""
-    if scores.ndim != 1 or scores.size < 2:
-        return 0.0
-    top2 = np.sort(scores)[-2:]
-    return float(top2[-1] - top2[-2])
 
-
-def predict_from_feature(x: np.ndarray) -> Tuple[str, float, float]:
+def predict_from_feature(x: np.ndarray, static=None, labels: Optional[List[str]] = None) -> Tuple[str, float, float]:
     """
     x: (1, 63). Returns (letter, confidence, margin)
     confidence is a softmax over decision_function if available; else max prob.
     margin is top2 difference (higher = more separation).
+    static: StaticScorer from the registry (defaults to the active version).
+    labels: optional allowlist; scores, softmax and margin cover only those classes.
     """
-    if hasattr(clf, "decision_function"):
-        dec = clf.decision_function(x).ravel()
-        margin = decision_margin_from_scores(dec)
-        # Convert decision_function to pseudo-prob via softmax for readability
-        exps = np.exp(dec - dec.max())
-        probs = exps / exps.sum()
-        pred_idx = int(np.argmax(dec))
-        conf = float(probs[pred_idx])
-    else:
-        probs = clf.predict_proba(x).ravel()
-        margin = decision_margin_from_scores(probs)
-        pred_idx = int(np.argmax(probs))
-        conf = float(probs[pred_idx])
+    if static is None:
+        static = registry.get("static")
+    out = static.predict(x, labels)
+    return out["letter"], out["confidence"], out["margin"]
 
-    letter = class_names[pred_idx]
-    return letter, conf, margin
+
+def predict_static_response(x: np.ndarray, labels: Optional[List[str]]) -> "PredictResponse":
+    out = registry.get("static").predict(x, labels)
+    return PredictResponse(**out)
+
+
+def gated_static_response(session_id: str, x: np.ndarray, labels: Optional[List[str]]) -> "PredictResponse":
+    """
+    Per-session motion gate: reuse the session's last result while the normalized
+    hand stays within MOTION_GATE_THRESHOLD of the last classified frame.
+    """
+    from motion_gate import MotionGate
+
+    gate = motion_sessions.get_or_create(
+        session_id, lambda: MotionGate(MOTION_GATE_THRESHOLD, MOTION_GATE_MAX_STALE)
+    )
+    current = registry.current("static")  # one snapshot, so a hot swap can't pair a result with the wrong version
+    static = current.model
+    # A cached result is only valid for the same model version and allowlist.
+    context = (current.version, tuple(labels or ()))
+    out, reused = gate.run(x, lambda: static.predict(x, labels), context)
+    return PredictResponse(**out, reused=reused)
 
 
 def run_mediapipe_on_image(pil_img: Image.Image) -> Optional[np.ndarray]:
@@ -109,6 +222,8 @@ def run_mediapipe_on_image(pil_img: Image.Image) -> Optional[np.ndarray]:
     """
     if not MP_AVAILABLE:
         raise RuntimeError("MediaPipe is not installed server-side. Use /predict_landmarks or install mediapipe.")
+    import mediapipe as mp
+    mp_hands = mp.solutions.hands
 
     img = np.array(pil_img.convert("RGB"))
     with mp_hands.Hands(
@@ -121,9 +236,9 @@ def run_mediapipe_on_image(pil_img: Image.Image) -> Optional[np.ndarray]:
         res = hands.process(img)
         if not res.multi_hand_landmarks:
             return None
-        lm = res.multi_hand_landmarks[0]
-        pts = np.array([[p.x, p.y, p.z] for p in lm.landmark], dtype=np.float32)
-        return pts  # (21, 3)
+        from landmark_features import landmarks_to_array
+
+        return landmarks_to_array(res.multi_hand_landmarks[0])  # (21, 3)
 
 # ---------------------------
 # Schemas
@@ -131,26 +246,137 @@ def run_mediapipe_on_image(pil_img: Image.Image) -> Optional[np.ndarray]:
 class LandmarksPayload(BaseModel):
     # Flattened list length 63, or nested list [[x,y,z] * 21]
     landmarks: List[float] | List[List[float]]
+    labels: Optional[List[str]] = None  # optional allowlist of letters to score against
+    session_id: Optional[str] = None  # stream id; enables motion gating across calls
 
 class PredictResponse(BaseModel):
     letter: str
     confidence: float
     margin: float
     class_names: List[str]
+    stage: Optional[str] = None  # "fast" or "heavy" when the static cascade is active
+    reused: Optional[bool] = None  # True when the motion gate returned the previous result
 
 # ---------------------------
 # Routes
 # ---------------------------
+# Which registry slot backs each prediction route (reported by /health).
+ENDPOINT_MODELS = {
+    "/predict_landmarks": "static",
+    "/predict_image": "static",
+    "/decode_fingerspelling": "static",
+    "/predict_sequence": "sequence",
+    "/predict_sequence_batch": "sequence",
+    "/predict_dynamic": "dynamic",
+    "/predict_dynamic_landmarks": "dynamic_landmarks",
+    "/predict_fingerspelling": "ctc",
+}
+
 @app.get("/health")
 def health():
-    return {"status": "ok", "model_loaded": True, "num_classes": len(class_names)}
+    # Never blocks on a model load: the process is healthy as soon as it can serve HTTP.
+    static = registry.slot("static").active
+    ctc = registry.slot("ctc").active
+    models = registry.describe()
+    return {
+        "status": "ok",
+        "model_loaded": static is not None,
+        "num_classes": len(static.model.class_names) if static is not None else None,
+        "models": models,
+        "static_cascade": static.model.counts if static is not None and hasattr(static.model, "counts") else None,
+        "motion_sessions": len(motion_sessions),
+        "sequence_sessions": {"count": len(sequence_sessions), "bytes": sequence_sessions.bytes},
+        "capture": capture.describe() if capture is not None else None,
+        "ctc_batching": ctc.model.batcher.describe() if ctc is not None else None,
+        "endpoints": {route: models[name]["version"] for route, name in ENDPOINT_MODELS.items()},
+    }
 
 @app.get("/labels")
 def labels():
-    return {"class_names": class_names}
+    return {"class_names": registry.get("static").class_names}
+
+def require_admin(token: Optional[str]):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+class ReloadIn(BaseModel):
+    model: Optional[str] = None  # registry name; None reloads every loaded model
+
+@app.post("/admin/reload")
+def admin_reload(payload: ReloadIn, x_admin_token: Optional[str] = Header(None)):
+    """Load new artifacts in the background; the current version serves until the swap."""
+    require_admin(x_admin_token)
+    if payload.model is not None:
+        if payload.model not in registry.names():
+            raise HTTPException(status_code=404, detail=f"Unknown model: {payload.model}")
+        names = [payload.model]
+    else:
+        names = [n for n, d in registry.describe().items() if d["loaded"]]
+    started = {name: registry.reload(name) for name in names}
+    return {"started": started, "models": registry.describe()}
+
+class ProfileIn(BaseModel):
+    route: str  # e.g. "/predict_dynamic"
+    requests: int = 20  # profile the next N requests; 0 cancels
+    sort: str = "cumulative"
+    limit: int = 30  # functions in the report
+
+@app.post("/admin/profile")
+def admin_profile(payload: ProfileIn, x_admin_token: Optional[str] = Header(None)):
+    """Arm cProfile for the next N requests of a route; read the result from GET /admin/profile."""
+    require_admin(x_admin_token)
+    if payload.sort not in SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {list(SORT_KEYS)}")
+    try:
+        profiler.arm(payload.route, payload.requests, payload.sort, payload.limit)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Route is not profilable: {payload.route}")
+    return profiler.report(payload.route)
+
+@app.get("/admin/profile")
+def admin_profile_report(route: str, x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    if route not in profiler.routes:
+        raise HTTPException(status_code=404, detail=f"Route is not profilable: {route}")
+    return profiler.report(route)
+
+class MemoryIn(BaseModel):
+    frames: int = 10  # traceback depth kept by tracemalloc
+
+@app.post("/admin/memory/start")
+def admin_memory_start(payload: MemoryIn, x_admin_token: Optional[str] = Header(None)):
+    """Start tracemalloc and take the baseline snapshot (tracing slows every allocation)."""
+    require_admin(x_admin_token)
+    memory.start(payload.frames)
+    return memory.describe()
+
+@app.post("/admin/memory/stop")
+def admin_memory_stop(x_admin_token: Optional[str] = Header(None)):
+    require_admin(x_admin_token)
+    memory.stop()
+    return memory.describe()
+
+@app.get("/admin/memory")
+def admin_memory(x_admin_token: Optional[str] = Header(None)):
+    """Traced totals and per-request peaks of memory-tracked routes."""
+    require_admin(x_admin_token)
+    return memory.describe()
+
+@app.get("/admin/memory/diff")
+def admin_memory_diff(limit: int = 20, x_admin_token: Optional[str] = Header(None)):
+    """Top allocation sites that grew since /admin/memory/start."""
+    require_admin(x_admin_token)
+    try:
+        return memory.diff(limit)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
 @app.post("/predict_landmarks", response_model=PredictResponse)
+@profiler.profiled("/predict_landmarks")
 def predict_landmarks(payload: LandmarksPayload):
+    t0 = time.perf_counter()
     # Normalize input to (21, 3)
     lms = payload.landmarks
     arr = np.array(lms, dtype=np.float32)
@@ -159,11 +385,19 @@ def predict_landmarks(payload: LandmarksPayload):
     if arr.shape != (21, 3):
         raise HTTPException(status_code=400, detail="Expected landmarks shape (21,3) or length 63.")
     x = landmarks_to_feature_np(arr)
-    letter, conf, margin = predict_from_feature(x)
-    return PredictResponse(letter=letter, confidence=conf, margin=margin, class_names=class_names)
+    if payload.session_id and MOTION_GATE_THRESHOLD > 0:
+        resp = gated_static_response(payload.session_id, x, payload.labels)
+    else:
+        resp = predict_static_response(x, payload.labels)
+    if capture is not None:
+        capture.offer("landmarks", "/predict_landmarks", arr, resp.model_dump(exclude={"class_names"}),
+                      time.perf_counter() - t0, labels=payload.labels, session_id=payload.session_id)
+    return resp
 
 @app.post("/predict_image", response_model=PredictResponse)
-async def predict_image(file: UploadFile = File(...)):
+@profiler.profiled("/predict_image")
+async def predict_image(file: UploadFile = File(...), labels: Optional[str] = Form(None)):
+    """labels: optional comma-separated allowlist, e.g. "E,T,A,O,I"."""
     # Decode image
     try:
         content = await file.read()
@@ -177,40 +411,215 @@ async def predict_image(file: UploadFile = File(...)):
         raise HTTPException(status_code=422, detail="No hand detected in the image")
 
     x = landmarks_to_feature_np(pts)
-    letter, conf, margin = predict_from_feature(x)
-    return PredictResponse(letter=letter, confidence=conf, margin=margin, class_names=class_names)
+    allowlist = [l for l in labels.split(",") if l.strip()] if labels else None
+    return predict_static_response(x, allowlist)
+
+class FingerspellIn(BaseModel):
+    session_id: str
+    vocabulary: List[str]  # lesson words; words with letters the model can't produce are skipped
+    frames: List[List[float]]  # new frames since the last call, each 63 raw landmarks
+    reset: bool = False  # start a new word
 
-_TEMPORAL = {"loaded": False, "runner": None}
+class FingerspellSegment(BaseModel):
+    letter: str
+    start: int  # frame index since the last reset (inclusive)
+    end: int
+
+class FingerspellOut(BaseModel):
+    word: Optional[str]  # best complete vocabulary word so far
+    score: Optional[float]  # its path log-probability
+    prefix: str  # letters spelled so far on the overall best path
+    frames: int
+    segments: List[FingerspellSegment]
+    skipped_words: List[str]
+
+fingerspell_sessions = SessionStore(ttl_s=SESSION_TTL)
+
+@app.post("/decode_fingerspelling", response_model=FingerspellOut)
+@profiler.profiled("/decode_fingerspelling")
+def decode_fingerspelling(inp: FingerspellIn):
+    """Incremental lexicon-constrained word decoding over streamed static-letter frames."""
+    from fingerspell_decoder import FingerspellDecoder, frame_log_probs, get_trie
+    from landmark_features import static_features
+
+    raw = np.asarray(inp.frames, dtype=np.float32)
+    if raw.size and (raw.ndim != 2 or raw.shape[1] != 63):
+        raise HTTPException(status_code=400, detail=f"Expected frames [t,63], got {list(raw.shape)}")
+    static = registry.get("static")
+    trie = get_trie(inp.vocabulary, static.class_names)
+    if not trie.words:
+        raise HTTPException(status_code=400, detail="No vocabulary word can be spelled with the model's letters.")
+
+    entry = fingerspell_sessions.get(inp.session_id)
+    if inp.reset or entry is None or entry[0] is not trie:
+        # New word, new vocabulary or new model class set.
+        entry = (trie, FingerspellDecoder(trie))
+        fingerspell_sessions.put(inp.session_id, entry)
+    decoder = entry[1]
+
+    if raw.size:
+        X = static_features(raw.reshape(-1, 21, 3))
+        out = decoder.push(frame_log_probs(static.scores(X), static.kind), segments=True)
+    else:
+        out = decoder.result()
+    return FingerspellOut(**out, skipped_words=trie.skipped)
+
+# ---------------------------
+# Fingerspelling CTC (dynamic/scripts)
+# ---------------------------
+CTC_MODEL_PATH = MODELS_DIR / "ctc.pt"
+CTC_INT8_PATH = MODELS_DIR / "ctc.int8.pt"
+MAX_CTC_FRAMES = 512  # a long request would pad every sequence in its batch
+
+class FingerspellCTCIn(BaseModel):
+    frames: List[List[float]]  # T x 150 frame_feat rows (dynamic/scripts/01_extract_from_csv_walk.py)
+    decoder: str = "greedy"  # "greedy" | "beam"
+    beam_width: int = 8
+    fps: Optional[float] = None  # when given, character timings are also reported in seconds
+
+class CTCChar(BaseModel):
+    char: str
+    start: int  # first frame (inclusive)
+    end: int  # last frame (inclusive)
+    confidence: float
+    start_s: Optional[float] = None
+    end_s: Optional[float] = None
+
+class FingerspellCTCOut(BaseModel):
+    text: str
+    decoder: str
+    frames: int
+    chars: List[CTCChar]
+
+def load_ctc_runner(models_dir: Path = MODELS_DIR):
+    from ctc_fingerspell import CTCFingerspeller
+    return CTCFingerspeller(models_dir / CTC_MODEL_PATH.name, max_batch=CTC_MAX_BATCH,
+                            max_wait_s=CTC_BATCH_WAIT_MS / 1000, quantized=CTC_QUANTIZED)
+
+def warmup_ctc_runner(runner):
+    runner.predict(np.zeros((16, runner.input_size), dtype=np.float32))
+
+@app.post("/predict_fingerspelling", response_model=FingerspellCTCOut)
+@profiler.profiled("/predict_fingerspelling")
+def predict_fingerspelling(inp: FingerspellCTCIn):
+    t0 = time.perf_counter()
+    if inp.decoder not in ("greedy", "beam"):
+        raise HTTPException(status_code=400, detail="decoder must be 'greedy' or 'beam'.")
+    try:
+        seq = np.asarray(inp.frames, dtype=np.float32)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Frame rows must all have the same length.")
+    try:
+        runner = registry.get("ctc")
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Fingerspelling model unavailable: {e}")
+    if seq.ndim != 2 or seq.shape[0] == 0 or seq.shape[1] != runner.input_size:
+        raise HTTPException(status_code=400, detail=f"Expected [t,{runner.input_size}], got {list(seq.shape)}")
+    if seq.shape[0] > MAX_CTC_FRAMES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_CTC_FRAMES} frames per request.")
+
+    out = runner.predict(seq, decoder=inp.decoder, beam_width=max(1, inp.beam_width))
+    if inp.fps:
+        for c in out["chars"]:
+            c["start_s"] = c["start"] / inp.fps
+            c["end_s"] = (c["end"] + 1) / inp.fps
+    resp = FingerspellCTCOut(decoder=inp.decoder, **out)
+    if capture is not None:
+        capture.offer("fingerspelling", "/predict_fingerspelling", seq, resp.model_dump(),
+                      time.perf_counter() - t0, decoder=inp.decoder)
+    return resp
 
 class SeqIn(BaseModel):
-    sequence: list[list[float]]  # T' x 63
+    sequence: list[list[float]]  # T' x 63 (T' x 126 for a two-hand checkpoint)
+
+def load_temporal_runner(models_dir: Path = MODELS_DIR):
+    from infer_temporal import TemporalInfer
+    return TemporalInfer(str(models_dir / SEQ_MODEL_PATH.name))
+
+def warmup_temporal_runner(runner):
+    runner.predict(np.zeros((runner.T, runner.in_dim), dtype=np.float32))
 
 def get_temporal_runner():
-    if not _TEMPORAL["loaded"]:
-        from infer_temporal import TemporalInfer
-        _TEMPORAL["runner"] = TemporalInfer("models/seq_model.pt")
-        _TEMPORAL["loaded"] = True
-    return _TEMPORAL["runner"]
+    return registry.get("sequence")
 
 @app.post("/predict_sequence")
+@profiler.profiled("/predict_sequence")
 def predict_sequence(inp: SeqIn):
+    t0 = time.perf_counter()
     seq = np.asarray(inp.sequence, dtype=np.float32)  # [t,63]
-    if seq.ndim != 2 or seq.shape[1] != 63:
-        return {"error": f"Expected [t,63], got {list(seq.shape)}"}
     runner = get_temporal_runner()
+    if seq.ndim != 2 or seq.shape[1] != runner.in_dim:
+        return {"error": f"Expected [t,{runner.in_dim}], got {list(seq.shape)}"}
     out = runner.predict(seq)
-    return {"letter": out["label"], "confidence": out["confidence"], "margin": out["margin"]}
+    resp = {"letter": out["label"], "confidence": out["confidence"], "margin": out["margin"]}
+    if capture is not None:
+        capture.offer("sequence", "/predict_sequence", seq, resp, time.perf_counter() - t0)
+    return resp
+
+MAX_SEQUENCE_BATCH = 256
+
+class SeqBatchIn(BaseModel):
+    sequences: List[List[List[float]]]  # N x T_i x 63, lengths may differ
+
+@app.post("/predict_sequence_batch")
+@profiler.profiled("/predict_sequence_batch")
+def predict_sequence_batch(inp: SeqBatchIn):
+    """Many windows (e.g. an uploaded recording) in one normalization pass and one forward."""
+    if not inp.sequences:
+        raise HTTPException(status_code=400, detail="No sequences provided.")
+    if len(inp.sequences) > MAX_SEQUENCE_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SEQUENCE_BATCH} sequences per request.")
+    runner = get_temporal_runner()
+    try:
+        seqs = [np.asarray(s, dtype=np.float32) for s in inp.sequences]
+        outs = runner.predict_batch(seqs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"results": [{"letter": o["label"], "confidence": o["confidence"], "margin": o["margin"]} for o in outs]}
+
+sequence_sessions = SessionStore(ttl_s=SESSION_TTL, max_bytes=int(SEQ_SESSION_MEMORY_MB * 2**20),
+                                 sizeof=lambda stream: stream.nbytes)
+
+class SeqStreamIn(BaseModel):
+    session_id: str
+    frames: List[List[float]] = []  # only the frames captured since the previous call (t x 63)
+    reset: bool = False  # start a new sign
+
+@app.post("/predict_sequence_stream")
+@profiler.profiled("/predict_sequence_stream")
+def predict_sequence_stream(inp: SeqStreamIn):
+    """Incremental /predict_sequence: the server keeps the window (or LSTM state) per session."""
+    from sequence_sessions import SequenceStream
 
+    runner = get_temporal_runner()
+    try:
+        raw = np.asarray(inp.frames, dtype=np.float32) if inp.frames else np.zeros((0, runner.in_dim), np.float32)
+    except ValueError as e:  # ragged rows
+        raise HTTPException(status_code=400, detail=str(e))
+    if raw.ndim != 2 or raw.shape[1] != runner.in_dim:
+        raise HTTPException(status_code=400, detail=f"Expected [t,{runner.in_dim}], got {list(raw.shape)}")
+    if inp.reset:
+        sequence_sessions.pop(inp.session_id)
+    stream = sequence_sessions.get(inp.session_id)
+    new = stream is None or stream.runner is not runner  # new session, reset or reloaded model
+    if new:
+        stream = SequenceStream(runner)
+    try:
+        out = stream.append(raw)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if new:  # only streams that hold frames take a session slot
+        sequence_sessions.put(inp.session_id, stream)
+    return {"letter": out["label"], "confidence": out["confidence"], "margin": out["margin"],
+            "frames": stream.frames, "mode": stream.mode}
 
-SEQ_LABELS_JSON = Path("models/seq_labels.json")
 
 @app.get("/seq_labels")
 def seq_labels():
     if not SEQ_LABELS_JSON.exists():
         # Fallback: try to read labels from temporal checkpoint
         try:
-            from infer_temporal import TemporalInfer
-            runner = TemporalInfer("models/seq_model.pt")
+            runner = get_temporal_runner()
             labels = runner.labels or []
         except Exception:
             labels = []
@@ -223,7 +632,12 @@ def seq_labels():
 # ---------------------------
 # Dynamic sign inference (I3D / WLASL)
 # ---------------------------
-_DYNAMIC = {"loaded": False, "runner": None}
+DYNAMIC_DIR = Path(__file__).resolve().parent / "WLASL" / "wlasl_model_test"
+DYNAMIC_WEIGHTS = DYNAMIC_DIR / "nslt_100.pt"
+DYNAMIC_LABELS = DYNAMIC_DIR / "wlasl_class_list_100.txt"
+# Unix socket of a dynamic_worker.py worker or broker; empty runs I3D in-process.
+DYNAMIC_WORKER_SOCKET = os.environ.get("DYNAMIC_WORKER_SOCKET", "")
+DYNAMIC_WORKER_POOL = int(os.environ.get("DYNAMIC_WORKER_POOL", "4"))
 
 class DynamicFramesIn(BaseModel):
     frames: List[str]  # base64 JPEGs, optional data URL prefix
@@ -245,155 +659,25 @@ def decode_base64_frame(b64: str) -> np.ndarray:
     pil = Image.open(io.BytesIO(data)).convert("RGB")
     return np.array(pil)
 
-class WLASLDynamicPredictor:
-    def __init__(self, weights_path: Path, class_list_path: Path):
-        try:
-            import cv2  # noqa: F401
-            import torch  # noqa: F401
-            from collections import OrderedDict  # noqa: F401
-        except Exception as e:
-            raise RuntimeError(f"Missing dynamic inference deps: {e}")
-
-        import cv2
-        import torch
-        from collections import OrderedDict
-
-        repo_root = Path(__file__).resolve().parent
-        i3d_dir = repo_root / "WLASL" / "wlasl_model_test"
-        sys.path.append(str(i3d_dir))
-        from pytorch_i3d import InceptionI3d  # type: ignore
-
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.num_classes = 100
-        # Default to the full WLASL-100 head. Callers can still request an allowlist at inference time.
-        self.allowed_class_count = self.num_classes
-        self.model = InceptionI3d(num_classes=self.num_classes, in_channels=3)
-
-        if not weights_path.exists():
-            raise FileNotFoundError(f"Weights file not found: {weights_path}")
-
-        checkpoint = torch.load(weights_path, map_location=self.device)
-        state_dict = checkpoint["state_dict"] if "state_dict" in checkpoint else checkpoint
-
-        new_state_dict = OrderedDict()
-        for k, v in state_dict.items():
-            name = k.replace("module.", "")
-            new_state_dict[name] = v
-
-        self.model.load_state_dict(new_state_dict)
-        self.model.to(self.device)
-        self.model.eval()
-
-        self.classes = self._load_classes(class_list_path, limit=self.allowed_class_count)
-        # Case-insensitive lookup for allowlisting.
-        self.word_to_idx: Dict[str, int] = {}
-        for idx, word in self.classes.items():
-            key = word.strip().lower()
-            if key and key not in self.word_to_idx:
-                self.word_to_idx[key] = idx
-        self._cv2 = cv2
-        self._torch = torch
-
-    def _load_classes(self, path: Path, limit: Optional[int] = None) -> dict:
-        if not path.exists():
-            return {}
-        idx_to_word = {}
-        for line in path.read_text().splitlines():
-            parts = line.strip().split()
-            if len(parts) < 2:
-                continue
-            idx = int(parts[0])
-            if limit and idx >= limit:
-                continue
-            idx_to_word[idx] = " ".join(parts[1:])
-        return idx_to_word
-
-    def preprocess_frames(self, frames: List[np.ndarray], target_frames: int = 64):
-        if not frames:
-            return None
-        processed = []
-        for frame in frames:
-            h, w = frame.shape[:2]
-            scale = 224 / min(h, w)
-            new_h, new_w = int(h * scale), int(w * scale)
-            resized = self._cv2.resize(frame, (new_w, new_h))
-            start_y = (new_h - 224) // 2
-            start_x = (new_w - 224) // 2
-            crop = resized[start_y : start_y + 224, start_x : start_x + 224]
-            crop = (crop.astype(np.float32) / 255.0) * 2 - 1
-            processed.append(crop)
-
-        video_array = np.array(processed, dtype=np.float32)
-        curr_frames = video_array.shape[0]
-        if curr_frames < target_frames:
-            if curr_frames == 0:
-                return None
-            padding = np.tile(video_array[-1], (target_frames - curr_frames, 1, 1, 1))
-            video_array = np.concatenate((video_array, padding), axis=0)
-        elif curr_frames > target_frames:
-            indices = np.linspace(0, curr_frames - 1, target_frames).astype(int)
-            video_array = video_array[indices]
-
-        tensor = self._torch.from_numpy(video_array).permute(3, 0, 1, 2).unsqueeze(0)
-        return tensor.to(self.device)
-
-    def predict(self, frames: List[np.ndarray], focus_labels: Optional[List[str]] = None) -> dict:
-        input_tensor = self.preprocess_frames(frames)
-        if input_tensor is None:
-            return {"error": "No frames to process."}
-
-        with self._torch.no_grad():
-            output = self.model(input_tensor)
-            if output.shape[2] > 1:
-                output = self._torch.max(output, dim=2)[0]
-            else:
-                output = output.squeeze(2)
-
-            restricted_logits = output[:, : self.allowed_class_count]
-
-            # If the client passes an allowlist of labels, score only those classes (softmax over the subset).
-            allowed_indices: Optional[List[int]] = None
-            if focus_labels:
-                allowed_indices = []
-                for label in focus_labels:
-                    if not label:
-                        continue
-                    idx = self.word_to_idx.get(label.strip().lower())
-                    if idx is not None and idx < self.allowed_class_count:
-                        allowed_indices.append(idx)
-                allowed_indices = sorted(set(allowed_indices))
-                if not allowed_indices:
-                    allowed_indices = None
-
-            if allowed_indices:
-                subset_logits = restricted_logits[:, allowed_indices]
-                probs = self._torch.nn.functional.softmax(subset_logits, dim=1)
-                topk = min(10, probs.shape[1])
-                vals, sub_idxs = self._torch.topk(probs, topk)
-                idxs = self._torch.tensor([[allowed_indices[i] for i in sub_idxs[0].tolist()]], device=restricted_logits.device)
-            else:
-                probs = self._torch.nn.functional.softmax(restricted_logits, dim=1)
-                topk = min(10, probs.shape[1])
-                vals, idxs = self._torch.topk(probs, topk)
-
-            top10 = []
-            for i, v in zip(idxs[0].tolist(), vals[0].tolist()):
-                label = self.classes.get(i, f"Unknown ({i})")
-                top10.append({"label": label, "score": float(v)})
-
-        return {"top10": top10, "used_frames": int(input_tensor.shape[2])}
-
-def get_dynamic_runner():
-    if not _DYNAMIC["loaded"]:
-        repo_root = Path(__file__).resolve().parent
-        weights = repo_root / "WLASL" / "wlasl_model_test" / "nslt_100.pt"
-        labels = repo_root / "WLASL" / "wlasl_model_test" / "wlasl_class_list_100.txt"
-        _DYNAMIC["runner"] = WLASLDynamicPredictor(weights_path=weights, class_list_path=labels)
-        _DYNAMIC["loaded"] = True
-    return _DYNAMIC["runner"]
+def load_dynamic_runner():
+    if DYNAMIC_WORKER_SOCKET:
+        from dynamic_worker import DynamicWorkerClient
+        return DynamicWorkerClient(DYNAMIC_WORKER_SOCKET, pool_size=DYNAMIC_WORKER_POOL)
+    from wlasl_dynamic import WLASLDynamicPredictor
+    return WLASLDynamicPredictor(weights_path=DYNAMIC_WEIGHTS, class_list_path=DYNAMIC_LABELS)
+
+def warmup_dynamic_runner(runner):
+    runner.predict([np.zeros((224, 224, 3), dtype=np.uint8)])
+
+def dynamic_runner_version(runner) -> str:
+    # The workers serve whatever weights they loaded; the local file says nothing about them.
+    return runner.served_version()
 
 @app.post("/predict_dynamic", response_model=DynamicPredictResponse)
+@profiler.profiled("/predict_dynamic")
+@memory.tracked("/predict_dynamic")
 def predict_dynamic(payload: DynamicFramesIn):
+    t0 = time.perf_counter()
     if not payload.frames:
         raise HTTPException(status_code=400, detail="No frames provided.")
     try:
@@ -402,16 +686,93 @@ def predict_dynamic(payload: DynamicFramesIn):
         raise HTTPException(status_code=400, detail=f"Invalid frame data: {e}")
 
     try:
-        runner = get_dynamic_runner()
-        out = runner.predict(frames, focus_labels=payload.labels)
+        # A lease keeps a hot reload from closing the worker client mid-request.
+        with registry.lease("dynamic") as runner:
+            out = runner.predict(frames, focus_labels=payload.labels)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Dynamic inference failed: {e}")
 
     if "error" in out:
         raise HTTPException(status_code=400, detail=out["error"])
 
-    return DynamicPredictResponse(
+    resp = DynamicPredictResponse(
         top10=[DynamicPredItem(**item) for item in out["top10"]],
         raw_frames=len(frames),
         used_frames=out.get("used_frames", 64),
     )
+    if capture is not None:
+        capture.offer("dynamic", "/predict_dynamic", payload.frames, resp.model_dump(),
+                      time.perf_counter() - t0, labels=payload.labels)
+    return resp
+
+
+# ---------------------------
+# Dynamic signs from landmark sequences (Module 3)
+# ---------------------------
+# train_temporal.py --name dyn_seq on collect_sequences.py --two-hands clips of the Module 3 words.
+DYN_SEQ_MODEL_PATH = MODELS_DIR / "dyn_seq_model.pt"
+DYN_SEQ_INT8_PATH = MODELS_DIR / "dyn_seq_model.int8.pt"  # same sequence backend as SEQ_INT8_PATH
+DYN_SEQ_LABELS_JSON = MODELS_DIR / "dyn_seq_labels.json"
+
+class DynamicLandmarksIn(BaseModel):
+    sequence: List[List[float]]  # T' x 126 (left | right hand, absent hand = zeros), or T' x 63
+    labels: Optional[List[str]] = None  # optional allowlist, as for /predict_dynamic
+
+def load_dynamic_landmarks_runner(models_dir: Path = MODELS_DIR):
+    from infer_temporal import TemporalInfer
+    return TemporalInfer(str(models_dir / DYN_SEQ_MODEL_PATH.name))
+
+def get_dynamic_landmarks_runner():
+    return registry.get("dynamic_landmarks")
+
+@app.post("/predict_dynamic_landmarks", response_model=DynamicPredictResponse)
+@profiler.profiled("/predict_dynamic_landmarks")
+def predict_dynamic_landmarks(payload: DynamicLandmarksIn):
+    """Landmark-sequence counterpart of /predict_dynamic: same response, KBs instead of MBs of JPEGs."""
+    t0 = time.perf_counter()
+    try:
+        seq = np.asarray(payload.sequence, dtype=np.float32)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Sequence rows must all have the same length.")
+    if seq.size == 0:
+        raise HTTPException(status_code=400, detail="No frames provided.")
+    try:
+        runner = get_dynamic_landmarks_runner()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Dynamic landmark model unavailable: {e}")
+    if seq.ndim != 2 or seq.shape[1] != runner.in_dim:
+        raise HTTPException(status_code=400, detail=f"Expected [t,{runner.in_dim}], got {list(seq.shape)}")
+
+    out = runner.predict_topk(seq, focus_labels=payload.labels)
+    resp = DynamicPredictResponse(
+        # Lowercase like the WLASL glosses, so clients can switch endpoints unchanged.
+        top10=[DynamicPredItem(label=item["label"].lower(), score=item["score"]) for item in out["top10"]],
+        raw_frames=int(seq.shape[0]),
+        used_frames=out["used_frames"],
+    )
+    if capture is not None:
+        capture.offer("dynamic_landmarks", "/predict_dynamic_landmarks", seq, resp.model_dump(),
+                      time.perf_counter() - t0, labels=payload.labels)
+    return resp
+
+
+# ---------------------------
+# Model registry
+# ---------------------------
+# Every slot loads on first use; PRELOAD_MODELS warms the listed ones right after startup.
+registry.register("static", [MODEL_PATH, CLASSES_PATH, HEAVY_MODEL_PATH, CASCADE_PATH], load_static_model,
+                  warmup=warmup_static_model, lazy=True)
+# The int8 checkpoints are watched whatever the backend: the backend may come from models/backends.json
+# and resolving it here would import numpy at startup. Other backends just never read the files.
+registry.register("sequence", [SEQ_MODEL_PATH, SEQ_LABELS_JSON, SEQ_INT8_PATH], load_temporal_runner,
+                  warmup=warmup_temporal_runner, lazy=True)
+registry.register("dynamic_landmarks", [DYN_SEQ_MODEL_PATH, DYN_SEQ_LABELS_JSON, DYN_SEQ_INT8_PATH],
+                  load_dynamic_landmarks_runner,
+                  warmup=warmup_temporal_runner, lazy=True)
+registry.register("ctc", [CTC_MODEL_PATH, CTC_INT8_PATH] if CTC_QUANTIZED else [CTC_MODEL_PATH], load_ctc_runner, warmup=warmup_ctc_runner, lazy=True)
+if DYNAMIC_WORKER_SOCKET:  # versioned by the workers; reload with POST /admin/reload after redeploying them
+    registry.register("dynamic", [], load_dynamic_runner, warmup=warmup_dynamic_runner, lazy=True,
+                      version=dynamic_runner_version)
+else:
+    registry.register("dynamic", [DYNAMIC_WEIGHTS, DYNAMIC_LABELS], load_dynamic_runner,
+                      warmup=warmup_dynamic_runner, lazy=True)
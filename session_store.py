@@ -0,0 +1,78 @@
+# session_store.py
+"""Small thread-safe LRU of per-client state with idle expiry and optional byte budget."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class SessionStore:
+    def __init__(self, ttl_s: float = 300.0, max_sessions: int = 10000, max_bytes: int = 0,
+                 sizeof: Optional[Callable[[Any], int]] = None):
+        """max_bytes > 0 also evicts least recently used sessions while sizeof(value) sums above it."""
+        self.ttl_s = ttl_s
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.bytes = 0
+        self._items: "OrderedDict[Hashable, list]" = OrderedDict()  # key -> [value, last_used, nbytes]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _size(self, value: Any) -> int:
+        return self.sizeof(value) if self.sizeof is not None else 0
+
+    def _expire(self, now: float, keep: Optional[Hashable] = None):
+        while self._items:
+            key, (_, last, _) = next(iter(self._items.items()))
+            over_bytes = self.max_bytes > 0 and self.bytes > self.max_bytes
+            if now - last <= self.ttl_s and len(self._items) <= self.max_sessions and not over_bytes:
+                break
+            if key == keep:  # never evict the session being returned
+                break
+            self.bytes -= self._items.popitem(last=False)[1][2]
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            item = self._items.get(key)
+            if item is None:
+                return None
+            item[1] = now
+            self._items.move_to_end(key)
+            return item[0]
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                value = factory()
+                item = [value, now, self._size(value)]
+                self._items[key] = item
+                self.bytes += item[2]
+            item[1] = now
+            self._items.move_to_end(key)
+            self._expire(now, keep=key)
+            return item[0]
+
+    def put(self, key: Hashable, value: Any):
+        now = time.monotonic()
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            self._items[key] = [value, now, self._size(value)]
+            self.bytes += self._items[key][2]
+            self._expire(now, keep=key)
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._items.pop(key, None)
+            if item is None:
+                return None
+            self.bytes -= item[2]
+            return item[0]
@@ -0,0 +1,224 @@
+# static_scorer.py
+"""
+Static letter scoring with optional label allowlists.
+
+Linear pipelines (StandardScaler + LinearSVC / LogisticRegression) are folded
+into a single weight matrix W (classes x 63) and bias b, so scoring is one
+small matmul instead of a round trip through sklearn. For an allowlist only
+the matching rows of W and b are used; those submatrices are built once per
+distinct allowlist and cached. Softmax and margin are computed over the
+scored subset, which gives sharper margins for a lesson's letter set.
+
+Non-linear models (RBF SVM, MLP) score every class and the allowlisted
+columns are selected afterwards.
+
+CascadeScorer answers with a cheap (linear) scorer when its margin clears a
+threshold and only sends ambiguous frames to a heavier model; see
+tune_cascade.py for choosing the threshold.
+"""
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def fold_linear_pipeline(clf) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Return (W, b) with scores = x @ W.T + b, or None if clf is not a foldable linear model."""
+    steps = getattr(clf, "named_steps", None)
+    if steps is None:
+        est, scaler = clf, None
+    else:
+        parts = list(steps.values())
+        est = parts[-1]
+        scaler = parts[0] if len(parts) == 2 else None
+        if len(parts) > 2:
+            return None
+    coef = getattr(est, "coef_", None)
+    intercept = getattr(est, "intercept_", None)
+    # Only one-vs-rest linear heads (one row per class); binary heads have a single row
+    # and SVC (support_) is one-vs-one even with a linear kernel.
+    if coef is None or intercept is None or coef.ndim != 2 or hasattr(est, "support_"):
+        return None
+    if coef.shape[0] < 3 or coef.shape[0] != len(getattr(est, "classes_", [])):
+        return None
+    W = np.asarray(coef, dtype=np.float64)
+    b = np.asarray(intercept, dtype=np.float64).ravel()
+    if scaler is not None:
+        if type(scaler).__name__ != "StandardScaler":
+            return None
+        scale = getattr(scaler, "scale_", None)
+        mean = getattr(scaler, "mean_", None)
+        if scale is not None:
+            W = W / np.asarray(scale, dtype=np.float64)[None, :]
+        if mean is not None:
+            b = b - W @ np.asarray(mean, dtype=np.float64)
+    return np.ascontiguousarray(W), b
+
+
+def margin_from_scores(scores: np.ndarray) -> float:
+    """scores: 1D array of per-class decision_function or probs."""
+    if scores.ndim != 1 or scores.size < 2:
+        return 0.0
+    top2 = np.partition(scores, -2)[-2:]
+    return float(top2.max() - top2.min())
+
+
+class ScoreSubset:
+    """Precomputed view of the scorer for one allowlist (None = all classes)."""
+
+    def __init__(self, indices: Optional[np.ndarray], class_names: List[str],
+                 W: Optional[np.ndarray], b: Optional[np.ndarray]):
+        self.indices = indices
+        self.class_names = class_names
+        self.W = W
+        self.b = b
+
+
+class StaticScorer:
+    MAX_CACHED_SUBSETS = 128
+
+    def __init__(self, clf, class_names: Sequence[str], fold: bool = True):
+        """fold=False always scores through sklearn (the "sklearn" inference backend)."""
+        self.clf = clf
+        self.class_names = list(class_names)
+        self._label_to_idx: Dict[str, int] = {}
+        for i, name in enumerate(self.class_names):
+            self._label_to_idx.setdefault(name.strip().upper(), i)
+        folded = fold_linear_pipeline(clf) if fold else None
+        self.kind = "linear" if folded is not None else ("decision" if hasattr(clf, "decision_function") else "proba")
+        W, b = folded if folded is not None else (None, None)
+        self._full = ScoreSubset(None, self.class_names, W, b)
+        self._subsets: "OrderedDict[tuple, ScoreSubset]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self) -> str:
+        return "numpy" if self.kind == "linear" else "sklearn"
+
+    def subset(self, labels: Optional[Sequence[str]] = None) -> ScoreSubset:
+        """
+        Resolve an allowlist (case-insensitive, unknown labels ignored) to a cached
+        subset. An empty or fully unknown allowlist scores every class.
+        """
+        if not labels:
+            return self._full
+        idx = sorted({self._label_to_idx[k] for k in (str(l).strip().upper() for l in labels if l)
+                      if k in self._label_to_idx})
+        if not idx or len(idx) == len(self.class_names):
+            return self._full
+        key = tuple(idx)
+        with self._lock:
+            sub = self._subsets.get(key)
+            if sub is not None:
+                self._subsets.move_to_end(key)
+                return sub
+        indices = np.asarray(idx, dtype=np.intp)
+        full = self._full
+        sub = ScoreSubset(
+            indices,
+            [self.class_names[i] for i in idx],
+            np.ascontiguousarray(full.W[indices]) if full.W is not None else None,
+            full.b[indices].copy() if full.b is not None else None,
+        )
+        with self._lock:
+            self._subsets[key] = sub
+            while len(self._subsets) > self.MAX_CACHED_SUBSETS:
+                self._subsets.popitem(last=False)
+        return sub
+
+    def scores(self, X: np.ndarray, sub: Optional[ScoreSubset] = None) -> np.ndarray:
+        """X: (N, 63) -> (N, k) decision scores (or probabilities for proba-only models)."""
+        sub = sub or self._full
+        if sub.W is not None:
+            return X.astype(np.float64, copy=False) @ sub.W.T + sub.b
+        if self.kind == "decision":
+            out = np.asarray(self.clf.decision_function(X))
+        else:
+            out = np.asarray(self.clf.predict_proba(X))
+        if out.ndim == 1:
+            out = out[:, None]
+        if sub.indices is not None:
+            out = out[:, sub.indices]
+            if self.kind == "proba":
+                out = out / np.maximum(out.sum(axis=1, keepdims=True), 1e-12)
+        return out
+
+    def predict(self, x: np.ndarray, labels: Optional[Sequence[str]] = None) -> dict:
+        """
+        x: (1, 63). Returns letter, confidence, margin and the scored class_names.
+        confidence is a softmax over decision scores if available; else max prob.
+        margin is top2 difference (higher = more separation).
+        """
+        sub = self.subset(labels)
+        return self.result_from_row(self.scores(x, sub)[0], sub)
+
+    def result_from_row(self, row: np.ndarray, sub: ScoreSubset) -> dict:
+        pred_idx = int(np.argmax(row))
+        margin = margin_from_scores(row)
+        if self.kind == "proba":
+            conf = float(row[pred_idx])
+        else:
+            # Convert decision scores to pseudo-prob via softmax for readability
+            exps = np.exp(row - row[pred_idx])
+            conf = float(1.0 / exps.sum())
+        return {
+            "letter": sub.class_names[pred_idx],
+            "confidence": conf,
+            "margin": margin,
+            "class_names": sub.class_names,
+        }
+
+
+class CascadeScorer:
+    """
+    Two-stage static scorer. The fast stage answers when its top-2 margin is at
+    least `threshold`; otherwise (optionally only when its top-2 letters are a
+    known confusion pair) the heavy stage rescores the frame.
+    """
+
+    def __init__(self, fast: StaticScorer, heavy: StaticScorer, threshold: float,
+                 confusion_pairs: Optional[Sequence[Sequence[str]]] = None):
+        if fast.class_names != heavy.class_names:
+            raise ValueError("Cascade stages must share class_names.")
+        self.fast = fast
+        self.heavy = heavy
+        self.class_names = fast.class_names
+        self.kind = fast.kind
+        self.backend = f"{fast.backend}+{heavy.backend}"
+        self.threshold = float(threshold)
+        self.confusion_pairs = {frozenset(p) for p in (confusion_pairs or []) if len(p) == 2}
+        self.counts = {"fast": 0, "heavy": 0}
+
+    @classmethod
+    def from_config(cls, fast: StaticScorer, heavy: StaticScorer, config_path: Path) -> "CascadeScorer":
+        cfg = json.loads(Path(config_path).read_text())
+        pairs = cfg.get("confusion_pairs") if cfg.get("route") == "pairs" else None
+        return cls(fast, heavy, cfg["threshold"], pairs)
+
+    def needs_heavy(self, row: np.ndarray, names: List[str]) -> bool:
+        if row.size < 2 or margin_from_scores(row) >= self.threshold:
+            return False
+        if not self.confusion_pairs:
+            return True
+        top2 = np.argpartition(row, -2)[-2:]
+        return frozenset(names[i] for i in top2) in self.confusion_pairs
+
+    def scores(self, X: np.ndarray, sub: Optional[ScoreSubset] = None) -> np.ndarray:
+        return self.fast.scores(X, sub)
+
+    def subset(self, labels: Optional[Sequence[str]] = None) -> ScoreSubset:
+        return self.fast.subset(labels)
+
+    def predict(self, x: np.ndarray, labels: Optional[Sequence[str]] = None) -> dict:
+        sub = self.fast.subset(labels)
+        row = self.fast.scores(x, sub)[0]
+        if self.needs_heavy(row, sub.class_names):
+            stage, out = "heavy", self.heavy.predict(x, labels)
+        else:
+            stage, out = "fast", self.fast.result_from_row(row, sub)
+        self.counts[stage] += 1
+        out["stage"] = stage
+        return out
@@ -25,3 +25,114 @@ class SignSeqModel(nn.Module):
         y, _ = self.lstm(x)
         y_last = y[:, -1, :]    # last timestep pooling
         return self.head(y_last)
+
+    def step(self, x, state=None):  # x: [B, t, 63] new frames; state: (h, c) from the previous call
+        """Unidirectional models only: continue the LSTM from `state` -> (logits, state)."""
+        assert not self.lstm.bidirectional, "step() needs a unidirectional LSTM"
+        y, state = self.lstm(x, state)
+        return self.head(y[:, -1, :]), state
+
+
+class CausalConv(nn.Module):
+    """
+    Dilated causal convolution over channels-last [B, T, C]: each output frame
+    sees frames t, t - d, ..., t - (k-1)d (zeros before the start). The k taps
+    are gathered side by side and hit one Linear, which runs several times
+    faster on CPU than Conv1d at batch 1.
+    """
+    def __init__(self, in_ch, out_ch, kernel_size, dilation=1):
+        super().__init__()
+        self.kernel_size = kernel_size
+        self.dilation = dilation
+        self.in_channels = in_ch
+        self.context = (kernel_size - 1) * dilation  # past frames each output needs
+        self.proj = nn.Linear(kernel_size * in_ch, out_ch)
+
+    def _taps(self, x):  # x: [B, context + t, C] -> [B, t, k * C]
+        t = x.shape[1] - self.context
+        return torch.cat([x[:, j * self.dilation : j * self.dilation + t] for j in range(self.kernel_size)], dim=2)
+
+    def forward(self, x):
+        return self.proj(self._taps(nn.functional.pad(x, (0, 0, self.context, 0))))
+
+    def step(self, x, past):  # x: [B, t, C]; past: [B, context, C] inputs from the previous call
+        x = torch.cat([past, x], dim=1)
+        return self.proj(self._taps(x)), x[:, x.shape[1] - self.context :]
+
+
+class TCNBlock(nn.Module):
+    def __init__(self, in_ch, out_ch, kernel_size, dilation, dropout):
+        super().__init__()
+        self.conv1 = CausalConv(in_ch, out_ch, kernel_size, dilation)
+        self.conv2 = CausalConv(out_ch, out_ch, kernel_size, dilation)
+        self.drop = nn.Dropout(dropout)
+        self.skip = nn.Linear(in_ch, out_ch) if in_ch != out_ch else nn.Identity()
+
+    def forward(self, x):
+        y = self.drop(torch.relu(self.conv1(x)))
+        y = self.drop(torch.relu(self.conv2(y)))
+        return torch.relu(y + self.skip(x))
+
+    def step(self, x, past):
+        y, p1 = self.conv1.step(x, past[0])
+        y, p2 = self.conv2.step(torch.relu(y), past[1])
+        return torch.relu(torch.relu(y) + self.skip(x)), (p1, p2)
+
+
+class SignTCNModel(nn.Module):
+    """
+    Dilated causal temporal convolutions (dilation 1, 2, 4, ... per block) with
+    last-frame pooling, as a faster, streamable alternative to the LSTM. The
+    receptive field is 1 + 2 * (kernel_size - 1) * (2**num_layers - 1) frames.
+    """
+    def __init__(self, in_dim=63, hidden=128, num_layers=4, num_classes=10, kernel_size=3, dropout=0.2):
+        super().__init__()
+        self.blocks = nn.ModuleList(
+            TCNBlock(in_dim if i == 0 else hidden, hidden, kernel_size, 2 ** i, dropout)
+            for i in range(num_layers)
+        )
+        self.receptive_field = 1 + 2 * (kernel_size - 1) * (2 ** num_layers - 1)
+        self.head = nn.Sequential(
+            nn.LayerNorm(hidden),
+            nn.Linear(hidden, 128),
+            nn.ReLU(),
+            nn.Dropout(0.2),
+            nn.Linear(128, num_classes),
+        )
+
+    def forward(self, x):  # x: [B, T, in_dim]
+        for block in self.blocks:
+            x = block(x)
+        return self.head(x[:, -1, :])
+
+    def step(self, x, state=None):  # x: [B, t, in_dim] new frames; state: per-conv past inputs
+        """Continue from `state` (None: start of the stream) -> (logits, state); matches forward() on all frames."""
+        if state is None:
+            state = [tuple(x.new_zeros(x.shape[0], conv.context, conv.in_channels) for conv in (b.conv1, b.conv2))
+                     for b in self.blocks]
+        new_state = []
+        for block, past in zip(self.blocks, state):
+            x, past = block.step(x, past)
+            new_state.append(past)
+        return self.head(x[:, -1, :]), new_state
+
+
+def build_seq_model(cfg: dict, num_classes: int) -> nn.Module:
+    """model_cfg (train_temporal.py checkpoints) -> untrained module; "arch" defaults to the LSTM."""
+    arch = cfg.get("arch", "lstm")
+    if arch == "lstm":
+        return SignSeqModel(in_dim=cfg["in_dim"], hidden=cfg["hidden"], num_layers=cfg["layers"],
+                            num_classes=num_classes, bidirectional=cfg.get("bidirectional", True))
+    if arch == "tcn":
+        return SignTCNModel(in_dim=cfg["in_dim"], hidden=cfg["hidden"], num_layers=cfg["layers"],
+                            num_classes=num_classes, kernel_size=cfg.get("kernel_size", 3))
+    raise ValueError(f"Unknown sequence model arch {arch!r}")
+
+
+def stream_state_floats(cfg: dict) -> int:
+    """Floats of step() state per stream: LSTM (h, c), or the TCN's buffered past conv inputs."""
+    if cfg.get("arch", "lstm") == "lstm":
+        return 2 * cfg["layers"] * cfg["hidden"]
+    k = cfg.get("kernel_size", 3)
+    return sum(((cfg["in_dim"] if i == 0 else cfg["hidden"]) + cfg["hidden"]) * (k - 1) * 2 ** i
+               for i in range(cfg["layers"]))
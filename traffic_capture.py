@@ -0,0 +1,167 @@
+# traffic_capture.py
+"""
+Sampled, append-only binary capture of inference traffic (see replay_capture.py).
+
+File layout: MAGIC, then one record per sampled request:
+
+    <I  meta length>  <I  payload length>  <meta JSON>  <payload>
+
+meta holds the route, wall-clock time, server-side latency, request options
+(labels, session_id) and the model output. The payload is compact:
+- landmarks / sequence / dynamic_landmarks / fingerspelling: raw float32 array bytes (shape in meta)
+- dynamic: the client's encoded frames (JPEG/PNG bytes) back to back, with
+  their lengths in meta (decoded frames would be ~100x larger)
+
+The request path only draws a random number and, if sampled, does a
+non-blocking put on a bounded queue. Encoding and disk writes happen on a
+background thread. When the queue is full the record is dropped and counted,
+so a slow disk can never add request latency.
+"""
+import base64
+import json
+import os
+import queue
+import random
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+MAGIC = b"SGSLCAP1"
+_HEADER = struct.Struct("<II")
+
+
+class CaptureRecord:
+    def __init__(self, meta: dict, payload):
+        self.meta = meta
+        self.payload = payload  # np.ndarray for array kinds, list of bytes for dynamic
+
+    @property
+    def kind(self) -> str:
+        return self.meta["kind"]
+
+
+class TrafficCapture:
+    def __init__(self, directory: Path, sample_rate: float = 0.01, dynamic_sample_rate: float = 0.0,
+                 max_queue: int = 1024, max_file_bytes: int = 256 << 20, flush_seconds: float = 1.0):
+        self.directory = Path(directory)
+        self.sample_rate = sample_rate
+        self.dynamic_sample_rate = dynamic_sample_rate
+        self.max_file_bytes = max_file_bytes
+        self.flush_seconds = flush_seconds
+        self.written = 0
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._file = None
+        self._path: Optional[Path] = None
+        self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+        self._thread.start()
+
+    # Request path ------------------------------------------------------------
+    def sampled(self, kind: str) -> bool:
+        rate = self.dynamic_sample_rate if kind == "dynamic" else self.sample_rate
+        return rate > 0 and random.random() < rate
+
+    def offer(self, kind: str, route: str, payload, output: dict, latency_s: float, **request):
+        """Queue a record if `kind` is sampled; never blocks. payload: array, or base64 frames for dynamic."""
+        if not self.sampled(kind):
+            return
+        item = (kind, route, time.time(), latency_s, payload, output, request)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    # Writer thread -----------------------------------------------------------
+    def _encode(self, item) -> bytes:
+        kind, route, t, latency_s, payload, output, request = item
+        meta = {"kind": kind, "route": route, "t": t, "latency_ms": 1000 * latency_s,
+                "output": output, **request}
+        if kind == "dynamic":
+            frames = [base64.b64decode(f.split(",", 1)[1] if "," in f else f) for f in payload]
+            meta["frame_bytes"] = [len(f) for f in frames]
+            blob = b"".join(frames)
+        else:
+            arr = np.ascontiguousarray(payload, dtype=np.float32)
+            meta["shape"] = list(arr.shape)
+            blob = arr.tobytes()
+        meta_bytes = json.dumps(meta, separators=(",", ":")).encode()
+        return _HEADER.pack(len(meta_bytes), len(blob)) + meta_bytes + blob
+
+    def _open(self):
+        if self._file is not None:
+            self._file.close()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._path = self.directory / f"capture-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.sgcap"
+        self._file = open(self._path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_seconds)
+            except queue.Empty:
+                item = False
+            if item is None:
+                break
+            if item:
+                try:
+                    if self._file is None or self._file.tell() >= self.max_file_bytes:
+                        self._open()
+                    self._file.write(self._encode(item))
+                    self.written += 1
+                except Exception as e:
+                    self.dropped += 1
+                    print(f"[capture] failed to write record: {e}")
+            if self._file is not None and time.monotonic() - last_flush >= self.flush_seconds:
+                self._file.flush()
+                last_flush = time.monotonic()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self, timeout: float = 5.0):
+        """Write out what is queued, then stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def describe(self) -> dict:
+        return {
+            "path": str(self._path) if self._path else None,
+            "sample_rate": self.sample_rate,
+            "dynamic_sample_rate": self.dynamic_sample_rate,
+            "written": self.written,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+        }
+
+
+def read_capture(path: Path) -> Iterator[CaptureRecord]:
+    """Yield records from a capture file; a truncated last record (crash mid-write) is ignored."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a traffic capture file")
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            meta_len, blob_len = _HEADER.unpack(header)
+            meta_bytes = f.read(meta_len)
+            blob = f.read(blob_len)
+            if len(meta_bytes) < meta_len or len(blob) < blob_len:
+                return
+            meta = json.loads(meta_bytes)
+            if meta["kind"] == "dynamic":
+                frames: List[bytes] = []
+                offset = 0
+                for n in meta["frame_bytes"]:
+                    frames.append(blob[offset : offset + n])
+                    offset += n
+                yield CaptureRecord(meta, frames)
+            else:
+                yield CaptureRecord(meta, np.frombuffer(blob, dtype=np.float32).reshape(meta["shape"]))
@@ -2,6 +2,7 @@
 from pathlib import Path
 import argparse
 import json
+import time
 
 import numpy as np
 from sklearn.model_selection import train_test_split
@@ -14,15 +15,22 @@ import joblib
 
 
 DATA_PATH = Path("data/samples.csv")
+STORE_DIR = Path("data/store/letters")
 MODELS_DIR = Path("models")
 MODELS_DIR.mkdir(parents=True, exist_ok=True)
 MODEL_PATH = MODELS_DIR / "hand_static.joblib"
 CLASSES_PATH = MODELS_DIR / "class_names.json"
 METRICS_PATH = MODELS_DIR / "metrics.txt"
+HEAVY_MODEL_PATH = MODELS_DIR / "hand_static_heavy.joblib"
 
 
 def load_csv(path: Path):
     assert path.exists(), f"Dataset not found at {path}. Run collect_data.py first."
+    if path.suffix == ".sgsmp":  # collect_data.py --format bin
+        from sample_writer import read_samples
+
+        X, labels = read_samples(path)
+        return X, labels, np.array(["label"] + [f"f{i}" for i in range(X.shape[1])])
     raw = np.genfromtxt(path, delimiter=",", dtype=str)
     header = raw[0]
     data = raw[1:]
@@ -65,9 +73,28 @@ def main():
                     help="Classifier to use (default: svm-linear)")
     ap.add_argument("--test-size", type=float, default=0.2, help="Validation split (default: 0.2)")
     ap.add_argument("--seed", type=int, default=42, help="Random seed")
+    ap.add_argument("--data", type=Path, default=DATA_PATH,
+                    help=f"samples.csv or collect_data.py --format bin output (default: {DATA_PATH})")
+    ap.add_argument("--store", type=Path, nargs="?", const=STORE_DIR, default=None,
+                    help=f"Train on the raw landmark store instead of --data (default dir: {STORE_DIR})")
+    ap.add_argument("--cascade", action="store_true",
+                    help="Also train a heavy model and tune the fast->heavy cascade threshold")
+    ap.add_argument("--heavy-model", choices=["svm-rbf", "mlp"], default="svm-rbf",
+                    help="Second-stage model for --cascade (default: svm-rbf)")
+    ap.add_argument("--augment", type=int, default=0,
+                    help="Add this many randomly rotated/scaled/jittered copies of the training split")
+    ap.add_argument("--augment-mirror", type=float, default=0.0,
+                    help="With --augment: probability of mirroring a copy (left <-> right hand)")
     args = ap.parse_args()
 
-    X, labels, header = load_csv(DATA_PATH)
+    if args.store:
+        from landmark_store import LandmarkStore
+
+        store = LandmarkStore(args.store)
+        X, labels = np.asarray(store.features("wrist_max")), store.labels  # same features as samples.csv
+        print(store.summary())
+    else:
+        X, labels, header = load_csv(args.data)
 
     # Encode labels -> integers (sorted for stable order)
     class_names = sorted(list(set(labels.tolist())))
@@ -79,6 +106,18 @@ def main():
         X, y, test_size=args.test_size, stratify=y, random_state=args.seed
     )
 
+    if args.augment:
+        from landmark_augment import LandmarkAugment
+
+        aug = LandmarkAugment(mirror_p=args.augment_mirror, time_warp=0.0, normalize="max", seed=args.seed)
+        t0 = time.perf_counter()
+        n = len(X_tr)
+        X_tr = np.concatenate([X_tr] + [aug(X_tr) for _ in range(args.augment)])
+        y_tr = np.tile(y_tr, args.augment + 1)
+        dt = time.perf_counter() - t0
+        print(f"Augmented training set: {n} -> {len(X_tr)} samples in {dt:.2f} s "
+              f"({n * args.augment / max(dt, 1e-9):.0f} samples/s)")
+
     # Build & fit
     clf = build_model(args.model)
     clf.fit(X_tr, y_tr)
@@ -111,6 +150,15 @@ def main():
     print(f"Saved classes to {CLASSES_PATH}")
     print(f"Saved metrics to {METRICS_PATH}")
 
+    if args.cascade:
+        from tune_cascade import tune
+
+        heavy = build_model(args.heavy_model)
+        heavy.fit(X_tr, y_tr)
+        joblib.dump(heavy, HEAVY_MODEL_PATH)
+        print(f"\nSaved heavy model ({args.heavy_model}) to {HEAVY_MODEL_PATH}")
+        tune(clf, heavy, class_names, X_va, y_va)
+
 
 if __name__ == "__main__":
     main()
@@ -15,6 +15,7 @@ from sklearn.svm import LinearSVC
 FEATURE_SPECS = {
     "cross": {
         "data_path": Path("data/samples_r_cross_js.csv"),
+        "landmarks": [0, 5, 6, 7, 8, 9, 10, 11, 12, 13, 17],
         "model_path": Path("models/r_cross_js_svm.joblib"),
         "classes_path": Path("models/r_cross_js_classes.json"),
         "metrics_path": Path("models/r_cross_js_metrics.txt"),
@@ -23,6 +24,7 @@ FEATURE_SPECS = {
     },
     "tuck": {
         "data_path": Path("data/samples_r_tuck_js.csv"),
+        "landmarks": [0, 5, 9, 13, 14, 15, 16, 17, 18, 19, 20],
         "model_path": Path("models/r_tuck_js_svm.joblib"),
         "classes_path": Path("models/r_tuck_js_classes.json"),
         "metrics_path": Path("models/r_tuck_js_metrics.txt"),
@@ -31,6 +33,7 @@ FEATURE_SPECS = {
     },
     "thumb": {
         "data_path": Path("data/samples_r_thumb_js.csv"),
+        "landmarks": [0, 1, 2, 3, 4, 5, 9, 13, 14, 15, 16, 17, 18, 19, 20],
         "model_path": Path("models/r_thumb_js_svm.joblib"),
         "classes_path": Path("models/r_thumb_js_classes.json"),
         "metrics_path": Path("models/r_thumb_js_metrics.txt"),
@@ -39,6 +42,7 @@ FEATURE_SPECS = {
     },
     "vertical": {
         "data_path": Path("data/samples_r_vertical_js.csv"),
+        "landmarks": [0, 5, 6, 7, 8, 9, 10, 11, 12, 13, 17],
         "model_path": Path("models/r_vertical_js_svm.joblib"),
         "classes_path": Path("models/r_vertical_js_classes.json"),
         "metrics_path": Path("models/r_vertical_js_metrics.txt"),
@@ -46,6 +50,8 @@ FEATURE_SPECS = {
         "frontend_browser_model_path": Path("frontend/sgsl/public/models/r_vertical_js_browser.json"),
     },
 }
+# "landmarks": the palm-normalized subset of the browser collector (collect_data_mini_js.html), used with --store
+STORE_ROOT = Path("data/store")
 
 
 def load_csv(path: Path):
@@ -137,11 +143,23 @@ def export_browser_model(clf: Pipeline, class_names, feature: str, out_path: Pat
         json.dump(model_json, f)
 
 
-def train_feature(feature: str, test_size: float, seed: int, c_value: float):
+def dataset_path(feature: str, store_root=None) -> Path:
+    """The feature's CSV, or its landmark store <store_root>/r_<feature> (collect_data_mini.py)."""
+    return store_root / f"r_{feature}" if store_root else FEATURE_SPECS[feature]["data_path"]
+
+
+def train_feature(feature: str, test_size: float, seed: int, c_value: float, store_root=None):
     spec = FEATURE_SPECS[feature]
     spec["model_path"].parent.mkdir(parents=True, exist_ok=True)
+    dataset = dataset_path(feature, store_root)
 
-    X, labels = load_csv(spec["data_path"])
+    if store_root:
+        from landmark_store import LandmarkStore
+
+        store = LandmarkStore(dataset)
+        X, labels = np.asarray(store.features("palm", spec["landmarks"])), store.labels
+    else:
+        X, labels = load_csv(dataset)
     class_names = sorted(list(set(labels.tolist())))
     if len(class_names) != 2:
         raise ValueError(
@@ -168,7 +186,7 @@ def train_feature(feature: str, test_size: float, seed: int, c_value: float):
         json.dump(class_names, f)
     with open(spec["metrics_path"], "w") as f:
         f.write(f"Feature: {feature}\n")
-        f.write(f"Dataset: {spec['data_path']}\n")
+        f.write(f"Dataset: {dataset}\n")
         f.write("Model: linear svm\n\n")
         f.write("Classes:\n")
         f.write(json.dumps(class_names) + "\n\n")
@@ -181,7 +199,7 @@ def train_feature(feature: str, test_size: float, seed: int, c_value: float):
     export_browser_model(clf, class_names, feature, spec["frontend_browser_model_path"])
 
     print(f"\n[{feature}] classes: {class_names}")
-    print(f"[{feature}] dataset: {spec['data_path']}")
+    print(f"[{feature}] dataset: {dataset}")
     print(f"[{feature}] model:   {spec['model_path']}")
     print(f"[{feature}] classes: {spec['classes_path']}")
     print(f"[{feature}] metrics: {spec['metrics_path']}")
@@ -202,6 +220,8 @@ def main():
     ap.add_argument("--test-size", type=float, default=0.2, help="Validation split (default: 0.2)")
     ap.add_argument("--seed", type=int, default=42, help="Random seed")
     ap.add_argument("--c", type=float, default=1.0, help="LinearSVC C value")
+    ap.add_argument("--store", type=Path, nargs="?", const=STORE_ROOT, default=None,
+                    help=f"Train on the raw landmark stores <dir>/r_<feature> instead of the CSVs (default dir: {STORE_ROOT})")
     args = ap.parse_args()
 
     if args.feature == "all":
@@ -213,12 +233,12 @@ def main():
     skipped = []
 
     for feature in targets:
-        spec = FEATURE_SPECS[feature]
-        if not spec["data_path"].exists():
+        dataset = dataset_path(feature, args.store)
+        if not (dataset / "meta.json" if args.store else dataset).exists():
             msg = (
-                f"[{feature}] Skipping because dataset not found: {spec['data_path']}"
+                f"[{feature}] Skipping because dataset not found: {dataset}"
                 if args.feature == "all"
-                else f"[{feature}] Dataset not found: {spec['data_path']}"
+                else f"[{feature}] Dataset not found: {dataset}"
             )
             if args.feature == "all":
                 print(msg)
@@ -227,7 +247,7 @@ def main():
             raise FileNotFoundError(msg)
 
         try:
-            train_feature(feature, args.test_size, args.seed, args.c)
+            train_feature(feature, args.test_size, args.seed, args.c, args.store)
             trained.append(feature)
         except Exception as exc:
             if args.feature == "all":
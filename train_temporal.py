@@ -1,13 +1,13 @@
 from pathlib import Path
 import argparse
-import glob, json
+import glob, json, time, zipfile
 import numpy as np
 import torch
 from torch.utils.data import Dataset, DataLoader
 import torch.nn as nn
 import torch.optim as optim
 
-from temporal_model import SignSeqModel
+from temporal_model import build_seq_model
 from seq_utils import normalize_landmarks, pad_or_crop
 
 def discover_labels(train_root: Path, val_root: Path):
@@ -24,6 +24,14 @@ def discover_labels(train_root: Path, val_root: Path):
         raise RuntimeError(f"No label folders found under {train_root} or {val_root}")
     return sorted(labs)
 
+def npz_shape(path, key="x"):
+    """Shape of one array in an .npz, read from its .npy header (the data is not decompressed)."""
+    with zipfile.ZipFile(path) as z, z.open(f"{key}.npy") as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            return np.lib.format.read_array_header_1_0(f)[0]
+        return np.lib.format.read_array_header_2_0(f)[0]
+
 class ClipFolderDS(Dataset):
     def __init__(self, root: Path, labels, T=24):
         self.files = []
@@ -35,6 +43,11 @@ class ClipFolderDS(Dataset):
                 self.files += sorted(glob.glob(str(root / lab / "*.npz")))
         if not self.files:
             raise RuntimeError(f"No .npz clips found under {root}")
+        # 63 (one hand) or 126 (collect_sequences.py --two-hands); a folder must not mix them.
+        dims = {int(npz_shape(f)[1]) for f in self.files}
+        if len(dims) != 1:
+            raise RuntimeError(f"Mixed landmark widths {sorted(dims)} under {root}")
+        self.in_dim = dims.pop()
     def __len__(self): return len(self.files)
     def __getitem__(self, i):
         path = self.files[i]
@@ -51,88 +64,210 @@ class ClipFolderDS(Dataset):
         seq = pad_or_crop(seq, self.T)
         return seq.astype(np.float32), y
 
-def main():
+def run_epoch(model, dl, crit, device, opt=None):
+    """One pass over dl (training when opt is given) -> (loss sum, correct, samples)."""
+    train = opt is not None
+    model.train(train)
+    total, correct, tot_loss = 0, 0, 0.0
+    for x,y in dl:
+        x = x.to(device); y = y.to(device)
+        with torch.set_grad_enabled(train):
+            logits = model(x)
+            loss = crit(logits, y)
+            if train:
+                opt.zero_grad(); loss.backward(); opt.step()
+        tot_loss += float(loss.item()) * x.size(0)
+        pred = logits.argmax(dim=-1)
+        correct += int((pred == y).sum().item())
+        total += x.size(0)
+    return tot_loss, correct, total
+
+def timed(dl, stats: dict):
+    """Iterate dl, adding the time spent waiting for each batch (loading + collate/augment) to stats["wait"]."""
+    it = iter(dl)
+    while True:
+        t0 = time.perf_counter()
+        try:
+            batch = next(it)
+        except StopIteration:
+            return
+        stats["wait"] += time.perf_counter() - t0
+        yield batch
+
+def save_checkpoint(save_dir: Path, name: str, state_dict, T: int, labels, model_cfg: dict):
+    """Write <name>_model.pt + <name>_labels.json in the format TemporalInfer loads; returns both paths."""
+    save_dir.mkdir(parents=True, exist_ok=True)
+    ckpt_path = save_dir / f"{name}_model.pt"
+    labels_path = save_dir / f"{name}_labels.json"
+    torch.save({
+        "state_dict": state_dict,
+        "T": T,
+        "num_classes": len(labels),
+        "labels": labels,
+        "model_cfg": model_cfg,
+    }, ckpt_path)
+    labels_path.write_text(json.dumps({
+        "labels": labels, "T": T, "num_classes": len(labels)
+    }, indent=2))
+    return ckpt_path, labels_path
+
+def report_quantized(ckpt_path: Path, dl_val, crit):
+    """Write the dynamic int8 sibling (quantize_models.py) and print its accuracy delta and CPU latency."""
+    from infer_temporal import load_checkpoint
+    from quantize_models import load_quantized_sequence, print_speed, save_quantized_sequence
+
+    out = save_quantized_sequence(ckpt_path)
+    cpu = torch.device("cpu")
+    model, meta = load_checkpoint(ckpt_path, cpu)
+    qmodel = load_quantized_sequence(out, meta)
+    print(f"Saved {out}")
+    if dl_val is not None:
+        (_, c_f, n), (_, c_q, _) = run_epoch(model, dl_val, crit, cpu), run_epoch(qmodel, dl_val, crit, cpu)
+        print(f"  val acc        float32 {c_f / n:.3f}   int8 {c_q / n:.3f}   (delta {(c_q - c_f) / n:+.3f})")
+    print_speed(model, qmodel, [(f"batch {b}", (torch.randn(b, meta["T"], meta["in_dim"]),)) for b in (1, 64)])
+
+def model_cfg(args, in_dim: int) -> dict:
+    """Checkpoint model_cfg for the chosen architecture (build_seq_model / TemporalInfer read it back)."""
+    if args.arch == "tcn":
+        return {"arch": "tcn", "in_dim": in_dim, "hidden": args.hidden, "layers": args.layers or 4,
+                "kernel_size": args.kernel_size, "bidirectional": False}
+    return {"arch": "lstm", "in_dim": in_dim, "hidden": args.hidden, "layers": args.layers or 2,
+            "bidirectional": args.bidirectional}
+
+def parse_args(argv=None):
     ap = argparse.ArgumentParser()
     ap.add_argument("--data_dir", type=Path, default=Path("data"))
     ap.add_argument("--train_subdir", type=str, default="clips_train")
     ap.add_argument("--val_subdir", type=str, default="clips_val")
     ap.add_argument("--T", type=int, default=24)
-    ap.add_argument("--batch", type=int, default=64)
+    ap.add_argument("--batch", type=int, default=64, help="Global batch size (split across --procs)")
     ap.add_argument("--epochs", type=int, default=20)
     ap.add_argument("--lr", type=float, default=2e-3)
     ap.add_argument("--wd", type=float, default=1e-4)
-    ap.add_argument("--hidden", type=int, default=128)
-    ap.add_argument("--layers", type=int, default=2)
-    ap.add_argument("--bidirectional", action="store_true")
+    ap.add_argument("--arch", choices=["lstm", "tcn"], default="lstm",
+                    help="lstm: SignSeqModel; tcn: dilated causal convolutions (faster on CPU, always streamable)")
+    ap.add_argument("--hidden", type=int, default=128, help="LSTM hidden size / TCN channels")
+    ap.add_argument("--layers", type=int, default=None, help="LSTM layers (default 2) / TCN blocks (default 4)")
+    ap.add_argument("--kernel_size", type=int, default=3, help="TCN kernel size")
+    ap.add_argument("--bidirectional", action="store_true", help="LSTM only")
     ap.add_argument("--save_dir", type=Path, default=Path("models"))
-    args = ap.parse_args()
+    ap.add_argument("--labels", type=str, nargs="*", default=None,
+                    help="Train on these label folders only (e.g. the Module 3 vocabulary)")
+    ap.add_argument("--name", type=str, default="seq",
+                    help="Artifact prefix: <name>_model.pt and <name>_labels.json")
+    ap.add_argument("--packed", action="store_true",
+                    help="Read clips from a memory-mapped pack (clip_pack.py; built/refreshed automatically)")
+    ap.add_argument("--workers", type=int, default=2, help="DataLoader workers (per process)")
+    ap.add_argument("--augment", action="store_true",
+                    help="Random rotation/scale/noise/time warp of each training batch (landmark_augment.py)")
+    ap.add_argument("--aug_mirror", type=float, default=0.0,
+                    help="With --augment: probability of mirroring a clip (swaps hands for two-hand clips)")
+    ap.add_argument("--procs", type=int, default=1,
+                    help="Data-parallel training processes (DDP over gloo, see ddp_utils.py)")
+    ap.add_argument("--threads", type=int, default=0, help="Torch threads per process (0: cores / procs)")
+    ap.add_argument("--quantize", action="store_true",
+                    help="Also write <name>_model.int8.pt (dynamic int8) and report its accuracy delta / latency")
+    ap.add_argument("--seed", type=int, default=0)
+    return ap.parse_args(argv)
+
+def train(rank, world, args):
+    """One training process; rank 0 logs, validates and saves. Returns the per-epoch history on rank 0."""
+    import ddp_utils
+
+    main_proc = rank == 0
+    log = print if main_proc else (lambda *a, **k: None)
+    torch.manual_seed(args.seed)  # same initial weights on every rank
 
     train_root = args.data_dir / args.train_subdir
     val_root = args.data_dir / args.val_subdir
     labels = discover_labels(train_root, val_root)
+    if args.labels:
+        missing = sorted(set(args.labels) - set(labels))
+        if missing:
+            raise RuntimeError(f"No clip folders for labels {missing}")
+        labels = sorted(set(args.labels))
     num_classes = len(labels)
-    print(f"Discovered labels ({num_classes}): {labels}")
+    log(f"Discovered labels ({num_classes}): {labels}")
 
-    ds_tr = ClipFolderDS(train_root, labels, T=args.T)
-    dl_tr = DataLoader(ds_tr, batch_size=args.batch, shuffle=True, num_workers=2, drop_last=True)
+    if args.packed:
+        from clip_pack import PackedClipDS as DS
+        if main_proc:
+            DS(train_root, labels, T=args.T)  # build/refresh the pack once before other ranks map it
+        ddp_utils.barrier(world)
+    else:
+        DS = ClipFolderDS
+    ds_tr = DS(train_root, labels, T=args.T)
+    collate = None
+    if args.augment:
+        from landmark_augment import AugmentCollate, LandmarkAugment
+        collate = AugmentCollate(LandmarkAugment(mirror_p=args.aug_mirror, normalize="middle_mcp"))
+    dl_tr = ddp_utils.sharded_loader(ds_tr, args.batch, rank, world, shuffle=True, drop_last=True,
+                                     collate_fn=collate, num_workers=args.workers)
 
     dl_val = None
-    if val_root.exists():
+    if main_proc and val_root.exists():
         try:
-            ds_val = ClipFolderDS(val_root, labels, T=args.T)
-            dl_val = DataLoader(ds_val, batch_size=args.batch, shuffle=False, num_workers=2)
+            ds_val = DS(val_root, labels, T=args.T)
+            if ds_val.in_dim != ds_tr.in_dim:
+                raise RuntimeError(f"val clips are [t,{ds_val.in_dim}], train clips are [t,{ds_tr.in_dim}]")
+            dl_val = DataLoader(ds_val, batch_size=args.batch, shuffle=False, num_workers=args.workers)
         except Exception as e:
             print(f"[warn] validation not available: {e}")
 
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    model = SignSeqModel(in_dim=63, hidden=args.hidden, num_classes=num_classes,
-                         num_layers=args.layers, bidirectional=args.bidirectional).to(device)
+    in_dim = ds_tr.in_dim
+    log(f"Input width: {in_dim} ({'two hands' if in_dim == 126 else 'one hand'})")
+    if world > 1:
+        log(f"Data-parallel: {world} processes x {torch.get_num_threads()} threads, "
+            f"{args.batch // world} clips per process per step")
+
+    device = torch.device("cuda" if torch.cuda.is_available() and world == 1 else "cpu")
+    cfg = model_cfg(args, in_dim)
+    net = build_seq_model(cfg, num_classes).to(device)
+    if args.arch == "tcn" and net.receptive_field < args.T:
+        log(f"[warn] TCN receptive field {net.receptive_field} < T={args.T}; raise --layers or --kernel_size")
+    model = ddp_utils.wrap(net, world)
     opt = optim.AdamW(model.parameters(), lr=args.lr, weight_decay=args.wd)
     crit = nn.CrossEntropyLoss(label_smoothing=0.05)
 
-    def run_epoch(dl, train=True):
-        if train: model.train()
-        else: model.eval()
-        total, correct, tot_loss = 0, 0, 0.0
-        for x,y in dl:
-            x = x.to(device); y = y.to(device)
-            with torch.set_grad_enabled(train):
-                logits = model(x)
-                loss = crit(logits, y)
-                if train:
-                    opt.zero_grad(); loss.backward(); opt.step()
-            tot_loss += float(loss.item()) * x.size(0)
-            pred = logits.argmax(dim=-1)
-            correct += int((pred == y).sum().item())
-            total += x.size(0)
-        return tot_loss / max(1,total), correct / max(1,total)
-
-    best_val = -1.0
+    def epoch(dl, train=True):
+        if train:
+            sums = ddp_utils.all_sum(list(run_epoch(model, timed(dl, stats), crit, device, opt)), world)
+        else:  # validation runs on rank 0 only, outside DDP
+            sums = run_epoch(net, dl, crit, device)
+        tot_loss, correct, total = sums
+        return tot_loss / max(1,total), correct / max(1,total), int(total)
+
+    history = []
     for ep in range(1, args.epochs+1):
-        tr_loss, tr_acc = run_epoch(dl_tr, train=True)
+        ddp_utils.set_epoch(dl_tr, ep)
+        stats = {"wait": 0.0}
+        t0 = time.perf_counter()
+        tr_loss, tr_acc, seen = epoch(dl_tr, train=True)
+        secs = time.perf_counter() - t0
         msg = f"epoch {ep:02d} | train loss {tr_loss:.4f} acc {tr_acc:.3f}"
+        entry = {"epoch": ep, "train_loss": tr_loss, "train_acc": tr_acc, "samples_per_s": seen / secs,
+                 "data_wait": stats["wait"] / secs}
         if dl_val is not None:
-            val_loss, val_acc = run_epoch(dl_val, train=False)
+            val_loss, val_acc, _ = epoch(dl_val, train=False)
             msg += f" | val loss {val_loss:.4f} acc {val_acc:.3f}"
-            if val_acc > best_val: best_val = val_acc
-        print(msg)
+            entry.update(val_loss=val_loss, val_acc=val_acc)
+        log(msg + f" | {seen / secs:.0f} samples/s, data wait {100 * stats['wait'] / secs:.0f}%")
+        history.append(entry)
 
-    args.save_dir.mkdir(parents=True, exist_ok=True)
-    ckpt_path = args.save_dir / "seq_model.pt"
-    torch.save({
-        "state_dict": model.state_dict(),
-        "T": args.T,
-        "num_classes": num_classes,
-        "labels": labels,
-        "model_cfg": {"in_dim":63,"hidden":args.hidden,"layers":args.layers,"bidirectional":args.bidirectional}
-    }, ckpt_path)
+    if not main_proc:
+        return None
+    paths = save_checkpoint(args.save_dir, args.name, ddp_utils.unwrap(model).state_dict(), args.T, labels, cfg)
+    for path in paths:
+        print(f"Saved {path}")
+    if args.quantize:
+        report_quantized(paths[0], dl_val, crit)
+    return history
 
-    (args.save_dir / "seq_labels.json").write_text(json.dumps({
-        "labels": labels, "T": args.T, "num_classes": num_classes
-    }, indent=2))
+def main():
+    import ddp_utils
+
+    args = parse_args()
+    ddp_utils.spawn(train, args.procs, args, threads=args.threads or None)
 
-    print(f"Saved {ckpt_path}")
-    print(f"Saved {(args.save_dir / 'seq_labels.json')}")
-    
 if __name__ == "__main__":
     main()
@@ -0,0 +1,173 @@
+# tune_cascade.py
+"""
+Choose the confidence threshold for the static-letter cascade.
+
+The fast model (normally svm-linear, models/hand_static.joblib) answers when
+its top-2 decision margin is >= threshold; other frames go to the heavy model
+(normally svm-rbf, models/hand_static_heavy.joblib). On the validation split
+used by train.py this script sweeps thresholds and reports, per threshold,
+the share of traffic sent to the heavy model, cascade accuracy and expected
+per-frame latency. It writes the chosen threshold to models/cascade.json,
+which server.py picks up.
+
+Examples:
+    python train.py --model svm-linear --cascade       # trains both + runs this
+    python tune_cascade.py                             # re-tune existing models
+    python tune_cascade.py --route pairs --tolerance 0.005
+"""
+from pathlib import Path
+import argparse
+import json
+import time
+
+import joblib
+import numpy as np
+from sklearn.metrics import confusion_matrix
+from sklearn.model_selection import train_test_split
+
+from static_scorer import StaticScorer
+
+MODELS_DIR = Path("models")
+DATA_PATH = Path("data/samples.csv")
+FAST_MODEL_PATH = MODELS_DIR / "hand_static.joblib"
+HEAVY_MODEL_PATH = MODELS_DIR / "hand_static_heavy.joblib"
+CLASSES_PATH = MODELS_DIR / "class_names.json"
+CASCADE_PATH = MODELS_DIR / "cascade.json"
+
+
+def top2_margin(scores: np.ndarray):
+    """scores: (N, C) -> (margins (N,), top1 idx (N,), top2 idx (N,))"""
+    order = np.argsort(scores, axis=1)
+    top1, top2 = order[:, -1], order[:, -2]
+    rows = np.arange(scores.shape[0])
+    return scores[rows, top1] - scores[rows, top2], top1, top2
+
+
+def confusion_pairs(y_true: np.ndarray, y_pred: np.ndarray, class_names, min_count: int = 2, limit: int = 8):
+    """Most frequent unordered (true, predicted) letter pairs among the fast model's errors."""
+    cm = confusion_matrix(y_true, y_pred, labels=np.arange(len(class_names)))
+    sym = np.triu(cm + cm.T, k=1)
+    pairs = []
+    for i, j in zip(*np.nonzero(sym >= min_count)):
+        pairs.append((int(sym[i, j]), [class_names[i], class_names[j]]))
+    pairs.sort(key=lambda p: -p[0])
+    return [p for _, p in pairs[:limit]]
+
+
+def per_frame_latency(scorer: StaticScorer, X: np.ndarray, n: int = 300) -> float:
+    """Mean seconds per single-frame predict, as served (batch size 1)."""
+    X = X[: max(1, min(n, X.shape[0]))]
+    scorer.predict(X[:1])
+    t0 = time.perf_counter()
+    for i in range(X.shape[0]):
+        scorer.predict(X[i : i + 1])
+    return (time.perf_counter() - t0) / X.shape[0]
+
+
+def sweep(fast: StaticScorer, heavy: StaticScorer, X: np.ndarray, y: np.ndarray,
+          thresholds, pairs=None):
+    """Evaluate the cascade on (X, y) for every threshold."""
+    fast_scores = fast.scores(X)
+    heavy_pred = np.argmax(heavy.scores(X), axis=1)
+    margins, top1, top2 = top2_margin(fast_scores)
+    pair_ok = np.ones(len(y), dtype=bool)
+    if pairs:
+        names = fast.class_names
+        pair_set = {frozenset(p) for p in pairs}
+        pair_ok = np.array([frozenset((names[a], names[b])) in pair_set for a, b in zip(top1, top2)])
+    rows = []
+    for thr in thresholds:
+        routed = (margins < thr) & pair_ok
+        pred = np.where(routed, heavy_pred, top1)
+        rows.append({
+            "threshold": float(thr),
+            "heavy_share": float(routed.mean()),
+            "accuracy": float((pred == y).mean()),
+        })
+    return rows, float((top1 == y).mean()), float((heavy_pred == y).mean())
+
+
+def tune(fast_clf, heavy_clf, class_names, X_va: np.ndarray, y_va: np.ndarray,
+         tolerance: float = 0.002, route: str = "margin", out_path: Path = CASCADE_PATH,
+         write: bool = True) -> dict:
+    fast = StaticScorer(fast_clf, class_names)
+    heavy = StaticScorer(heavy_clf, class_names)
+    fast_pred = np.argmax(fast.scores(X_va), axis=1)
+    pairs = confusion_pairs(y_va, fast_pred, class_names)
+
+    margins, _, _ = top2_margin(fast.scores(X_va))
+    grid = np.unique(np.concatenate([[0.0], np.quantile(margins, np.linspace(0, 1, 41))]))
+    rows, fast_acc, heavy_acc = sweep(fast, heavy, X_va, y_va, grid,
+                                      pairs if route == "pairs" else None)
+
+    t_fast = per_frame_latency(fast, X_va)
+    t_heavy = per_frame_latency(heavy, X_va)
+    for r in rows:
+        # Routed frames pay for both stages.
+        r["latency_ms"] = 1000 * (t_fast + r["heavy_share"] * t_heavy)
+
+    target = max(fast_acc, heavy_acc) - tolerance
+    ok = [r for r in rows if r["accuracy"] >= target]
+    best = min(ok, key=lambda r: (r["heavy_share"], r["threshold"])) if ok else max(rows, key=lambda r: r["accuracy"])
+
+    print(f"fast acc {fast_acc:.4f} ({t_fast * 1e6:.0f} us/frame) | "
+          f"heavy acc {heavy_acc:.4f} ({t_heavy * 1e6:.0f} us/frame)")
+    print(f"confusion pairs: {pairs}")
+    print(f"{'threshold':>10} {'heavy %':>8} {'accuracy':>9} {'ms/frame':>9}")
+    shown = rows[:: max(1, len(rows) // 15)]
+    for r in shown + ([best] if best not in shown else []):
+        mark = "  <- chosen" if r is best else ""
+        print(f"{r['threshold']:>10.3f} {100 * r['heavy_share']:>7.1f}% {r['accuracy']:>9.4f} {r['latency_ms']:>9.3f}{mark}")
+    saved = 1.0 - best["latency_ms"] / (1000 * t_heavy) if t_heavy > 0 else 0.0
+    print(f"chosen threshold {best['threshold']:.3f}: {100 * best['heavy_share']:.1f}% of frames to heavy, "
+          f"accuracy {best['accuracy']:.4f}, {100 * saved:.0f}% latency saved vs heavy-only")
+
+    config = {
+        "threshold": best["threshold"],
+        "route": route,
+        "confusion_pairs": pairs,
+        "validation": {
+            "fast_accuracy": fast_acc,
+            "heavy_accuracy": heavy_acc,
+            "cascade_accuracy": best["accuracy"],
+            "heavy_share": best["heavy_share"],
+            "fast_ms": 1000 * t_fast,
+            "heavy_ms": 1000 * t_heavy,
+            "cascade_ms": best["latency_ms"],
+        },
+    }
+    if write:
+        out_path.write_text(json.dumps(config, indent=2))
+        print(f"Saved cascade config to {out_path}")
+    return config
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Pick the static cascade threshold from validation data")
+    ap.add_argument("--data", type=Path, default=DATA_PATH)
+    ap.add_argument("--fast", type=Path, default=FAST_MODEL_PATH)
+    ap.add_argument("--heavy", type=Path, default=HEAVY_MODEL_PATH)
+    ap.add_argument("--test-size", type=float, default=0.2, help="Validation split (must match train.py)")
+    ap.add_argument("--seed", type=int, default=42, help="Random seed (must match train.py)")
+    ap.add_argument("--tolerance", type=float, default=0.002,
+                    help="Accuracy the cascade may give up vs the best single model")
+    ap.add_argument("--route", choices=["margin", "pairs"], default="margin",
+                    help="'pairs' only escalates when the fast top-2 is a known confusion pair")
+    ap.add_argument("--out", type=Path, default=CASCADE_PATH)
+    ap.add_argument("--dry-run", action="store_true", help="Report only; do not write the config")
+    args = ap.parse_args()
+
+    from train import load_csv
+
+    X, labels, _ = load_csv(args.data)
+    class_names = json.loads(CLASSES_PATH.read_text())
+    cls_to_idx = {c: i for i, c in enumerate(class_names)}
+    y = np.array([cls_to_idx[c] for c in labels], dtype=np.int64)
+    _, X_va, _, y_va = train_test_split(X, y, test_size=args.test_size, stratify=y, random_state=args.seed)
+
+    tune(joblib.load(args.fast), joblib.load(args.heavy), class_names, X_va, y_va,
+         tolerance=args.tolerance, route=args.route, out_path=args.out, write=not args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
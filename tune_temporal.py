@@ -0,0 +1,259 @@
+# tune_temporal.py
+"""
+Random hyperparameter search for train_temporal.py (LSTM or TCN) with
+concurrent trials and median pruning.
+
+- Data: clips are packed once (clip_pack.py) and every T in the search space
+  is materialized as a normalized [N, T, D] array under <out>/cache/ (reused
+  by later runs until the clips change). No trial reads an .npz.
+- Concurrency: --jobs trial processes run at once with --threads torch threads
+  each (default: cores // threads jobs).
+- Pruning: after --warmup epochs, a trial stops when its best validation
+  accuracy so far is below the median of the other trials' best at the same
+  epoch (once at least --min_reports trials have reached that epoch).
+- Output: every finished trial is saved as <out>/trial_NNN_model.pt
+  (+ _labels.json, loadable by TemporalInfer). Once all trials are done, each
+  saved model's batch-1 CPU latency is measured one at a time with the trial
+  thread budget, so concurrent training does not skew it. Results are written
+  to <out>/trials.jsonl, and a table marks the accuracy/latency frontier.
+
+Examples:
+    python tune_temporal.py --data_dir data --trials 24 --epochs 20 --threads 1
+    python tune_temporal.py --labels BOOK DRINK GO --trials 16 --out models/tune_dyn
+"""
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import Manager
+from pathlib import Path
+
+import numpy as np
+
+SPACE = {
+    "arch": ["lstm", "tcn"],
+    "hidden": [64, 96, 128, 192, 256],
+    "layers": [1, 2, 3, 4],  # TCN blocks: receptive field 5, 13, 29, 61 frames
+    "bidirectional": [False, True],
+    "T": [16, 24, 32],
+    "lr": (5e-4, 5e-3),  # log-uniform
+    "wd": (1e-5, 1e-3),  # log-uniform
+}
+
+
+def sample_config(rng: np.random.Generator) -> dict:
+    cfg = {}
+    for key, space in SPACE.items():
+        if isinstance(space, tuple):
+            lo, hi = np.log(space[0]), np.log(space[1])
+            cfg[key] = float(np.exp(rng.uniform(lo, hi)))
+        else:
+            cfg[key] = space[int(rng.integers(len(space)))]
+    if cfg["arch"] == "tcn":
+        cfg["bidirectional"] = False  # always causal
+    return cfg
+
+
+# ---------------------------
+# Cached dataset
+# ---------------------------
+def cache_split(root: Path, labels, Ts, cache_dir: Path) -> dict:
+    """T -> (x.npy, y.npy) of normalized windows for one split, keyed by the clips and labels they came from."""
+    from clip_pack import _windows, build_pack, load_index, raw_path
+
+    pack = build_pack(root, Ts[0], verbose=False)  # raw frames; windows for every T are cut below
+    index = load_index(pack)
+    clips = [c for c in index["clips"] if c["label"] in labels]
+    if not clips:
+        raise RuntimeError(f"No clips for {labels} under {root}")
+    key = hashlib.sha1(json.dumps([labels, [(c["path"], c["mtime_ns"], c["size"]) for c in clips]])
+                       .encode()).hexdigest()[:12]
+    raw = None
+    out = {}
+    for T in Ts:
+        x_path = cache_dir / f"{root.name}_{key}_T{T}_x.npy"
+        y_path = cache_dir / f"{root.name}_{key}_T{T}_y.npy"
+        if not (x_path.exists() and y_path.exists()):
+            if raw is None:
+                raw = np.load(raw_path(pack, index), mmap_mode="r")
+            offsets = np.array([c["offset"] for c in clips], dtype=np.int64)
+            lengths = np.array([c["length"] for c in clips], dtype=np.int64)
+            L2I = {s: i for i, s in enumerate(labels)}
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            np.save(y_path, np.array([L2I[c["label"]] for c in clips], dtype=np.int64))
+            np.save(x_path, _windows(raw, offsets, lengths, T))
+        out[T] = (x_path, y_path)
+    return out
+
+
+def _loader(paths, batch: int, shuffle: bool, seed: int):
+    import torch
+    from torch.utils.data import DataLoader, TensorDataset
+
+    X = torch.from_numpy(np.load(paths[0]))
+    y = torch.from_numpy(np.load(paths[1]))
+    g = torch.Generator().manual_seed(seed)
+    return DataLoader(TensorDataset(X, y), batch_size=batch, shuffle=shuffle, generator=g)
+
+
+# ---------------------------
+# Trials
+# ---------------------------
+def should_prune(reports, trial_id: int, epoch: int, best: float, warmup: int, min_reports: int) -> bool:
+    if epoch <= warmup:
+        return False
+    others = [max(r[:epoch]) for tid, r in reports.items() if tid != trial_id and len(r) >= epoch]
+    return len(others) >= min_reports and best < statistics.median(others)
+
+
+def measure_latency(model, T: int, in_dim: int, runs: int = 100) -> float:
+    """Median batch-1 forward time in ms."""
+    import torch
+
+    x = torch.randn(1, T, in_dim)
+    times = []
+    with torch.no_grad():
+        for _ in range(10):
+            model(x)
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            model(x)
+            times.append(time.perf_counter() - t0)
+    return 1000 * statistics.median(times)
+
+
+def run_trial(trial_id: int, cfg: dict, data: dict, labels, args, reports) -> dict:
+    import torch
+    import torch.nn as nn
+    import torch.optim as optim
+
+    from temporal_model import build_seq_model
+    from train_temporal import run_epoch, save_checkpoint
+
+    torch.set_num_threads(args.threads)
+    torch.manual_seed(args.seed + trial_id)
+    tr_paths, val_paths = data[cfg["T"]]
+    dl_tr = _loader(tr_paths, args.batch, True, args.seed + trial_id)
+    dl_val = _loader(val_paths, args.batch, False, 0)
+    in_dim = dl_tr.dataset.tensors[0].shape[-1]
+
+    device = torch.device("cpu")
+    model_cfg = {"arch": cfg["arch"], "in_dim": in_dim, "hidden": cfg["hidden"], "layers": cfg["layers"],
+                 "bidirectional": cfg["bidirectional"]}
+    model = build_seq_model(model_cfg, len(labels))
+    opt = optim.AdamW(model.parameters(), lr=cfg["lr"], weight_decay=cfg["wd"])
+    crit = nn.CrossEntropyLoss(label_smoothing=0.05)
+
+    accs, status = [], "complete"
+    t0 = time.perf_counter()
+    for ep in range(1, args.epochs + 1):
+        run_epoch(model, dl_tr, crit, device, opt)
+        _, correct, total = run_epoch(model, dl_val, crit, device)
+        accs.append(correct / max(1, total))
+        reports[trial_id] = list(accs)
+        if should_prune(reports, trial_id, ep, max(accs), args.warmup, args.min_reports):
+            status = "pruned"
+            break
+
+    result = {"trial": trial_id, "status": status, "epochs": len(accs), "val_acc": max(accs),
+              "final_val_acc": accs[-1], "val_curve": [round(a, 4) for a in accs],
+              "train_s": round(time.perf_counter() - t0, 2),
+              "params": sum(p.numel() for p in model.parameters()), **cfg}
+    if status == "complete":
+        ckpt, _ = save_checkpoint(args.out, f"trial_{trial_id:03d}", model.state_dict(), cfg["T"], labels, model_cfg)
+        result["ckpt"] = str(ckpt)
+    return result
+
+
+def frontier(results) -> set:
+    """Trials not dominated by another one with higher-or-equal accuracy and lower-or-equal latency."""
+    done = [r for r in results if "latency_ms" in r]
+    keep = set()
+    for r in done:
+        if not any(o is not r and o["val_acc"] >= r["val_acc"] and o["latency_ms"] <= r["latency_ms"]
+                   and (o["val_acc"], o["latency_ms"]) != (r["val_acc"], r["latency_ms"]) for o in done):
+            keep.add(r["trial"])
+    return keep
+
+
+def main():
+    from train_temporal import discover_labels
+
+    ap = argparse.ArgumentParser(description="Parallel hyperparameter search for train_temporal.py")
+    ap.add_argument("--data_dir", type=Path, default=Path("data"))
+    ap.add_argument("--train_subdir", type=str, default="clips_train")
+    ap.add_argument("--val_subdir", type=str, default="clips_val")
+    ap.add_argument("--labels", type=str, nargs="*", default=None)
+    ap.add_argument("--trials", type=int, default=16)
+    ap.add_argument("--epochs", type=int, default=20)
+    ap.add_argument("--batch", type=int, default=64)
+    ap.add_argument("--threads", type=int, default=1, help="Torch threads per trial")
+    ap.add_argument("--jobs", type=int, default=0, help="Concurrent trials (0: cores // threads)")
+    ap.add_argument("--warmup", type=int, default=3, help="Epochs before a trial can be pruned")
+    ap.add_argument("--min_reports", type=int, default=3, help="Trials needed at an epoch before pruning on it")
+    ap.add_argument("--out", type=Path, default=Path("models/tune"))
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    train_root = args.data_dir / args.train_subdir
+    val_root = args.data_dir / args.val_subdir
+    if not val_root.exists():
+        raise RuntimeError(f"Tuning needs a validation split ({val_root} is missing)")
+    labels = discover_labels(train_root, val_root)
+    if args.labels:
+        missing = sorted(set(args.labels) - set(labels))
+        if missing:
+            raise RuntimeError(f"No clip folders for labels {missing}")
+        labels = sorted(set(args.labels))
+    args.out.mkdir(parents=True, exist_ok=True)
+    jobs = args.jobs or max(1, (os.cpu_count() or 1) // args.threads)
+
+    rng = np.random.default_rng(args.seed)
+    configs = [sample_config(rng) for _ in range(args.trials)]
+    t0 = time.perf_counter()
+    Ts = sorted({c["T"] for c in configs})
+    tr = cache_split(train_root, labels, Ts, args.out / "cache")
+    val = cache_split(val_root, labels, Ts, args.out / "cache")
+    data = {T: (tr[T], val[T]) for T in Ts}
+    print(f"Labels ({len(labels)}): {labels}")
+    print(f"Cached windows for T={sorted(data)} in {time.perf_counter() - t0:.2f} s; "
+          f"{args.trials} trials, {jobs} at a time x {args.threads} threads")
+
+    results = []
+    with Manager() as manager, ProcessPoolExecutor(max_workers=jobs) as pool:
+        reports = manager.dict()
+        futures = [pool.submit(run_trial, i, cfg, data, labels, args, reports) for i, cfg in enumerate(configs)]
+        for fut in as_completed(futures):
+            r = fut.result()
+            results.append(r)
+            print(f"trial {r['trial']:03d} {r['status']:<8} epoch {r['epochs']:>2}  val acc {r['val_acc']:.3f}")
+
+    import torch
+    from infer_temporal import load_checkpoint
+
+    torch.set_num_threads(args.threads)
+    for r in results:
+        if "ckpt" in r:
+            model, meta = load_checkpoint(Path(r["ckpt"]), torch.device("cpu"))
+            r["latency_ms"] = round(measure_latency(model, meta["T"], meta["in_dim"]), 4)
+    log_path = args.out / "trials.jsonl"
+    with log_path.open("w") as f:
+        for r in sorted(results, key=lambda r: r["trial"]):
+            f.write(json.dumps(r) + "\n")
+
+    best = frontier(results)
+    print(f"\n{'trial':>5}  {'val_acc':>7}  {'ms/seq':>7}  {'params':>8}  config")
+    for r in sorted(results, key=lambda r: (-r["val_acc"], r.get("latency_ms", float("inf")))):
+        cfg = (f"{r['arch']} hidden={r['hidden']} layers={r['layers']} bi={int(r['bidirectional'])} T={r['T']} "
+               f"lr={r['lr']:.1e} wd={r['wd']:.1e}")
+        lat = f"{r['latency_ms']:7.2f}" if "latency_ms" in r else f"{'pruned':>7}"
+        mark = " *" if r["trial"] in best else ""
+        print(f"{r['trial']:>5}  {r['val_acc']:7.3f}  {lat}  {r['params']:>8}  {cfg}{mark}")
+    print(f"\n* accuracy/latency frontier. {len(results)} trials in {time.perf_counter() - t0:.1f} s; log: {log_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# wlasl_dynamic.py
+"""
+I3D (WLASL-100) dynamic sign predictor.
+
+Preprocessing is split from the forward pass so the web tier can turn decoded
+frames into a compact uint8 clip (T, 224, 224, 3) and hand it to a local model
+or to an out-of-process worker (see dynamic_worker.py). The forward pass runs
+through an inference_backends engine.
+"""
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+CLIP_SIZE = 224
+CLIP_FRAMES = 64
+
+
+def preprocess_clip_uint8(frames: List[np.ndarray], target_frames: int = CLIP_FRAMES) -> Optional[np.ndarray]:
+    """
+    Resize (short side -> 224), center-crop and resample RGB frames to a fixed
+    length. Returns a contiguous (target_frames, 224, 224, 3) uint8 clip, or None.
+    """
+    if not frames:
+        return None
+    import cv2
+
+    processed = []
+    for frame in frames:
+        h, w = frame.shape[:2]
+        scale = CLIP_SIZE / min(h, w)
+        new_h, new_w = int(h * scale), int(w * scale)
+        resized = cv2.resize(frame, (new_w, new_h))
+        start_y = (new_h - CLIP_SIZE) // 2
+        start_x = (new_w - CLIP_SIZE) // 2
+        processed.append(resized[start_y : start_y + CLIP_SIZE, start_x : start_x + CLIP_SIZE])
+
+    clip = np.stack(processed, axis=0)
+    curr_frames = clip.shape[0]
+    if curr_frames < target_frames:
+        padding = np.repeat(clip[-1:], target_frames - curr_frames, axis=0)
+        clip = np.concatenate((clip, padding), axis=0)
+    elif curr_frames > target_frames:
+        indices = np.linspace(0, curr_frames - 1, target_frames).astype(int)
+        clip = clip[indices]
+    return np.ascontiguousarray(clip, dtype=np.uint8)
+
+
+def load_i3d(weights_path: Optional[Path], num_classes: int, device):
+    """
+    Eval-mode InceptionI3d on `device`. weights_path=None keeps the randomly
+    initialised network; only useful for benchmarking when the checkpoint is not
+    available.
+    """
+    try:
+        import torch
+        from collections import OrderedDict
+    except Exception as e:
+        raise RuntimeError(f"Missing dynamic inference deps: {e}")
+
+    repo_root = Path(__file__).resolve().parent
+    i3d_dir = repo_root / "WLASL" / "wlasl_model_test"
+    if str(i3d_dir) not in sys.path:
+        sys.path.append(str(i3d_dir))
+    from pytorch_i3d import InceptionI3d  # type: ignore
+
+    model = InceptionI3d(num_classes=num_classes, in_channels=3)
+    if weights_path is not None:
+        if not weights_path.exists():
+            raise FileNotFoundError(f"Weights file not found: {weights_path}")
+
+        checkpoint = torch.load(weights_path, map_location=device)
+        state_dict = checkpoint["state_dict"] if "state_dict" in checkpoint else checkpoint
+
+        new_state_dict = OrderedDict()
+        for k, v in state_dict.items():
+            name = k.replace("module.", "")
+            new_state_dict[name] = v
+
+        model.load_state_dict(new_state_dict)
+    model.to(device)
+    model.eval()
+    return model
+
+
+class WLASLDynamicPredictor:
+    def __init__(self, weights_path: Optional[Path], class_list_path: Path, backend: Optional[str] = None):
+        """
+        weights_path=None keeps the randomly initialised network (benchmarks only).
+        backend: inference_backends name ("torch", "torchscript"); None reads the config.
+        """
+        from inference_backends import create_engine
+
+        self.num_classes = 100
+        # Default to the full WLASL-100 head. Callers can still request an allowlist at inference time.
+        self.allowed_class_count = self.num_classes
+        self.engine = create_engine("dynamic", backend, weights_path=weights_path, num_classes=self.num_classes)
+        self.backend = self.engine.name
+        self.device = self.engine.device
+
+        self.classes = self._load_classes(class_list_path, limit=self.allowed_class_count)
+        # Case-insensitive lookup for allowlisting.
+        self.word_to_idx: Dict[str, int] = {}
+        for idx, word in self.classes.items():
+            key = word.strip().lower()
+            if key and key not in self.word_to_idx:
+                self.word_to_idx[key] = idx
+
+    def _load_classes(self, path: Path, limit: Optional[int] = None) -> dict:
+        if not path.exists():
+            return {}
+        idx_to_word = {}
+        for line in path.read_text().splitlines():
+            parts = line.strip().split()
+            if len(parts) < 2:
+                continue
+            idx = int(parts[0])
+            if limit and idx >= limit:
+                continue
+            idx_to_word[idx] = " ".join(parts[1:])
+        return idx_to_word
+
+    def predict(self, frames: List[np.ndarray], focus_labels: Optional[List[str]] = None) -> dict:
+        clip = preprocess_clip_uint8(frames)
+        if clip is None:
+            return {"error": "No frames to process."}
+        return self.predict_clip(clip, focus_labels=focus_labels)
+
+    def predict_clip(self, clip: np.ndarray, focus_labels: Optional[List[str]] = None) -> dict:
+        output = self.engine.predict_batch(clip[None])
+        restricted_logits = output[0, : self.allowed_class_count]
+
+        # If the client passes an allowlist of labels, score only those classes (softmax over the subset).
+        allowed_indices: Optional[List[int]] = None
+        if focus_labels:
+            allowed_indices = []
+            for label in focus_labels:
+                if not label:
+                    continue
+                idx = self.word_to_idx.get(label.strip().lower())
+                if idx is not None and idx < self.allowed_class_count:
+                    allowed_indices.append(idx)
+            allowed_indices = sorted(set(allowed_indices))
+            if not allowed_indices:
+                allowed_indices = None
+
+        if allowed_indices:
+            index_map = np.asarray(allowed_indices)
+            logits = restricted_logits[index_map]
+        else:
+            index_map = np.arange(restricted_logits.shape[0])
+            logits = restricted_logits
+        exps = np.exp(logits - logits.max())
+        probs = exps / exps.sum()
+        top = np.argsort(-probs, kind="stable")[: min(10, probs.shape[0])]
+
+        top10 = []
+        for j in top:
+            i = int(index_map[j])
+            label = self.classes.get(i, f"Unknown ({i})")
+            top10.append({"label": label, "score": float(probs[j])})
+
+        return {"top10": top10, "used_frames": int(clip.shape[0])}